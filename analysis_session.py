@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from embedding_cache import embedding_nbytes
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_TTL_SECONDS = 120.0
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+# Earlier turns replayed in each follow-up prompt; older ones are dropped to bound prefill.
+DEFAULT_MAX_TURNS = 4
+# Answer to a follow-up whose session has expired or was evicted.
+SESSION_EXPIRED = "I no longer have that camera view. Please ask about the crossing again."
+
+
+class AnalysisSession:
+    """
+    One user's conversation about one captured frame: the frame, its image
+    embedding once it has been encoded, and the questions and answers so far.
+    """
+
+    def __init__(self, session_id: str, frame, embedding=None, max_turns: int = DEFAULT_MAX_TURNS):
+        self.session_id = session_id
+        self.frame = frame
+        self.embedding = embedding
+        self.max_turns = max_turns
+        self.turns = []
+        self.last_used = time.monotonic()
+
+    @property
+    def nbytes(self) -> int:
+        if hasattr(self.frame, "nbytes"):
+            size = self.frame.nbytes
+        elif hasattr(self.frame, "size") and hasattr(self.frame, "getbands"):
+            size = self.frame.size[0] * self.frame.size[1] * len(self.frame.getbands())
+        else:
+            size = 0
+        if self.embedding is not None:
+            size += embedding_nbytes(self.embedding)
+        return size
+
+    def add_turn(self, question: str, answer: str):
+        self.turns.append((question, answer))
+        del self.turns[:-self.max_turns]
+
+    def chat_history(self) -> str:
+        """Earlier turns in Moondream2's prompt format, to pass as answer_question's chat_history."""
+        return "".join(f"Question: {question}\n\nAnswer: {answer}\n\n" for question, answer in self.turns)
+
+
+class SessionStore:
+    """
+    Analysis sessions by user session id.
+
+    Sessions unused for ttl_seconds expire. When the frames and embeddings
+    held by all sessions exceed max_bytes, the least recently used sessions
+    are evicted first.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_turns: int = DEFAULT_MAX_TURNS):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_turns = max_turns
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.started = 0
+        self.follow_ups = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _bytes(self) -> int:
+        return sum(session.nbytes for session in self._sessions.values())
+
+    def _evict(self):
+        now = time.monotonic()
+        for session_id in [k for k, s in self._sessions.items() if now - s.last_used > self.ttl_seconds]:
+            del self._sessions[session_id]
+            self.expired += 1
+        while self._sessions and self._bytes() > self.max_bytes:
+            session_id, _ = self._sessions.popitem(last=False)
+            self.evicted += 1
+            logging.info(f"Evicted analysis session {session_id} to stay within {self.max_bytes} bytes")
+
+    def start(self, session_id: str, frame, question: str, answer: str, embedding=None) -> AnalysisSession | None:
+        """
+        Starts (or restarts) a user's session on a newly analyzed frame.
+
+        Args:
+            session_id: The user's session id.
+            frame: The analyzed frame.
+            question: The question that was answered, e.g. the analysis prompt.
+            answer: Its answer, the first turn of the conversation.
+            embedding: The frame's image embedding, if it is already at hand.
+
+        Returns:
+            The session, or None if it alone would exceed the memory limit.
+        """
+        session = AnalysisSession(session_id, frame, embedding, self.max_turns)
+        session.add_turn(question, answer)
+        if session.nbytes > self.max_bytes:
+            logging.warning(f"Analysis session {session_id} ({session.nbytes} bytes) exceeds the session budget")
+            return None
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            self.started += 1
+            self._evict()
+        return session
+
+    def get(self, session_id: str) -> AnalysisSession | None:
+        """Returns the user's live session and marks it used, or None if there is none or it expired."""
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            self.follow_ups += 1
+            return session
+
+    def set_embedding(self, session: AnalysisSession, embedding):
+        """Keeps a session's embedding once it has been encoded, then re-checks the memory limit."""
+        with self._lock:
+            session.embedding = embedding
+            self._evict()
+
+    def end(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"sessions": len(self._sessions), "bytes": self._bytes(), "started": self.started,
+                    "follow_ups": self.follow_ups, "expired": self.expired, "evicted": self.evicted}
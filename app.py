@@ -1,17 +1,29 @@
+import time
+APP_START = time.perf_counter()
 import streamlit as st
 import os
 import asyncio
+import importlib
+import uuid
 import openai
 from streamlit_mic_recorder import mic_recorder
 
-# Import the modules for each phase
-from camera_controller import get_camera_feed_screenshot
-from moondream_analyzer import load_model, get_moondream_analysis
-from voice_pipeline import transcribe_user_request_realtime, generate_assistant_speech_realtime
+# Import the modules for each phase. The heavy ones (torch and transformers for the
+# model, selenium for the camera browsers) are imported by the background startup below.
+from voice_pipeline import (transcribe_user_request_realtime, generate_assistant_speech_realtime,
+                            aiter_in_thread, speak_sentences, audio_duration)
 from location_parser import extract_and_normalize_location
+from warm_start import StagedStartup, format_startup_report, startup_report
 
 st.set_page_config(page_title="Proof of Concept AI Street Crossing Assistant for Visually Impaired in NYC", layout="wide")
 
+@st.cache_resource
+def app_import_seconds():
+    # Only the first run of the script imports anything; later reruns find the modules loaded.
+    return time.perf_counter() - APP_START
+
+app_import_seconds()
+
 st.title("AI Street Crossing Assistant for Visually Impaired in NYC")
 st.markdown("Ask if it's safe to cross the street at a specific location in NYC.")
 
@@ -28,16 +40,92 @@ if not st.session_state.openai_api_key:
 
 client = openai.AsyncOpenAI(api_key=st.session_state.openai_api_key)
 
-@st.cache_resource
-def cached_load_model():
-    return load_model()
+MODEL_SERVER = os.environ.get("CV4VI_MODEL_SERVER")
+INFERENCE_WORKERS = int(os.environ.get("CV4VI_INFERENCE_WORKERS", "0"))
+
+def connect_model_server(_):
+    # A model_server.py process owns the model; this app is only a client of it.
+    from model_server import ModelClient
+    model_client = ModelClient(MODEL_SERVER)
+    if not model_client.ping():
+        raise RuntimeError(f"Could not reach the model server at {MODEL_SERVER}. Please check that it is running.")
+    return model_client
+
+def start_worker_pool(worker_pool_module):
+    # Several model processes on this host, each with its own threads and cores.
+    return worker_pool_module.WorkerPool(workers=INFERENCE_WORKERS).start()
+
+def load_local_model(analyzer):
+    model, tokenizer = analyzer.load_model()
+    if not model or not tokenizer:
+        raise RuntimeError("Failed to load the Moondream model. Please check the logs.")
+    return analyzer, model, tokenizer
+
+def warm_up_local_model(loaded):
+    analyzer, model, tokenizer = loaded
+    analyzer.warm_up(model)
+    # One scheduler for every session, so concurrent requests are batched instead of racing on the model.
+    scheduler = analyzer.get_inference_scheduler(model, tokenizer)
+    return analyzer.LocalAnalyzer(model, tokenizer, scheduler)
 
-with st.spinner("Loading the vision model... This may take a moment."):
-    model, tokenizer = cached_load_model()
+@st.cache_resource
+def model_startup():
+    """
+    Brings up the vision model in the background. Its result streams analyses
+    and follow-up answers (analyze_stream, follow_up_stream) wherever the model runs.
+    """
+    if MODEL_SERVER:
+        stages = [("connect to model server", connect_model_server)]
+    elif INFERENCE_WORKERS:
+        stages = [("import worker pool", lambda _: importlib.import_module("worker_pool")),
+                  (f"start {INFERENCE_WORKERS} workers", start_worker_pool)]
+    else:
+        stages = [("import torch/transformers", lambda _: importlib.import_module("moondream_analyzer")),
+                  ("load model", load_local_model),
+                  ("warm-up encode", warm_up_local_model)]
+    return StagedStartup("vision model", stages).start()
 
-if not model or not tokenizer:
-    st.error("Failed to load the Moondream model. Please check the logs.")
+@st.cache_resource
+def browser_startup():
+    """Imports selenium and launches the camera browser sessions in the background."""
+    return StagedStartup("camera browsers", [
+        ("import selenium", lambda _: importlib.import_module("camera_controller")),
+        ("start driver pool", lambda camera_controller: camera_controller.get_driver_pool()),
+    ]).start()
+
+vision_model = model_startup()
+camera_browsers = browser_startup()
+
+if vision_model.error is not None:
+    st.error(str(vision_model.error))
     st.stop()
+if not vision_model.done:
+    st.info("The vision model is still loading in the background. You can already ask your question.")
+
+with st.expander("Startup timings"):
+    rows = startup_report([vision_model, camera_browsers], {"app imports": app_import_seconds()})
+    st.code(format_startup_report(rows))
+
+# The vision model keeps each user's last analyzed frame under this id, for follow-up questions.
+if 'analysis_session_id' not in st.session_state:
+    st.session_state.analysis_session_id = uuid.uuid4().hex
+
+async def speak_stream(chunks, label: str) -> bool:
+    """Shows streamed text as it arrives and speaks each sentence as soon as it is complete."""
+    placeholder = st.empty()
+    spoken = []
+    play_until = 0.0
+    played_audio = False
+    async for sentence, speech_audio_bytes in speak_sentences(aiter_in_thread(chunks), client):
+        spoken.append(sentence)
+        placeholder.success(f"**{label}:** {' '.join(spoken)}")
+        if speech_audio_bytes:
+            # Start each clip only after the previous one has finished playing.
+            await asyncio.sleep(max(0.0, play_until - time.monotonic()))
+            st.audio(speech_audio_bytes, format="audio/wav", autoplay=True)
+            play_until = time.monotonic() + (audio_duration(speech_audio_bytes) or 0.0)
+            played_audio = True
+    return played_audio
 
 # --- Main Application Flow ---
 
@@ -46,6 +134,8 @@ st.markdown("### Press the button and ask your question")
 audio_bytes = mic_recorder(
     start_prompt="▶️ Ask if it's safe to cross (e.g., 'I'm at 1st Avenue and 110th Street, can I cross?')",
     stop_prompt="⏹️ Processing...",
+    # Each recording is handled once, so the follow-up recorder below does not replay it.
+    just_once=True,
     key='recorder'
 )
 
@@ -84,9 +174,11 @@ if audio_bytes:
 
         # Step 3: Get the camera feed screenshot
         with st.spinner(f'Accessing traffic camera for {location_query}...'):
-            image_path = get_camera_feed_screenshot(location_query)
+            # Returns at once if the background startup has already imported it.
+            from camera_controller import capture_camera_frame_async
+            cached_frame = await capture_camera_frame_async(location_query)
 
-        if image_path is None:
+        if cached_frame is None:
             error_message = f"Sorry, I couldn't access the camera feed for '{location_query}'. Please try another location."
             st.error(error_message)
             with st.spinner('Preparing audio response...'):
@@ -95,21 +187,59 @@ if audio_bytes:
                     st.audio(speech_audio_bytes, format="audio/wav")
             return
 
-        # Step 4: Display the screenshot
-        st.image(image_path, caption=f"Live Camera View for {location_query}")
+        # Step 4: Display the frame, sending the encoded bytes as captured
+        frame = cached_frame.frame
+        st.image(frame.data, caption=f"Live Camera View for {location_query} ({cached_frame.age:.0f}s ago)")
 
-        # Step 5: Analyze the image with Moondream
+        # Step 5: Analyze the same in-memory frame with Moondream, speaking each sentence as soon as it is generated
+        with st.spinner('Waiting for the vision model to finish loading...'):
+            try:
+                analyzer = await asyncio.to_thread(vision_model.wait)
+            except Exception as e:
+                st.error(f"The vision model is not available: {e}")
+                return
         with st.spinner('Analyzing the view...'):
-            analysis_text = get_moondream_analysis(model, tokenizer, image_path)
+            played_audio = await speak_stream(
+                analyzer.analyze_stream(frame, st.session_state.analysis_session_id), "Assistant's Assessment")
 
-        # Step 6: Generate and play the audio response
-        st.success(f"**Assistant's Assessment:** {analysis_text}")
-        with st.spinner('Preparing audio response...'):
-            speech_audio_bytes = await generate_assistant_speech_realtime(analysis_text, client)
-            if speech_audio_bytes:
-                st.audio(speech_audio_bytes, format="audio/wav")
-            else:
-                st.error("Could not generate audio response.")
+        if not played_audio:
+            st.error("Could not generate audio response.")
 
     # Run the async pipeline
     asyncio.run(main_pipeline())
+
+# --- Follow-up questions about the same view ---
+
+st.markdown("### Ask a follow-up question about the last view")
+
+follow_up_audio = mic_recorder(
+    start_prompt="▶️ Ask a follow-up (e.g., 'Are there any bikes?' or 'How many seconds are left?')",
+    stop_prompt="⏹️ Processing...",
+    just_once=True,
+    key='follow_up_recorder'
+)
+
+if follow_up_audio:
+    async def follow_up_pipeline():
+        with st.spinner('Understanding your question...'):
+            question = await transcribe_user_request_realtime(follow_up_audio['bytes'], client)
+            if not question:
+                st.error("Could not understand your question. Please try again.")
+                return
+            st.write(f"**You asked:** *{question}*")
+
+        # Answered from the frame the vision model already encoded; nothing is captured again.
+        with st.spinner('Waiting for the vision model to finish loading...'):
+            try:
+                analyzer = await asyncio.to_thread(vision_model.wait)
+            except Exception as e:
+                st.error(f"The vision model is not available: {e}")
+                return
+        with st.spinner('Looking at the view again...'):
+            played_audio = await speak_stream(
+                analyzer.follow_up_stream(st.session_state.analysis_session_id, question), "Assistant")
+
+        if not played_audio:
+            st.error("Could not generate audio response.")
+
+    asyncio.run(follow_up_pipeline())
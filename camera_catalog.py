@@ -0,0 +1,181 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+import requests
+from requests.adapters import HTTPAdapter
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+NYCTMC_BASE_URL = os.environ.get("NYCTMC_BASE_URL", "https://webcams.nyctmc.org")
+CATALOG_PATH = "/api/cameras"
+IMAGE_PATH = "/api/cameras/{camera_id}/image"
+# After a failed catalog download, further loads fail fast for this long instead of
+# each waiting out the HTTP timeout again.
+CATALOG_RETRY_SECONDS = float(os.environ.get("CV4VI_CATALOG_RETRY", "30"))
+
+
+class CatalogUnavailableError(RuntimeError):
+    """Raised while a failed camera catalog download is being backed off."""
+
+
+@dataclass(frozen=True)
+class CameraRecord:
+    """A single NYCTMC camera as listed in the camera catalog."""
+    camera_id: str
+    name: str
+    streets: tuple
+    image_url: str
+    area: str = ""
+    latitude: float | None = None
+    longitude: float | None = None
+    is_online: bool = True
+
+
+def split_camera_name(name: str) -> tuple:
+    """Splits a camera name like "1 Ave @ 110 St" into its street names."""
+    return tuple(part.strip() for part in re.split(r"\s+(?:@|&|and)\s+", name, flags=re.IGNORECASE) if part.strip())
+
+
+def _record_from_api(item: dict, base_url: str) -> CameraRecord:
+    camera_id = str(item["id"])
+    name = item.get("name", "").strip()
+    image_url = item.get("imageUrl") or f"{base_url}{IMAGE_PATH.format(camera_id=camera_id)}"
+    is_online = item.get("isOnline", True)
+    if isinstance(is_online, str):
+        is_online = is_online.lower() == "true"
+    return CameraRecord(
+        camera_id=camera_id,
+        name=name,
+        streets=split_camera_name(name),
+        image_url=image_url,
+        area=item.get("area", "") or "",
+        latitude=item.get("latitude"),
+        longitude=item.get("longitude"),
+        is_online=bool(is_online),
+    )
+
+
+class CameraCatalog:
+    """An in-memory list of NYCTMC cameras with lookup by camera id."""
+
+    def __init__(self, cameras: list, fetched_at: float | None = None):
+        self.cameras = list(cameras)
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self._by_id = {camera.camera_id: camera for camera in self.cameras}
+
+    def __len__(self) -> int:
+        return len(self.cameras)
+
+    def __iter__(self):
+        return iter(self.cameras)
+
+    def get(self, camera_id: str) -> CameraRecord | None:
+        return self._by_id.get(camera_id)
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"fetched_at": self.fetched_at, "cameras": [asdict(c) for c in self.cameras]}, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> "CameraCatalog":
+        with open(path) as f:
+            data = json.load(f)
+        cameras = [CameraRecord(**{**c, "streets": tuple(c["streets"])}) for c in data["cameras"]]
+        return cls(cameras, fetched_at=data.get("fetched_at"))
+
+
+class CameraFrameFetcher:
+    """
+    Fetches NYCTMC camera frames directly over HTTP, without a browser.
+
+    The camera catalog is downloaded once and kept in memory (and optionally
+    on disk), and all requests share one keep-alive connection pool. A failed
+    download is not retried for catalog_retry_seconds.
+    """
+
+    def __init__(self, base_url: str = NYCTMC_BASE_URL, catalog_path: str | None = None,
+                 pool_size: int = 8, timeout: float = 10.0, session: requests.Session | None = None,
+                 catalog_retry_seconds: float = CATALOG_RETRY_SECONDS):
+        self.base_url = base_url.rstrip("/")
+        self.catalog_path = catalog_path
+        self.timeout = timeout
+        self.catalog_retry_seconds = catalog_retry_seconds
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._catalog = None
+        self._catalog_lock = threading.Lock()
+        self._catalog_error = None
+        self._catalog_retry_at = 0.0
+
+    def load_catalog(self, refresh: bool = False) -> CameraCatalog:
+        """
+        Returns the camera catalog, reading the local copy or downloading it on first use.
+
+        Raises:
+            CatalogUnavailableError: If a download failed less than
+                catalog_retry_seconds ago (refresh=True retries regardless).
+        """
+        with self._catalog_lock:
+            if self._catalog is not None and not refresh:
+                return self._catalog
+            if not refresh and self.catalog_path and os.path.exists(self.catalog_path):
+                logging.info(f"Loading camera catalog from {self.catalog_path}")
+                self._catalog = CameraCatalog.load(self.catalog_path)
+                return self._catalog
+            if not refresh and time.monotonic() < self._catalog_retry_at:
+                raise CatalogUnavailableError(f"Camera catalog download failed recently: {self._catalog_error}")
+            url = f"{self.base_url}{CATALOG_PATH}"
+            logging.info(f"Downloading camera catalog from {url}")
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()
+                cameras = [_record_from_api(item, self.base_url) for item in response.json()]
+            except Exception as e:
+                self._catalog_error = e
+                self._catalog_retry_at = time.monotonic() + self.catalog_retry_seconds
+                logging.error(f"Camera catalog download failed; not retrying for {self.catalog_retry_seconds:.0f}s: {e}")
+                raise
+            self._catalog = CameraCatalog(cameras)
+            logging.info(f"Camera catalog loaded with {len(self._catalog)} cameras.")
+            if self.catalog_path:
+                self._catalog.save(self.catalog_path)
+            return self._catalog
+
+    def fetch_frame(self, camera_id: str) -> bytes | None:
+        """
+        Downloads the current JPEG for a camera.
+
+        Args:
+            camera_id: The NYCTMC camera id.
+
+        Returns:
+            The original image bytes, or None if the camera is unknown or the request failed.
+        """
+        camera = self.load_catalog().get(camera_id)
+        if camera is None:
+            logging.error(f"Unknown camera id: {camera_id}")
+            return None
+        # The cache-busting parameter mirrors what the NYCTMC site does for live images.
+        return self.fetch_url(camera.image_url, params={"t": int(time.time() * 1000)})
+
+    def fetch_url(self, url: str, params: dict | None = None) -> bytes | None:
+        """Downloads an image URL over the shared connection pool, returning None on failure."""
+        try:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            if not response.content:
+                logging.error(f"Empty image returned from {url}")
+                return None
+            return response.content
+        except requests.RequestException as e:
+            logging.error(f"Failed to fetch image from {url}: {e}")
+            return None
+
+    def close(self):
+        self.session.close()
@@ -1,161 +1,773 @@
-import tempfile
-import shutil
+import asyncio
+import atexit
+import functools
+import json
+import threading
 import time
 import logging
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+from contextlib import contextmanager
+from dataclasses import dataclass
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
+from concurrent.futures import ThreadPoolExecutor
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+from driver_pool import ChromeDriverPool
+from network_filter import NetworkFilter, NetworkUsageTracker
+from camera_catalog import CameraFrameFetcher, CameraRecord, NYCTMC_BASE_URL
+from camera_index import IntersectionIndex
+from frame_cache import CachedFrame, FrameCache
+from frame import Frame
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def get_camera_feed_screenshot(location_query: str) -> str | None:
+# "http" fetches frames straight from the camera catalog and falls back to the
+# browser; "selenium" always drives the NYCTMC site.
+CAPTURE_MODE = os.environ.get("CV4VI_CAPTURE_MODE", "http")
+# Browser request filtering: "off", "measure" (report usage only), "block"
+# (drop fonts, analytics, map tiles and media) or "block-images" (also skip
+# every image and download only the feed image).
+NETWORK_FILTER_MODE = os.environ.get("CV4VI_NETWORK_FILTER", "off")
+CAPTURE_TIMEOUT_SECONDS = float(os.environ.get("CV4VI_CAPTURE_TIMEOUT", "45"))
+# Total time the browser flow may spend waiting on the page, across all steps.
+CAPTURE_BUDGET_SECONDS = float(os.environ.get("CV4VI_CAPTURE_BUDGET", "30"))
+# Time kept back from the image wait so a full-page fallback screenshot still fits.
+FALLBACK_RESERVE_SECONDS = 2.0
+POLL_INTERVAL_SECONDS = 0.1
+# Extra budget granted per additional camera in a batch capture, and the most
+# finding any one camera's row may take, so a missing camera cannot use up the batch.
+BATCH_CAMERA_BUDGET_SECONDS = 5.0
+# Kept back while a batch selects its cameras, for the preview dialog and the images.
+BATCH_DIALOG_RESERVE_SECONDS = 10.0
+
+FEED_XPATHS = [
+    '//*[@id="mat-dialog-1"]/app-dialog-camera-preview/div/div[2]/app-camera-view/div/div/img[2]',
+    '//*[@id="mat-dialog-1"]//img[contains(@src, "nyctmc.org")]',
+    '//app-dialog-camera-preview//img[last()]',
+    '//app-camera-view//img[last()]',
+    '//mat-dialog-container//img[contains(@src, "camera") or contains(@src, "webcam")]'
+]
+
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
+_frame_fetcher = None
+_frame_fetcher_lock = threading.Lock()
+_intersection_index = None
+_intersection_index_catalog = None
+_capture_executor = None
+_preferred_feed_xpath = None
+_network_tracker = NetworkUsageTracker()
+_frame_cache = FrameCache(
+    ttl_seconds=float(os.environ.get("CV4VI_FRAME_TTL", "2.0")),
+    max_bytes=int(os.environ.get("CV4VI_FRAME_CACHE_BYTES", str(64 * 1024 * 1024))),
+    size_of=lambda frame: frame.nbytes,
+)
+
+
+@dataclass
+class CaptureResult:
+    """The outcome of capturing one location in a batch: a frame or an error."""
+    location: str
+    cached: CachedFrame | None = None
+    error: str | None = None
+
+    @property
+    def frame(self) -> Frame | None:
+        return self.cached.frame if self.cached else None
+
+
+class CaptureCancelled(Exception):
+    """Raised inside a capture whose caller has gone away."""
+
+
+class CancelToken:
+    """
+    Lets an async caller abandon a capture that is running on a worker thread.
+
+    Callbacks registered by the capture (e.g. discarding its browser session)
+    run as soon as cancel() is called, so resources are freed right away even
+    though the worker thread itself cannot be interrupted. A coroutine passes
+    its event loop to cancel() so that callbacks which block (quitting Chrome)
+    run on the loop's executor rather than on the loop itself.
+    """
+
+    def __init__(self):
+        self._cancelled = False
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def on_cancel(self, callback):
+        with self._lock:
+            if not self._cancelled:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def cancel(self, loop: asyncio.AbstractEventLoop | None = None):
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        if loop is not None:
+            loop.run_in_executor(None, self._run_callbacks, callbacks)
+        else:
+            self._run_callbacks(callbacks)
+
+    @staticmethod
+    def _run_callbacks(callbacks: list):
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.warning(f"Cancel callback failed: {e}")
+
+    def raise_if_cancelled(self):
+        if self._cancelled:
+            raise CaptureCancelled()
+
+
+class _Navigation:
+    """
+    Tracks whether a capture is driving its leased browser session.
+
+    A cancel while the capture is navigating quits the session, so the Selenium
+    call it is blocked on fails right away. Otherwise (the lease has just been
+    granted, or the capture is finishing up) the session is healthy, and the
+    capture stops at its next check and returns it to the pool as usual.
     """
-    Navigates to the NYCTMC website, finds a camera by location query,
-    and captures a screenshot of its expanded feed.
+
+    def __init__(self, pooled):
+        self.pooled = pooled
+        self.active = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.active = True
+
+    def finish(self):
+        # Waits for an abandon() in progress, so the session is not released while it is being quit.
+        with self._lock:
+            self.active = False
+
+    def abandon(self):
+        with self._lock:
+            if self.active:
+                self.active = False
+                get_driver_pool().discard(self.pooled)
+
+
+def _network_filter_from_mode(mode: str) -> NetworkFilter | None:
+    if mode == "off":
+        return None
+    if mode == "measure":
+        return NetworkFilter(blocked_url_patterns=())
+    if mode == "block":
+        return NetworkFilter()
+    if mode == "block-images":
+        return NetworkFilter(block_images=True)
+    raise ValueError(f"Unknown network filter mode: {mode}")
+
+
+def get_driver_pool() -> ChromeDriverPool:
+    """Returns the process-wide Chrome driver pool, launching it on first use."""
+    global _driver_pool
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            size = int(os.environ.get("CV4VI_DRIVER_POOL_SIZE", "2"))
+            network_filter = _network_filter_from_mode(NETWORK_FILTER_MODE)
+            _driver_pool = ChromeDriverPool(size=size, url=f"{NYCTMC_BASE_URL}/cameras-list",
+                                            network_filter=network_filter).start()
+            atexit.register(_driver_pool.close)
+        return _driver_pool
+
+
+def get_frame_fetcher() -> CameraFrameFetcher:
+    """Returns the process-wide HTTP frame fetcher."""
+    global _frame_fetcher
+    with _frame_fetcher_lock:
+        if _frame_fetcher is None:
+            _frame_fetcher = CameraFrameFetcher(catalog_path=os.environ.get("CV4VI_CAMERA_CATALOG"))
+            atexit.register(_frame_fetcher.close)
+        return _frame_fetcher
+
+
+def get_capture_executor() -> ThreadPoolExecutor:
+    """Returns the dedicated thread pool that runs blocking capture work."""
+    global _capture_executor
+    with _driver_pool_lock:
+        if _capture_executor is None:
+            workers = max(4, 2 * int(os.environ.get("CV4VI_DRIVER_POOL_SIZE", "2")))
+            _capture_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="camera-capture")
+            atexit.register(_capture_executor.shutdown, wait=False, cancel_futures=True)
+        return _capture_executor
+
+
+def get_frame_cache() -> FrameCache:
+    """Returns the process-wide per-camera frame cache."""
+    return _frame_cache
+
+
+def get_intersection_index() -> IntersectionIndex:
+    """Returns the intersection index for the current camera catalog, rebuilding it if the catalog changed."""
+    global _intersection_index, _intersection_index_catalog
+    catalog = get_frame_fetcher().load_catalog()
+    with _frame_fetcher_lock:
+        if _intersection_index is None or _intersection_index_catalog is not catalog:
+            _intersection_index = IntersectionIndex.from_catalog(catalog)
+            _intersection_index_catalog = catalog
+        return _intersection_index
+
+
+def resolve_camera(location_query: str) -> CameraRecord | None:
+    """
+    Resolves a location query to a camera using the in-memory intersection index.
+
+    Returns:
+        The matching CameraRecord, or None if nothing matched or the catalog is unavailable.
+    """
+    try:
+        match = get_intersection_index().lookup(location_query)
+    except Exception as e:
+        logging.warning(f"Camera catalog unavailable, cannot resolve {location_query}: {e}")
+        return None
+    if match is None:
+        logging.warning(f"No camera in the catalog matches: {location_query}")
+        return None
+    logging.info(f"Resolved '{location_query}' to camera {match.camera.camera_id} ({match.camera.name}) via {match.tier} match")
+    return match.camera
+
+
+def _fetch_frame(location_query: str, camera: CameraRecord) -> Frame | None:
+    logging.info(f"Fetching frame for camera {camera.camera_id} ({camera.name})")
+    data = get_frame_fetcher().fetch_frame(camera.camera_id)
+    if data is None:
+        return None
+    return Frame(data, camera_id=camera.camera_id, location=location_query, source="http")
+
+
+def fetch_camera_frame(location_query: str) -> Frame | None:
+    """
+    Fetches the current JPEG for a location directly over HTTP.
 
     Args:
         location_query: The location to search for (e.g., "1 Ave @ 110 St").
 
     Returns:
-        The path to the screenshot file, or None if an error occurred.
+        A Frame holding the original JPEG bytes, or None if no camera matched or the download failed.
     """
-    driver = None
-    user_data_dir = None
-    screenshot_path = "live_feed.png"
     try:
-        logging.info(f"Starting camera feed capture for query: {location_query}")
-        user_data_dir = tempfile.mkdtemp()
-        options = Options()
-        options.add_argument(f"--user-data-dir={user_data_dir}")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--remote-debugging-port=9222")
-        options.add_argument("--headless")
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        url = "https://webcams.nyctmc.org/cameras-list"
-        logging.info(f"Navigating to {url}")
-        driver.get(url)
-
-        wait = WebDriverWait(driver, 30)
+        camera = resolve_camera(location_query)
+        if camera is None:
+            return None
+        return _fetch_frame(location_query, camera)
+    except Exception as e:
+        logging.error(f"HTTP frame fetch failed for {location_query}: {e}")
+        return None
+
+
+def _capture_uncached(location_query: str, camera: CameraRecord | None,
+                      cancel_token: CancelToken | None = None) -> Frame | None:
+    if CAPTURE_MODE == "http" and camera is not None:
+        frame = _fetch_frame(location_query, camera)
+        if frame is not None:
+            return frame
+        logging.info("Falling back to browser capture.")
+    if cancel_token and cancel_token.cancelled:
+        return None
+    return get_camera_feed_screenshot(location_query, cancel_token=cancel_token)
+
+
+def capture_camera_frame(location_query: str, cancel_token: CancelToken | None = None) -> CachedFrame | None:
+    """
+    Captures the current camera image for a location through the frame cache,
+    using the HTTP fetcher when enabled and the browser screenshot as the fallback.
+
+    Args:
+        location_query: The location to search for (e.g., "1 Ave @ 110 St").
+        cancel_token: Optional token that abandons the capture when cancelled.
+
+    Returns:
+        A CachedFrame holding the Frame and its capture timestamp, or None if
+        every capture path failed.
+    """
+    camera = resolve_camera(location_query)
+    # Unresolved queries are still cached, keyed by the query itself.
+    cache_key = camera.camera_id if camera else location_query.strip().lower()
+    cached = get_frame_cache().get(cache_key, lambda: _capture_uncached(location_query, camera, cancel_token),
+                                   cancel_token=cancel_token)
+    if cached is not None:
+        logging.info(f"Frame for {cache_key} is {cached.age:.1f}s old (cache {'hit' if cached.hit else 'miss'})")
+    return cached
+
+class CaptureTimer:
+    """Tracks a capture's total latency budget and how long each step took."""
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.started = time.monotonic()
+        self.deadline = self.started + budget_seconds
+        self.steps = {}
+        self.current = None
+
+    def remaining(self, reserve: float = 0.0) -> float:
+        return max(0.0, self.deadline - time.monotonic() - reserve)
+
+    def wait(self, driver, reserve: float = 0.0, limit: float | None = None) -> WebDriverWait:
+        """
+        Returns a WebDriverWait limited to whatever is left of the budget after
+        reserve, and to at most limit seconds if given.
+        """
+        remaining = self.remaining(reserve)
+        if remaining <= 0:
+            raise TimeoutException(f"Capture budget of {self.budget_seconds}s exhausted")
+        if limit is not None:
+            remaining = min(remaining, limit)
+        return WebDriverWait(driver, remaining, poll_frequency=POLL_INTERVAL_SECONDS,
+                             ignored_exceptions=(StaleElementReferenceException,))
+
+    @contextmanager
+    def step(self, name: str):
+        self.current = name
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.steps[name] = round(time.monotonic() - start, 3)
+
+    def report(self) -> dict:
+        return {"steps": dict(self.steps), "total": round(time.monotonic() - self.started, 3)}
+
+
+def _capture_metadata(timer: CaptureTimer, driver, network_filter: NetworkFilter | None) -> dict:
+    """Step timings and, when a network filter is installed, the capture's network usage."""
+    metadata = {"timings": timer.report()}
+    stats = _network_tracker.collect(driver, network_filter)
+    if stats is not None:
+        metadata["network"] = stats.as_dict()
+        logging.info(f"Capture network usage: {json.dumps(metadata['network'])}")
+    return metadata
+
+
+def _image_ready(driver, element, images_blocked: bool = False) -> bool:
+    """An image is ready once decoded, or once it has a src when the browser is not loading images."""
+    if images_blocked:
+        return bool(element.get_attribute("src"))
+    return driver.execute_script("return arguments[0].complete && arguments[0].naturalWidth > 0;", element)
+
 
+def _image_bytes(element, images_blocked: bool = False) -> bytes | None:
+    """Screenshots a rendered image, or downloads its src when the browser skipped loading it."""
+    if images_blocked:
+        return get_frame_fetcher().fetch_url(element.get_attribute("src"))
+    return element.screenshot_as_png
+
+
+def _loaded_feed_image(driver, images_blocked: bool = False):
+    """Wait condition: the first feed selector whose image has finished decoding."""
+    xpaths = FEED_XPATHS
+    if _preferred_feed_xpath:
+        xpaths = [_preferred_feed_xpath] + [x for x in FEED_XPATHS if x != _preferred_feed_xpath]
+    for xpath in xpaths:
+        for element in driver.find_elements(By.XPATH, xpath):
+            if _image_ready(driver, element, images_blocked):
+                return xpath, element
+    return False
+
+
+def xpath_literal(text: str) -> str:
+    """
+    Quotes text as an XPath 1.0 string literal. XPath has no escape sequences,
+    so text containing both quote characters is built with concat().
+    """
+    if "'" not in text:
+        return f"'{text}'"
+    if '"' not in text:
+        return f'"{text}"'
+    parts = text.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in parts) + ")"
+
+
+def _search_and_select(driver, timer: CaptureTimer, location_query: str, camera: CameraRecord | None,
+                       step_suffix: str = "", reserve: float = 0.0, deadline: float | None = None):
+    """
+    Filters the cameras list for a location and ticks the matching camera's checkbox.
+
+    Every wait keeps reserve seconds of the capture budget back and, with a
+    deadline (a time.monotonic() value), ends by then at the latest.
+    """
+    def wait():
+        limit = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if limit == 0.0:
+            raise TimeoutException(f"Time for {location_query} exhausted")
+        return timer.wait(driver, reserve=reserve, limit=limit)
+
+    search_query = camera.name if camera else location_query
+    with timer.step(f"search{step_suffix}"):
         logging.info("Locating search box.")
         # Use a more robust selector for the search box
         search_box_xpath = "//*[@id='mat-input-0']"
-        search_box = wait.until(
+        search_box = wait().until(
             EC.presence_of_element_located((By.XPATH, search_box_xpath))
         )
         search_box.clear()
-        search_box.send_keys(location_query)
-        logging.info(f"Entered search query: {location_query}")
+        search_box.send_keys(search_query)
+        logging.info(f"Entered search query: {search_query}")
 
         logging.info("Clicking search button.")
         # Use a more robust selector for the search button
         search_button_xpath = "/html/body/app-root/body/div/div[2]/app-cameras-list/div/div[1]/app-search/form/button[1]"
-        search_button = wait.until(
+        search_button = wait().until(
             EC.element_to_be_clickable((By.XPATH, search_button_xpath))
         )
         search_button.click()
 
-        time.sleep(2)  # Allow time for the list to filter
-
-        logging.info(f"Locating camera checkbox for: {location_query}")
+    with timer.step(f"select_camera{step_suffix}"):
+        logging.info(f"Locating camera checkbox for: {search_query}")
         # Split the query to search for both streets for a more flexible match
         parts = location_query.split(' @ ')
         street1 = parts[0]
         street2 = parts[1] if len(parts) > 1 else ''
-        
-        if street2:
-            camera_xpath = f"//td[contains(normalize-space(), '{street1}') and contains(normalize-space(), '{street2}')]/ancestor::tr//mat-checkbox"
+
+        if camera:
+            # The index already picked the camera, so match its row name exactly.
+            camera_xpath = f"//td[normalize-space()={xpath_literal(camera.name)}]/ancestor::tr//mat-checkbox"
+        elif street2:
+            camera_xpath = f"//td[contains(normalize-space(), {xpath_literal(street1)}) and contains(normalize-space(), {xpath_literal(street2)})]/ancestor::tr//mat-checkbox"
         else:
-            camera_xpath = f"//td[contains(normalize-space(), '{street1}')]/ancestor::tr//mat-checkbox"
+            camera_xpath = f"//td[contains(normalize-space(), {xpath_literal(street1)})]/ancestor::tr//mat-checkbox"
 
-        camera_checkbox = wait.until(
+        # Returns as soon as the filtered list shows the camera's row.
+        camera_checkbox = wait().until(
             EC.element_to_be_clickable((By.XPATH, camera_xpath))
         )
         camera_checkbox.click()
         logging.info("Clicked camera checkbox.")
 
+
+def _open_selected_dialog(driver, timer: CaptureTimer):
+    """Presses "View Selected" and waits for the camera preview dialog."""
+    with timer.step("open_dialog"):
         logging.info("Clicking 'View Selected' button.")
         view_button_xpath = "//button[contains(., 'View Selected')]"
-        view_button = wait.until(
+        view_button = timer.wait(driver).until(
             EC.element_to_be_clickable((By.XPATH, view_button_xpath))
         )
         driver.execute_script("arguments[0].click();", view_button)
 
         logging.info("Waiting for camera feed pop-up.")
         popup_xpath = "//app-dialog-camera-preview"
-        popup = wait.until(
+        timer.wait(driver).until(
             EC.presence_of_element_located((By.XPATH, popup_xpath))
         )
 
-        logging.info("Clicking expand button.")
-        expand_button_xpath = "//button[@mattooltip='Toggle full screen']"
-        expand_button = wait.until(
-            EC.element_to_be_clickable((By.XPATH, expand_button_xpath))
-        )
-        expand_button.click()
 
-        time.sleep(2)  # Wait for expanded view to load
+def capture_camera_frames(location_queries: list) -> list:
+    """
+    Captures several locations at once, e.g. to prefetch or to cover every camera
+    at a large intersection.
+
+    Fresh frames come from the cache. In HTTP mode the rest are fetched
+    individually over the shared connection pool; anything left is captured
+    together in a single browser session.
+
+    Args:
+        location_queries: Locations to capture (e.g., ["1 Ave @ 110 St", "2 Ave @ 110 St"]).
+
+    Returns:
+        A CaptureResult per query, in the same order.
+    """
+    cache = get_frame_cache()
+    results = {}
+    pending = {}
+    for query in dict.fromkeys(location_queries):
+        camera = resolve_camera(query)
+        cache_key = camera.camera_id if camera else query.strip().lower()
+        cached = cache.peek(cache_key)
+        if cached is None and CAPTURE_MODE == "http" and camera is not None:
+            cached = cache.get(cache_key, lambda: _fetch_frame(query, camera))
+        if cached is not None:
+            results[query] = CaptureResult(query, cached=cached)
+        else:
+            pending[query] = cache_key
+
+    if pending:
+        for result in get_camera_feed_screenshots(list(pending)):
+            if result.frame is not None:
+                cache.put(pending[result.location], result.frame, result.frame.captured_at)
+            results[result.location] = result
+
+    return [results[query] for query in location_queries]
+
+
+async def capture_camera_frame_async(location_query: str,
+                                     timeout: float | None = CAPTURE_TIMEOUT_SECONDS) -> CachedFrame | None:
+    """
+    Captures a camera frame without blocking the event loop.
+
+    The capture runs on the dedicated capture thread pool. If it exceeds the
+    timeout, or the awaiting task is cancelled, the capture is abandoned; a
+    browser session it is navigating with is discarded in the background.
+
+    Args:
+        location_query: The location to search for (e.g., "1 Ave @ 110 St").
+        timeout: Seconds to wait for the capture, or None to wait indefinitely.
+
+    Returns:
+        A CachedFrame, or None if the capture failed or timed out.
+    """
+    loop = asyncio.get_running_loop()
+    cancel_token = CancelToken()
+    future = loop.run_in_executor(
+        get_capture_executor(),
+        functools.partial(capture_camera_frame, location_query, cancel_token=cancel_token),
+    )
+    try:
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        logging.error(f"Camera capture for {location_query} timed out after {timeout}s")
+        cancel_token.cancel(loop)
+        return None
+    except asyncio.CancelledError:
+        logging.info(f"Camera capture for {location_query} was cancelled")
+        cancel_token.cancel(loop)
+        raise
+
+
+def get_camera_feed_screenshot(location_query: str, cancel_token: CancelToken | None = None) -> Frame | None:
+    """
+    Uses a warm pooled browser session parked on the NYCTMC website, finds a
+    camera by location query, and captures a screenshot of its expanded feed.
+
+    Every wait returns as soon as its DOM condition holds, and all of them share
+    one latency budget (CV4VI_CAPTURE_BUDGET). Step durations are logged and
+    stored in the returned frame's metadata under "timings".
+
+    Args:
+        location_query: The location to search for (e.g., "1 Ave @ 110 St").
+        cancel_token: Optional token; cancelling it discards the browser session if it is
+            mid-navigation, and otherwise returns it to the pool.
+
+    Returns:
+        A Frame holding the PNG screenshot, or None if an error occurred.
+    """
+    global _preferred_feed_xpath
+    pooled = None
+    healthy = True
+    timer = CaptureTimer(CAPTURE_BUDGET_SECONDS)
+    try:
+        logging.info(f"Starting camera feed capture for query: {location_query}")
+        camera = resolve_camera(location_query)
+        with timer.step("acquire_driver"):
+            pooled = get_driver_pool().acquire(timeout=timer.remaining())
+        navigation = _Navigation(pooled)
+        if cancel_token:
+            cancel_token.on_cancel(navigation.abandon)
+            cancel_token.raise_if_cancelled()
+        navigation.start()
+        driver = pooled.driver
+        network_filter = get_driver_pool().network_filter
+        images_blocked = bool(network_filter and network_filter.block_images)
+        NetworkUsageTracker.drain(driver, network_filter)
+
+        _search_and_select(driver, timer, location_query, camera)
+
+        _open_selected_dialog(driver, timer)
+
+        with timer.step("expand"):
+            logging.info("Clicking expand button.")
+            expand_button_xpath = "//button[@mattooltip='Toggle full screen']"
+            expand_button = timer.wait(driver).until(
+                EC.element_to_be_clickable((By.XPATH, expand_button_xpath))
+            )
+            expand_button.click()
 
-        logging.info("Locating feed image element.")
-        # Try multiple XPath strategies to find the camera image
         feed_element = None
-        feed_xpaths = [
-            '//*[@id="mat-dialog-1"]/app-dialog-camera-preview/div/div[2]/app-camera-view/div/div/img[2]',
-            '//*[@id="mat-dialog-1"]//img[contains(@src, "nyctmc.org")]',
-            '//app-dialog-camera-preview//img[last()]',
-            '//app-camera-view//img[last()]',
-            '//mat-dialog-container//img[contains(@src, "camera") or contains(@src, "webcam")]'
-        ]
-        
-        for i, xpath in enumerate(feed_xpaths):
+        with timer.step("load_image"):
+            logging.info("Waiting for the feed image to load.")
             try:
-                logging.info(f"Trying XPath {i+1}/{len(feed_xpaths)}: {xpath}")
-                feed_element = wait.until(
-                    EC.presence_of_element_located((By.XPATH, xpath))
+                # All selectors are polled together, last working one first, and
+                # the wait ends as soon as one of them shows a decoded image.
+                xpath, feed_element = timer.wait(driver, reserve=FALLBACK_RESERVE_SECONDS).until(
+                    functools.partial(_loaded_feed_image, images_blocked=images_blocked)
                 )
-                logging.info(f"Found feed element with XPath {i+1}")
-                break
+                if xpath != _preferred_feed_xpath:
+                    logging.info(f"Feed image found with XPath: {xpath}")
+                    _preferred_feed_xpath = xpath
             except TimeoutException:
-                logging.warning(f"XPath {i+1} failed, trying next...")
-                continue
-        
+                logging.warning("No feed image loaded within the capture budget.")
+
         if not feed_element:
             logging.error("Could not locate camera feed image with any XPath")
             # Take a full page screenshot as fallback
             logging.info("Taking full page screenshot as fallback")
-            screenshot = driver.get_screenshot_as_png()
-            with open(screenshot_path, "wb") as f:
-                f.write(screenshot)
-            logging.info(f"Full page screenshot saved to {screenshot_path}")
-            return screenshot_path
-        
+            with timer.step("screenshot"):
+                screenshot = driver.get_screenshot_as_png()
+            logging.info("Full page screenshot captured.")
+            return Frame(screenshot, camera_id=camera.camera_id if camera else None, location=location_query,
+                         source="selenium", metadata={"full_page": True, **_capture_metadata(timer, driver, network_filter)})
+
         logging.info("Taking screenshot of feed element.")
-        feed_element.screenshot(screenshot_path)
-        logging.info(f"Screenshot saved to {screenshot_path}")
-        
-        return screenshot_path
+        with timer.step("screenshot"):
+            screenshot = _image_bytes(feed_element, images_blocked)
+        if screenshot is None:
+            logging.error("Could not download the feed image.")
+            return None
+        logging.info("Feed element screenshot captured.")
+
+        return Frame(screenshot, camera_id=camera.camera_id if camera else None, location=location_query,
+                     source="selenium", metadata=_capture_metadata(timer, driver, network_filter))
 
+    except CaptureCancelled:
+        logging.info(f"Camera feed capture for {location_query} was abandoned.")
+        return None
     except TimeoutException as e:
-        logging.error(f"A timeout occurred: {e}")
+        logging.error(f"A timeout occurred during step '{timer.current}': {e}")
         return None
     except NoSuchElementException as e:
         logging.error(f"An element was not found: {e}")
         return None
     except Exception as e:
-        logging.error(f"An unexpected error occurred: {e}")
+        if cancel_token and cancel_token.cancelled:
+            logging.info(f"Camera feed capture for {location_query} was abandoned.")
+        else:
+            logging.error(f"An unexpected error occurred: {e}")
+        healthy = False
         return None
     finally:
-        if driver:
-            driver.quit()
-            logging.info("WebDriver closed.")
-        if user_data_dir and os.path.exists(user_data_dir):
-            shutil.rmtree(user_data_dir)
-            logging.info(f"Cleaned up temporary directory: {user_data_dir}")
+        logging.info(f"Capture timings for {location_query}: {json.dumps(timer.report())}")
+        if pooled:
+            navigation.finish()
+            get_driver_pool().release(pooled, healthy=healthy)
+            logging.info("WebDriver returned to pool.")
+
+
+def _view_image(driver, view, images_blocked: bool = False):
+    """Returns the loaded feed image inside a camera view, or None if it is still loading."""
+    for image in reversed(view.find_elements(By.XPATH, ".//img")):
+        if _image_ready(driver, image, images_blocked):
+            return image
+    return None
+
+
+def get_camera_feed_screenshots(location_queries: list, cancel_token: CancelToken | None = None) -> list:
+    """
+    Captures several cameras in one pooled browser session by ticking each of
+    them and opening them together with "View Selected".
+
+    Args:
+        location_queries: Locations to capture (e.g., ["1 Ave @ 110 St", "2 Ave @ 110 St"]).
+        cancel_token: Optional token; cancelling it discards the browser session if it is
+            mid-navigation, and otherwise returns it to the pool.
+
+    Returns:
+        A CaptureResult per query, in the same order, each holding a Frame or an error.
+    """
+    queries = list(dict.fromkeys(location_queries))
+    errors = {}
+    frames = {}
+    pooled = None
+    healthy = True
+    # Each camera's search is capped at its own slice, and the dialog's reserve is held back throughout.
+    timer = CaptureTimer(max(CAPTURE_BUDGET_SECONDS + BATCH_CAMERA_BUDGET_SECONDS * max(0, len(queries) - 1),
+                             BATCH_CAMERA_BUDGET_SECONDS * len(queries) + BATCH_DIALOG_RESERVE_SECONDS))
+    try:
+        logging.info(f"Starting batch camera capture for {len(queries)} locations")
+        cameras = {query: resolve_camera(query) for query in queries}
+        with timer.step("acquire_driver"):
+            pooled = get_driver_pool().acquire(timeout=timer.remaining())
+        navigation = _Navigation(pooled)
+        if cancel_token:
+            cancel_token.on_cancel(navigation.abandon)
+            cancel_token.raise_if_cancelled()
+        navigation.start()
+        driver = pooled.driver
+        network_filter = get_driver_pool().network_filter
+        images_blocked = bool(network_filter and network_filter.block_images)
+        NetworkUsageTracker.drain(driver, network_filter)
+
+        selected = []
+        for i, query in enumerate(queries):
+            try:
+                _search_and_select(driver, timer, query, cameras[query], step_suffix=f"[{i}]",
+                                   reserve=BATCH_DIALOG_RESERVE_SECONDS,
+                                   deadline=time.monotonic() + BATCH_CAMERA_BUDGET_SECONDS)
+                selected.append(query)
+            except TimeoutException:
+                logging.warning(f"Camera for {query} not found in the list")
+                errors[query] = "Camera not found in the NYCTMC camera list"
+        if not selected:
+            return [CaptureResult(query, error=errors[query]) for query in queries]
+
+        _open_selected_dialog(driver, timer)
+
+        with timer.step("load_images"):
+            view_xpath = "//app-dialog-camera-preview//app-camera-view"
+            try:
+                timer.wait(driver, reserve=FALLBACK_RESERVE_SECONDS).until(
+                    lambda d: len(views := d.find_elements(By.XPATH, view_xpath)) >= len(selected)
+                    and all(_view_image(d, view, images_blocked) for view in views)
+                )
+            except TimeoutException:
+                logging.warning("Not every camera view finished loading within the capture budget.")
+            views = driver.find_elements(By.XPATH, view_xpath)
+
+        with timer.step("screenshot"):
+            unmatched = list(selected)
+            unnamed_views = []
+            for view in views:
+                text = view.text
+                query = next((q for q in unmatched if cameras[q] and cameras[q].name in text), None)
+                if query is None:
+                    unnamed_views.append(view)
+                    continue
+                unmatched.remove(query)
+                frames[query] = view
+            # Views whose title does not name a camera are matched in selection order.
+            for query, view in zip(list(unmatched), unnamed_views):
+                unmatched.remove(query)
+                frames[query] = view
+            for query in unmatched:
+                errors[query] = "Camera was not shown in the preview dialog"
+            for query, view in list(frames.items()):
+                image = _view_image(driver, view, images_blocked)
+                data = _image_bytes(image, images_blocked) if image is not None else None
+                if data is None:
+                    del frames[query]
+                    errors[query] = "Camera image did not load"
+                    continue
+                camera = cameras[query]
+                frames[query] = Frame(data, camera_id=camera.camera_id if camera else None,
+                                      location=query, source="selenium", metadata={"batch_size": len(selected)})
+
+        metadata = _capture_metadata(timer, driver, network_filter)
+        for frame in frames.values():
+            frame.metadata.update(metadata)
+        return [CaptureResult(query, cached=CachedFrame(frames[query], frames[query].captured_at, hit=False))
+                if query in frames else CaptureResult(query, error=errors.get(query, "Capture failed"))
+                for query in queries]
+
+    except CaptureCancelled:
+        logging.info("Batch camera capture was abandoned.")
+        error = "Capture was cancelled"
+    except TimeoutException as e:
+        logging.error(f"A timeout occurred during step '{timer.current}': {e}")
+        error = f"Timed out during {timer.current}"
+    except Exception as e:
+        if not (cancel_token and cancel_token.cancelled):
+            logging.error(f"An unexpected error occurred: {e}")
+        healthy = False
+        error = "Capture failed"
+    finally:
+        logging.info(f"Batch capture timings: {json.dumps(timer.report())}")
+        if pooled:
+            navigation.finish()
+            get_driver_pool().release(pooled, healthy=healthy)
+            logging.info("WebDriver returned to pool.")
+    return [CaptureResult(query, error=errors.get(query, error)) for query in queries]
@@ -0,0 +1,146 @@
+import difflib
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from camera_catalog import CameraCatalog, CameraRecord, split_camera_name
+from location_parser import normalize_street
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+FUZZY_CUTOFF = 0.8
+
+
+@dataclass(frozen=True)
+class IntersectionMatch:
+    """The camera an intersection query resolved to, and how it was found."""
+    camera: CameraRecord
+    tier: str
+    score: float
+
+
+def canonical_streets(location: str) -> tuple:
+    """Splits a "street @ street" string and normalizes each street with the location parser."""
+    return tuple(normalize_street(street) for street in split_camera_name(location))
+
+
+def _tokens(street: str) -> frozenset:
+    return frozenset(street.lower().split())
+
+
+def _numbers(street: str) -> frozenset:
+    return frozenset(token for token in street.split() if token.isdigit())
+
+
+class IntersectionIndex:
+    """
+    Resolves "street @ street" queries to cameras without touching the NYCTMC site.
+
+    Lookups go through three tiers, stopping at the first that matches:
+      1. exact: both canonical street names match a camera's streets, in any order.
+      2. token_set: every word of each query street appears in a distinct camera street
+         ("110 St" matches "E 110 St", but "1 Ave" never matches "11 Ave").
+      3. fuzzy: each query street is close to a camera street by string similarity and
+         has the same house numbers, which tolerates transcription typos.
+    Ties are broken by fewest extra words and then by camera name, so results are deterministic.
+    """
+
+    def __init__(self, cameras):
+        self._exact = {}
+        self._token_postings = defaultdict(set)
+        self._street_postings = defaultdict(set)
+        self._streets = {}
+        self._cameras = {}
+        for camera in cameras:
+            streets = canonical_streets(camera.name)
+            if len(streets) < 2:
+                continue
+            self._cameras[camera.camera_id] = camera
+            self._streets[camera.camera_id] = streets
+            key = frozenset(streets)
+            existing = self._exact.get(key)
+            if existing is None or camera.name < existing.name:
+                self._exact[key] = camera
+            for street in streets:
+                self._street_postings[street].add(camera.camera_id)
+                for token in _tokens(street):
+                    self._token_postings[token].add(camera.camera_id)
+        self._street_names = sorted(self._street_postings)
+        logging.info(f"Intersection index built over {len(self._cameras)} cameras.")
+
+    @classmethod
+    def from_catalog(cls, catalog: CameraCatalog) -> "IntersectionIndex":
+        return cls(catalog.cameras)
+
+    def __len__(self) -> int:
+        return len(self._cameras)
+
+    def _best(self, candidates, tier: str, score_fn) -> IntersectionMatch | None:
+        scored = []
+        for camera_id in candidates:
+            score = score_fn(self._streets[camera_id])
+            if score is not None:
+                camera = self._cameras[camera_id]
+                scored.append((-score, camera.name, camera_id, score))
+        if not scored:
+            return None
+        _, _, camera_id, score = min(scored)
+        return IntersectionMatch(self._cameras[camera_id], tier, score)
+
+    def _token_set_match(self, query: tuple) -> IntersectionMatch | None:
+        query_tokens = [_tokens(street) for street in query]
+        postings = [self._token_postings.get(token, set()) for tokens in query_tokens for token in tokens]
+        if not postings:
+            return None
+        candidates = set.intersection(*postings)
+
+        def score(streets):
+            camera_tokens = [_tokens(street) for street in streets]
+            best = None
+            for a, b in ((0, 1), (1, 0)):
+                if query_tokens[0] <= camera_tokens[a] and query_tokens[1] <= camera_tokens[b]:
+                    extra = len(camera_tokens[a] - query_tokens[0]) + len(camera_tokens[b] - query_tokens[1])
+                    best = max(best or 0.0, 1.0 / (1 + extra))
+            return best
+
+        return self._best(candidates, "token_set", score)
+
+    def _fuzzy_match(self, query: tuple) -> IntersectionMatch | None:
+        close = []
+        for street in query:
+            names = [name for name in difflib.get_close_matches(street, self._street_names, n=5, cutoff=FUZZY_CUTOFF)
+                     if _numbers(name) == _numbers(street)]
+            close.append(names)
+        if not all(close):
+            return None
+        candidates = set.intersection(*(set().union(*(self._street_postings[name] for name in names)) for names in close))
+
+        def score(streets):
+            forward = (difflib.SequenceMatcher(None, query[0], streets[0]).ratio()
+                       + difflib.SequenceMatcher(None, query[1], streets[1]).ratio()) / 2
+            backward = (difflib.SequenceMatcher(None, query[0], streets[1]).ratio()
+                        + difflib.SequenceMatcher(None, query[1], streets[0]).ratio()) / 2
+            return max(forward, backward)
+
+        return self._best(candidates, "fuzzy", score)
+
+    def lookup(self, location_query: str) -> IntersectionMatch | None:
+        """
+        Resolves a location like "1 Ave @ 110 St" to a camera.
+
+        Args:
+            location_query: An intersection, typically from extract_and_normalize_location.
+
+        Returns:
+            The best IntersectionMatch, or None if no tier matched.
+        """
+        query = canonical_streets(location_query)
+        if len(query) != 2:
+            return None
+        camera = self._exact.get(frozenset(query))
+        if camera is not None:
+            return IntersectionMatch(camera, "exact", 1.0)
+        return self._token_set_match(query) or self._fuzzy_match(query)
+
+    def lookup_many(self, location_queries) -> dict:
+        """Resolves many locations at once, returning {query: IntersectionMatch or None}."""
+        return {query: self.lookup(query) for query in location_queries}
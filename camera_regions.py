@@ -0,0 +1,143 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+from PIL import Image, ImageOps
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+REGIONS_FILENAME = "camera_regions.json"
+
+
+def regions_path_for_catalog(catalog_path: str | None) -> str:
+    """The region registry lives next to the saved camera catalog (or next to this module without one)."""
+    directory = os.path.dirname(os.path.abspath(catalog_path)) if catalog_path else os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(directory, REGIONS_FILENAME)
+
+
+DEFAULT_REGIONS_PATH = os.environ.get("CV4VI_CAMERA_REGIONS") or regions_path_for_catalog(os.environ.get("CV4VI_CAMERA_CATALOG"))
+
+
+@dataclass(frozen=True)
+class Region:
+    """A rectangle in a camera frame as fractions of its width and height, so it survives resolution changes."""
+    left: float
+    top: float
+    right: float
+    bottom: float
+
+    def __post_init__(self):
+        if not (0.0 <= self.left < self.right <= 1.0 and 0.0 <= self.top < self.bottom <= 1.0):
+            raise ValueError(f"Invalid region {self.as_list()}: expected 0 <= left < right <= 1 and 0 <= top < bottom <= 1")
+
+    @classmethod
+    def from_list(cls, values) -> "Region":
+        return cls(*(float(v) for v in values))
+
+    def as_list(self) -> list:
+        return [self.left, self.top, self.right, self.bottom]
+
+    def box(self, width: int, height: int) -> tuple:
+        """The region in pixels as (left, top, right, bottom), at least one pixel wide and tall."""
+        left, top = int(self.left * width), int(self.top * height)
+        right = max(left + 1, round(self.right * width))
+        bottom = max(top + 1, round(self.bottom * height))
+        return left, top, min(right, width), min(bottom, height)
+
+    def square_box(self, width: int, height: int) -> tuple:
+        """
+        The smallest square around the region that fits in the frame, so resizing
+        it to a square encoder input does not distort the scene. Regions too wide
+        or tall for a square to fit are returned as they are.
+        """
+        left, top, right, bottom = self.box(width, height)
+        side = max(right - left, bottom - top)
+        if side > width or side > height:
+            return left, top, right, bottom
+        cx, cy = (left + right) / 2, (top + bottom) / 2
+        left = int(min(max(cx - side / 2, 0), width - side))
+        top = int(min(max(cy - side / 2, 0), height - side))
+        return left, top, left + side, top + side
+
+
+def crop_region(image: Image.Image, region: Region, size: int | None = None) -> Image.Image:
+    """
+    Crops an image to the square around a region, optionally resized to size x size.
+    A crop that cannot be square is letterboxed rather than stretched.
+
+    Args:
+        image: The full camera frame.
+        region: The region to keep.
+        size: The output edge length, e.g. the vision encoder's native resolution.
+    """
+    crop = image.crop(region.square_box(*image.size))
+    if size and crop.size != (size, size):
+        crop = ImageOps.pad(crop, (size, size), method=Image.Resampling.BICUBIC)
+    return crop
+
+
+@dataclass(frozen=True)
+class CameraRegions:
+    """The configured regions of one camera's view."""
+    camera_id: str
+    crosswalk: Region | None = None
+    signal_head: Region | None = None
+
+
+class CameraRegionRegistry:
+    """
+    Per-camera regions of interest, stored as JSON next to the camera catalog:
+
+        {"<camera id>": {"crosswalk": [left, top, right, bottom],
+                         "signal_head": [left, top, right, bottom]}}
+
+    Cameras without an entry have no regions, and every stage that needs one
+    falls back to analyzing the whole frame.
+    """
+
+    def __init__(self, regions: dict | None = None):
+        self._regions = dict(regions or {})
+
+    def __len__(self) -> int:
+        return len(self._regions)
+
+    def get(self, camera_id: str | None) -> CameraRegions | None:
+        return self._regions.get(camera_id) if camera_id else None
+
+    def set(self, regions: CameraRegions):
+        self._regions[regions.camera_id] = regions
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_REGIONS_PATH) -> "CameraRegionRegistry":
+        """Loads the registry; a missing or invalid file gives an empty one."""
+        if not os.path.exists(path):
+            return cls()
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            regions = {}
+            for camera_id, entry in data.items():
+                crosswalk = entry.get("crosswalk")
+                signal_head = entry.get("signal_head")
+                regions[camera_id] = CameraRegions(
+                    camera_id=camera_id,
+                    crosswalk=Region.from_list(crosswalk) if crosswalk else None,
+                    signal_head=Region.from_list(signal_head) if signal_head else None,
+                )
+            logging.info(f"Loaded regions for {len(regions)} cameras from {path}")
+            return cls(regions)
+        except Exception as e:
+            logging.error(f"Failed to load camera regions from {path}: {e}")
+            return cls()
+
+    def save(self, path: str = DEFAULT_REGIONS_PATH):
+        data = {}
+        for camera_id, regions in sorted(self._regions.items()):
+            entry = {}
+            if regions.crosswalk:
+                entry["crosswalk"] = regions.crosswalk.as_list()
+            if regions.signal_head:
+                entry["signal_head"] = regions.signal_head.as_list()
+            data[camera_id] = entry
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
@@ -0,0 +1,342 @@
+import functools
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+from network_filter import NetworkFilter
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+CAMERAS_LIST_URL = "https://webcams.nyctmc.org/cameras-list"
+
+# Puts the cameras-list page back into its idle state without reloading the
+# Angular app: closes any open camera dialog, unticks selected cameras and
+# clears the search filter.
+RESET_SCRIPT = """
+document.dispatchEvent(new KeyboardEvent('keydown', {key: 'Escape', keyCode: 27, bubbles: true}));
+document.querySelectorAll('.cdk-overlay-backdrop').forEach(function (b) { b.click(); });
+document.querySelectorAll('mat-checkbox.mat-checkbox-checked input, mat-checkbox.mat-mdc-checkbox-checked input')
+    .forEach(function (c) { c.click(); });
+var box = document.getElementById('mat-input-0');
+if (box) {
+    box.value = '';
+    box.dispatchEvent(new Event('input', {bubbles: true}));
+}
+return document.querySelectorAll('app-dialog-camera-preview').length;
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_chromedriver_path() -> str:
+    """Resolves the ChromeDriver binary once per process."""
+    logging.info("Resolving ChromeDriver binary.")
+    return ChromeDriverManager().install()
+
+
+def _find_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class PooledDriver:
+    """A Chrome session owned by a ChromeDriverPool, with its own profile and debugging port."""
+
+    def __init__(self, driver, user_data_dir: str, debugging_port: int):
+        self.driver = driver
+        self.user_data_dir = user_data_dir
+        self.debugging_port = debugging_port
+        self.created_at = time.monotonic()
+        self.leased_at = None
+        self.uses = 0
+
+
+class ChromeDriverPool:
+    """
+    A bounded pool of headless Chrome sessions parked on the NYCTMC cameras list.
+
+    Sessions are launched up front, reset between uses and recycled when they
+    crash, exceed max_uses, or are held longer than max_lease_seconds. An
+    optional NetworkFilter drops requests the capture flow does not need.
+    """
+
+    def __init__(self, size: int = 2, url: str = CAMERAS_LIST_URL, headless: bool = True,
+                 max_uses: int = 50, max_lease_seconds: float = 120.0,
+                 health_check_interval: float | None = 30.0, driver_path: str | None = None,
+                 network_filter: NetworkFilter | None = None):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.size = size
+        self.url = url
+        self.headless = headless
+        self.max_uses = max_uses
+        self.max_lease_seconds = max_lease_seconds
+        self.health_check_interval = health_check_interval
+        self.driver_path = driver_path or resolve_chromedriver_path()
+        self.network_filter = network_filter
+        self._idle = deque()
+        self._leased = set()
+        self._launching = 0
+        # Sessions taken out of _idle or _leased while they are probed or quit.
+        self._checking = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._health_thread = None
+
+    def start(self):
+        """Pre-launches every session and starts the background health checker."""
+        self._replenish()
+        if self.health_check_interval and self._health_thread is None:
+            self._health_thread = threading.Thread(target=self._health_loop, name="driver-pool-health", daemon=True)
+            self._health_thread.start()
+        return self
+
+    def _build_options(self, user_data_dir: str, port: int) -> Options:
+        options = Options()
+        options.add_argument(f"--user-data-dir={user_data_dir}")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument(f"--remote-debugging-port={port}")
+        if self.headless:
+            options.add_argument("--headless")
+        if self.network_filter:
+            self.network_filter.configure_options(options)
+        return options
+
+    def _launch(self) -> PooledDriver:
+        user_data_dir = tempfile.mkdtemp(prefix="cv4vi-chrome-")
+        port = _find_free_port()
+        driver = None
+        try:
+            driver = webdriver.Chrome(service=Service(self.driver_path), options=self._build_options(user_data_dir, port))
+            if self.network_filter:
+                self.network_filter.install(driver)
+            driver.get(self.url)
+            logging.info(f"Launched pooled Chrome session on debugging port {port}")
+            return PooledDriver(driver, user_data_dir, port)
+        except Exception:
+            if driver:
+                driver.quit()
+            shutil.rmtree(user_data_dir, ignore_errors=True)
+            raise
+
+    def _destroy(self, pooled: PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logging.warning(f"Error while quitting Chrome session on port {pooled.debugging_port}: {e}")
+        if os.path.exists(pooled.user_data_dir):
+            shutil.rmtree(pooled.user_data_dir, ignore_errors=True)
+
+    def _total(self) -> int:
+        return len(self._idle) + len(self._leased) + self._launching + self._checking
+
+    def _lease(self, pooled: PooledDriver):
+        """Marks a session as leased; called with the lock held."""
+        pooled.leased_at = time.monotonic()
+        pooled.uses += 1
+        self._leased.add(pooled)
+
+    def _replenish(self):
+        """Launches sessions until the pool is back at its configured size."""
+        while True:
+            with self._cond:
+                if self._closed or self._total() >= self.size:
+                    return
+                self._launching += 1
+            pooled = None
+            try:
+                pooled = self._launch()
+            except Exception as e:
+                logging.error(f"Failed to launch pooled Chrome session: {e}")
+            finally:
+                with self._cond:
+                    self._launching -= 1
+                    if pooled and not self._closed:
+                        self._idle.append(pooled)
+                    self._cond.notify_all()
+            if pooled is None:
+                return
+            if self._closed:
+                self._destroy(pooled)
+                return
+
+    def _replenish_async(self):
+        threading.Thread(target=self._replenish, name="driver-pool-replenish", daemon=True).start()
+
+    def _is_alive(self, pooled: PooledDriver) -> bool:
+        try:
+            return pooled.driver.current_url.startswith(self.url)
+        except WebDriverException:
+            return False
+
+    def acquire(self, timeout: float | None = None) -> PooledDriver:
+        """
+        Leases a warm session, launching one if the pool is below its size.
+
+        Raises:
+            TimeoutError: If no session became available within the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            launch = False
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Driver pool is closed")
+                    if self._idle:
+                        pooled = self._idle.popleft()
+                        self._checking += 1
+                        break
+                    if self._total() < self.size:
+                        self._launching += 1
+                        launch = True
+                        pooled = None
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a pooled Chrome session")
+                    self._cond.wait(remaining)
+            if launch:
+                try:
+                    pooled = self._launch()
+                finally:
+                    with self._cond:
+                        self._launching -= 1
+                        if pooled is not None:
+                            self._lease(pooled)
+                        self._cond.notify_all()
+                return pooled
+            alive = False
+            try:
+                alive = self._is_alive(pooled)
+                if not alive:
+                    logging.warning(f"Recycling crashed Chrome session on port {pooled.debugging_port}")
+                    self._destroy(pooled)
+            finally:
+                with self._cond:
+                    self._checking -= 1
+                    if alive:
+                        self._lease(pooled)
+                    self._cond.notify_all()
+            if alive:
+                return pooled
+
+    def release(self, pooled: PooledDriver, healthy: bool = True):
+        """Returns a session to the pool, resetting it or recycling it if it is no longer usable."""
+        with self._cond:
+            if pooled not in self._leased:
+                # The lease was reclaimed by the health checker; the session is already gone.
+                return
+            self._leased.discard(pooled)
+            pooled.leased_at = None
+        if healthy and pooled.uses < self.max_uses and not self._closed:
+            healthy = self._reset(pooled)
+            if healthy:
+                with self._cond:
+                    self._idle.append(pooled)
+                    self._cond.notify_all()
+                return
+        self._destroy(pooled)
+        with self._cond:
+            self._cond.notify_all()
+        self._replenish_async()
+
+    def discard(self, pooled: PooledDriver):
+        """Quits a leased session immediately and schedules a replacement."""
+        self.release(pooled, healthy=False)
+
+    @contextmanager
+    def lease(self, timeout: float | None = None):
+        pooled = self.acquire(timeout)
+        healthy = True
+        try:
+            yield pooled
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self.release(pooled, healthy=healthy)
+
+    def _reset(self, pooled: PooledDriver) -> bool:
+        try:
+            if not pooled.driver.current_url.startswith(self.url):
+                pooled.driver.get(self.url)
+                return True
+            open_dialogs = pooled.driver.execute_script(RESET_SCRIPT)
+            if open_dialogs:
+                pooled.driver.get(self.url)
+            return True
+        except WebDriverException as e:
+            logging.warning(f"Failed to reset Chrome session on port {pooled.debugging_port}: {e}")
+            return False
+
+    def check_health(self):
+        """Recycles crashed idle sessions and reclaims leases held past max_lease_seconds."""
+        now = time.monotonic()
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            leaked = [p for p in self._leased
+                      if p.leased_at is not None and now - p.leased_at > self.max_lease_seconds]
+            for pooled in leaked:
+                self._leased.discard(pooled)
+            # Still counted while they are probed or quit, so acquire() does not launch beyond size meanwhile.
+            self._checking += len(idle) + len(leaked)
+        alive = []
+        try:
+            for pooled in idle:
+                if self._is_alive(pooled):
+                    alive.append(pooled)
+                else:
+                    logging.warning(f"Recycling crashed Chrome session on port {pooled.debugging_port}")
+                    self._destroy(pooled)
+            for pooled in leaked:
+                logging.warning(f"Reclaiming Chrome session on port {pooled.debugging_port} leased for over {self.max_lease_seconds}s")
+                self._destroy(pooled)
+        finally:
+            with self._cond:
+                self._checking -= len(idle) + len(leaked)
+                if not self._closed:
+                    self._idle.extendleft(reversed(alive))
+                    alive = []
+                self._cond.notify_all()
+        # The pool was closed during the check.
+        for pooled in alive:
+            self._destroy(pooled)
+        self._replenish()
+
+    def _health_loop(self):
+        while not self._closed:
+            time.sleep(self.health_check_interval)
+            if self._closed:
+                return
+            try:
+                self.check_health()
+            except Exception as e:
+                logging.error(f"Driver pool health check failed: {e}")
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"size": self.size, "idle": len(self._idle), "leased": len(self._leased), "launching": self._launching}
+
+    def close(self):
+        """Quits every session, including ones that are still leased."""
+        with self._cond:
+            self._closed = True
+            sessions = list(self._idle) + list(self._leased)
+            self._idle.clear()
+            self._leased.clear()
+            self._cond.notify_all()
+        for pooled in sessions:
+            self._destroy(pooled)
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def frame_digest(image: Image.Image) -> int:
+    """
+    A 64-bit digest of an image's exact pixels, size and mode.
+
+    Embeddings are only shared between identical encoder inputs: a pedestrian
+    signal or an approaching car can change a handful of pixels, and anything
+    looser than an exact match could answer about a scene the model never saw.
+    """
+    digest = hashlib.blake2b(image.tobytes(), digest_size=8, key=f"{image.mode}:{image.size}".encode())
+    return int.from_bytes(digest.digest(), "big")
+
+
+def embedding_nbytes(embedding) -> int:
+    """Best-effort memory size of an image embedding (tensor, array, or a tuple of them)."""
+    if isinstance(embedding, (tuple, list)):
+        return sum(embedding_nbytes(e) for e in embedding)
+    if hasattr(embedding, "element_size") and hasattr(embedding, "numel"):
+        return embedding.element_size() * embedding.numel()
+    if hasattr(embedding, "nbytes"):
+        return int(embedding.nbytes)
+    return sys.getsizeof(embedding)
+
+
+class EmbeddingCache:
+    """
+    An LRU cache of vision-encoder outputs keyed by frame_digest, so re-served
+    camera frames skip the encoder. Entries are evicted least recently used
+    first once the cached embeddings exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace, frame_hash: int):
+        """
+        Returns the cached embedding for a frame, or None on a miss.
+
+        Args:
+            namespace: Separates embeddings from different models (e.g. id(model)).
+            frame_hash: The frame's frame_digest.
+        """
+        key = (namespace, frame_hash)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, namespace, frame_hash: int, embedding):
+        size = embedding_nbytes(embedding)
+        if size > self.max_bytes:
+            logging.warning(f"Embedding of {size} bytes exceeds the cache budget; not caching.")
+            return
+        key = (namespace, frame_hash)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (embedding, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
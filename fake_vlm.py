@@ -0,0 +1,260 @@
+"""
+A deterministic stand-in for Moondream2, for load-testing everything around the
+model on machines without the weights.
+
+FakeMoondream implements encode_image and answer_question (streamers and
+stopping criteria included) with scripted verdicts and sampled latencies, so
+the scheduler, caches, model server, worker pool, voice pipeline and app run
+unchanged. The same frame and seed always get the same answer.
+
+Usage:
+    CV4VI_MODEL_BACKEND=fake streamlit run app.py
+    CV4VI_MODEL_BACKEND=fake CV4VI_FAKE_VERDICTS=unsafe=0.7,safe=0.3 CV4VI_FAKE_ANSWER_LATENCY=fixed:0.5 python model_server.py
+"""
+
+import hashlib
+import itertools
+import logging
+import math
+import os
+import random
+import threading
+import time
+import numpy as np
+from verdict import Verdict
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+FAKE_SEED = int(os.environ.get("CV4VI_FAKE_SEED", "0"))
+# Verdict weights, e.g. "safe=0.3,unsafe=0.6,unknown=0.1"; the verdict for a frame is drawn once per seed.
+FAKE_VERDICTS = os.environ.get("CV4VI_FAKE_VERDICTS", "safe=0.3,unsafe=0.6,unknown=0.1")
+# A fixed verdict sequence, e.g. "unsafe,unsafe,safe", cycled per answer instead of drawn per frame.
+FAKE_SCRIPT = os.environ.get("CV4VI_FAKE_SCRIPT", "")
+# Latency distributions (see LatencyDistribution.parse); defaults are in the range of CPU fp32 Moondream2.
+FAKE_ENCODE_LATENCY = os.environ.get("CV4VI_FAKE_ENCODE_LATENCY", "lognormal:0.4:0.2")
+FAKE_ANSWER_LATENCY = os.environ.get("CV4VI_FAKE_ANSWER_LATENCY", "lognormal:2.0:0.3")
+
+SIGNAL_SENTENCES = {
+    Verdict.SAFE: ["The pedestrian signal shows the white 'Walk' figure.",
+                   "The 'Walk' sign is lit and the countdown shows 14 seconds."],
+    Verdict.UNSAFE: ["The pedestrian signal shows the orange 'Don't Walk' hand.",
+                     "The 'Don't Walk' hand is flashing with 3 seconds left."],
+    Verdict.UNKNOWN: ["The pedestrian signal is not visible in this image.",
+                      "The image is too dark to read the pedestrian signal."],
+}
+TRAFFIC_SENTENCES = {
+    Verdict.SAFE: ["No vehicles are moving through the crosswalk.",
+                   "Traffic is stopped behind the stop line."],
+    Verdict.UNSAFE: ["A car is turning into the crosswalk.",
+                     "Several vehicles are moving through the intersection."],
+    Verdict.UNKNOWN: ["Vehicles cannot be made out clearly.",
+                      "Glare hides most of the street."],
+}
+# Text after the verdict, as the real model sometimes adds; bounded decoding should cut it off.
+TRAILERS = ["Please stay alert and listen for traffic.", "Always check both directions before crossing."]
+
+
+class LatencyDistribution:
+    """
+    A latency in seconds, drawn from a named distribution:
+
+        fixed:SECONDS
+        uniform:LOW:HIGH
+        normal:MEAN:STDDEV          (clipped at 0)
+        lognormal:MEDIAN:SIGMA      (sigma of the underlying normal)
+    """
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+
+    def __init__(self, kind: str, *params: float):
+        if kind not in self.KINDS or len(params) != self.KINDS[kind]:
+            raise ValueError(f"Invalid latency distribution {kind}:{params}; expected one of {tuple(self.KINDS)}")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, *params = spec.strip().split(":")
+        return cls(kind, *(float(p) for p in params))
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "normal":
+            return max(0.0, rng.gauss(*self.params))
+        median, sigma = self.params
+        return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{':'.join(f'{p:g}' for p in self.params)}"
+
+
+def parse_verdict_weights(spec: str) -> dict:
+    """Parses "safe=0.3,unsafe=0.6,unknown=0.1" into {Verdict: weight}."""
+    weights = {}
+    for item in spec.split(","):
+        if item.strip():
+            label, _, weight = item.partition("=")
+            weights[Verdict[label.strip().upper()]] = float(weight or 1)
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError(f"Invalid verdict weights '{spec}'")
+    return weights
+
+
+class FakeTokenizer:
+    """A whitespace tokenizer whose vocabulary grows as words are seen; id 0 is both BOS and EOS."""
+    bos_token_id = 0
+    eos_token_id = 0
+    pad_token_id = 0
+
+    def __init__(self):
+        self._ids = {}
+        self._words = ["<|endoftext|>"]
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> list:
+        ids = []
+        with self._lock:
+            for word in text.split():
+                if word not in self._ids:
+                    self._ids[word] = len(self._words)
+                    self._words.append(word)
+                ids.append(self._ids[word])
+        return ids
+
+    def decode(self, ids, skip_special_tokens: bool = True, **kwargs) -> str:
+        words = [self._words[int(i)] for i in np.asarray(ids).ravel() if not (skip_special_tokens and int(i) == 0)]
+        return " ".join(words)
+
+    def batch_decode(self, sequences, skip_special_tokens: bool = True, **kwargs) -> list:
+        return [self.decode(ids, skip_special_tokens) for ids in sequences]
+
+
+class FakeMoondream:
+    """
+    Answers like Moondream2 without any weights.
+
+    A frame's "embedding" is a digest of its pixels. Analysis answers end in a
+    verdict drawn from the verdict weights with a generator seeded by the seed
+    and that digest (or taken from the script, in call order), followed by a
+    little extra text. Encoding sleeps for a sampled encode latency; answering
+    emits one word at a time over a sampled answer latency, calling the
+    streamer and stopping criteria like generate does, so stopping early also
+    saves the fake decode time.
+
+    Every argument defaults to its CV4VI_FAKE_* setting.
+
+    Args:
+        seed: Seeds the verdicts and latencies.
+        verdicts: Verdict weights (see parse_verdict_weights) or a {Verdict: weight} dict.
+        script: Verdicts to cycle through in call order instead of drawing them per frame.
+        encode_latency: LatencyDistribution spec for encode_image.
+        answer_latency: LatencyDistribution spec for a full answer.
+    """
+    name = "fake"
+    device = "cpu"
+
+    def __init__(self, seed: int | None = None, verdicts=None, script: str | list | None = None,
+                 encode_latency: str | None = None, answer_latency: str | None = None):
+        self.seed = FAKE_SEED if seed is None else seed
+        verdicts = verdicts or FAKE_VERDICTS
+        self.verdicts = parse_verdict_weights(verdicts) if isinstance(verdicts, str) else dict(verdicts)
+        script = FAKE_SCRIPT if script is None else script
+        encode_latency = encode_latency or FAKE_ENCODE_LATENCY
+        answer_latency = answer_latency or FAKE_ANSWER_LATENCY
+        if isinstance(script, str):
+            script = [Verdict[label.strip().upper()] for label in script.split(",") if label.strip()]
+        self._script = itertools.cycle(script) if script else None
+        self.encode_latency = LatencyDistribution.parse(encode_latency)
+        self.answer_latency = LatencyDistribution.parse(answer_latency)
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self.encodes = 0
+        self.answers = 0
+
+    def _sleep(self, distribution: LatencyDistribution) -> float:
+        with self._lock:
+            seconds = distribution.sample(self._rng)
+        time.sleep(seconds)
+        return seconds
+
+    def encode_image(self, image):
+        """Returns a 16-byte digest of the image's pixels as its embedding."""
+        self._sleep(self.encode_latency)
+        digest = hashlib.blake2b(image.tobytes(), digest_size=16, key=str(image.size).encode()).digest()
+        with self._lock:
+            self.encodes += 1
+        return np.frombuffer(digest, dtype=np.uint8)
+
+    def _verdict(self, rng: random.Random) -> Verdict:
+        if self._script is not None:
+            with self._lock:
+                return next(self._script)
+        verdicts = list(self.verdicts)
+        return rng.choices(verdicts, weights=[self.verdicts[v] for v in verdicts])[0]
+
+    def script_answer(self, image_embeds, question: str) -> str:
+        """The full text the fake model would generate, before any stopping criteria."""
+        rng = random.Random(f"{self.seed}:{bytes(image_embeds).hex()}:{question}")
+        if "safe to cross" not in question:
+            return f"This is a fake answer to: {question}"
+        verdict = self._verdict(rng)
+        return " ".join([rng.choice(SIGNAL_SENTENCES[verdict]), rng.choice(TRAFFIC_SENTENCES[verdict]),
+                         verdict.sentence, rng.choice(TRAILERS)])
+
+    def answer_question(self, image_embeds, question: str, tokenizer, chat_history: str = "", streamer=None,
+                        stopping_criteria=None, **generate_kwargs) -> str:
+        """
+        Generates the scripted answer one word per step, like answer_question on the real model.
+
+        Args:
+            image_embeds: The output of encode_image.
+            question: The question.
+            tokenizer: A FakeTokenizer (load_model returns one with the fake model).
+            chat_history: Earlier turns, included in the prompt like the real model does.
+            streamer: Receives the prompt ids and then each new token, as from generate.
+            stopping_criteria: Called after every token with the ids so far; any True stops.
+        """
+        prompt_ids = [tokenizer.bos_token_id] + tokenizer.encode(f"{chat_history}Question: {question} Answer:")
+        answer_ids = tokenizer.encode(self.script_answer(image_embeds, question)) + [tokenizer.eos_token_id]
+        with self._lock:
+            total = self.answer_latency.sample(self._rng)
+            self.answers += 1
+        per_token = total / len(answer_ids)
+        if streamer is not None:
+            streamer.put(np.array([prompt_ids]))
+        generated = []
+        for token in answer_ids:
+            time.sleep(per_token)
+            generated.append(token)
+            if streamer is not None:
+                streamer.put(np.array([token]))
+            if token == tokenizer.eos_token_id:
+                break
+            # Moondream2 generates from embeddings, so generate's ids hold only the new tokens.
+            ids = np.array([generated])
+            if stopping_criteria and any(criteria(ids, None) for criteria in stopping_criteria):
+                break
+        if streamer is not None:
+            streamer.end()
+        return tokenizer.decode(generated, skip_special_tokens=True).strip()
+
+    # The older query/caption interface used by the component test scripts.
+    def query(self, image, question: str) -> dict:
+        return {"answer": self.answer_question(self.encode_image(image), question, FakeTokenizer())}
+
+    def caption(self, image, length: str = "normal") -> dict:
+        return {"caption": f"A fake {image.size[0]}x{image.size[1]} street scene."}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"encodes": self.encodes, "answers": self.answers, "encode_latency": repr(self.encode_latency),
+                    "answer_latency": repr(self.answer_latency)}
+
+
+def load_fake_model(**kwargs) -> tuple:
+    """Returns (FakeMoondream, FakeTokenizer), configured from CV4VI_FAKE_* unless overridden."""
+    model = FakeMoondream(**kwargs)
+    logging.info(f"Loaded the fake VLM (seed {model.seed}, encode {model.encode_latency!r}, answer {model.answer_latency!r})")
+    return model, FakeTokenizer()
@@ -0,0 +1,78 @@
+import io
+import threading
+import time
+import numpy as np
+from PIL import Image
+
+
+class Frame:
+    """
+    A captured camera image held in memory.
+
+    Keeps the encoded bytes exactly as captured, decodes them at most once on
+    first access to image or array, and carries capture metadata. One Frame is
+    shared by display and analysis, so nothing touches the disk.
+    """
+
+    def __init__(self, data: bytes, camera_id: str | None = None, location: str | None = None,
+                 source: str = "", captured_at: float | None = None, metadata: dict | None = None):
+        self.data = data
+        self.camera_id = camera_id
+        self.location = location
+        self.source = source
+        self.captured_at = captured_at if captured_at is not None else time.time()
+        self.metadata = dict(metadata or {})
+        self._image = None
+        self._array = None
+        # Reentrant: array decodes through image while already holding the lock.
+        self._decode_lock = threading.RLock()
+
+    @property
+    def format(self) -> str:
+        if self.data[:3] == b"\xff\xd8\xff":
+            return "jpeg"
+        if self.data[:8] == b"\x89PNG\r\n\x1a\n":
+            return "png"
+        return "unknown"
+
+    @property
+    def image(self) -> Image.Image:
+        """The decoded RGB image, decoded on first access."""
+        if self._image is None:
+            with self._decode_lock:
+                if self._image is None:
+                    image = Image.open(io.BytesIO(self.data))
+                    self._image = image.convert("RGB")
+        return self._image
+
+    @property
+    def array(self) -> np.ndarray:
+        """The decoded image as a read-only HxWx3 uint8 array."""
+        if self._array is None:
+            with self._decode_lock:
+                if self._array is None:
+                    array = np.asarray(self.image)
+                    array.flags.writeable = False
+                    self._array = array
+        return self._array
+
+    @property
+    def size(self) -> tuple:
+        return self.image.size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the frame: encoded bytes plus any decoded copies."""
+        total = len(self.data)
+        if self._image is not None:
+            total += self._image.width * self._image.height * 3
+        if self._array is not None:
+            total += self._array.nbytes
+        return total
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.captured_at
+
+    def __repr__(self) -> str:
+        return f"Frame(camera_id={self.camera_id!r}, source={self.source!r}, format={self.format!r}, bytes={len(self.data)})"
@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# NYCTMC cameras publish a new still roughly every two seconds.
+DEFAULT_TTL_SECONDS = 2.0
+DEFAULT_MAX_AGE_SECONDS = 60.0
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CachedFrame:
+    """A captured frame, when it was captured, and whether it came from the cache."""
+    frame: Any
+    captured_at: float
+    hit: bool
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.captured_at
+
+
+class _Entry:
+    def __init__(self, frame, captured_at: float, size: int):
+        self.frame = frame
+        self.captured_at = captured_at
+        self.size = size
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.cancelled = False
+
+
+class FrameCache:
+    """
+    A per-camera frame cache that sits in front of any capture backend.
+
+    Frames younger than ttl_seconds are served from memory. Concurrent misses for
+    the same camera share a single capture. Entries are evicted once they are
+    older than max_age_seconds, and least recently used entries are evicted when
+    the cache holds more than max_bytes. Frames can grow after they are cached
+    (Frames decode lazily), so entries are re-measured with size_of whenever
+    the budget is enforced.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+                 max_bytes: int = DEFAULT_MAX_BYTES, size_of: Callable[[Any], int] = len):
+        self.ttl_seconds = ttl_seconds
+        self.max_age_seconds = max(max_age_seconds, ttl_seconds)
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _remove(self, camera_id: str):
+        entry = self._entries.pop(camera_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _remeasure(self):
+        for entry in self._entries.values():
+            size = self.size_of(entry.frame)
+            self._bytes += size - entry.size
+            entry.size = size
+
+    def _evict(self, now: float):
+        self._remeasure()
+        for camera_id in [k for k, e in self._entries.items() if now - e.captured_at > self.max_age_seconds]:
+            self._remove(camera_id)
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def peek(self, camera_id: str) -> CachedFrame | None:
+        """Returns the cached frame for a camera if it is still fresh, without capturing."""
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(camera_id)
+            if entry is None or now - entry.captured_at > self.ttl_seconds:
+                return None
+            self._entries.move_to_end(camera_id)
+            return CachedFrame(entry.frame, entry.captured_at, hit=True)
+
+    def get(self, camera_id: str, capture: Callable[[], Any], cancel_token=None) -> CachedFrame | None:
+        """
+        Returns a fresh frame for a camera, capturing it at most once across concurrent callers.
+
+        Args:
+            camera_id: The cache key, normally the NYCTMC camera id.
+            capture: Called on a miss; returns the frame or None on failure.
+            cancel_token: The caller's cancellation token (anything with a
+                `cancelled` attribute), which the capture is expected to honour.
+                If the capture was cancelled, callers that were waiting on it
+                capture again themselves rather than sharing the cancelled result.
+
+        Returns:
+            A CachedFrame, or None if the capture failed.
+        """
+        while True:
+            cached = self.peek(camera_id)
+            if cached is not None:
+                with self._lock:
+                    self.hits += 1
+                return cached
+
+            with self._lock:
+                flight = self._flights.get(camera_id)
+                leader = flight is None
+                if leader:
+                    flight = _Flight()
+                    self._flights[camera_id] = flight
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+
+            if leader:
+                return self._lead(camera_id, flight, capture, cancel_token)
+            flight.done.wait()
+            if flight.cancelled:
+                # Only the leader's own request was cancelled; this caller still wants a frame.
+                logging.info(f"Shared capture for {camera_id} was cancelled by its caller; capturing again")
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return CachedFrame(flight.result.frame, flight.result.captured_at, hit=True) if flight.result else None
+
+    def _lead(self, camera_id: str, flight: _Flight, capture: Callable[[], Any], cancel_token) -> CachedFrame | None:
+        try:
+            frame = capture()
+            result = None
+            if frame is not None:
+                captured_at = getattr(frame, "captured_at", None) or time.time()
+                result = CachedFrame(frame, captured_at, hit=False)
+                self.put(camera_id, frame, captured_at)
+            flight.result = result
+            return result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            flight.cancelled = bool(getattr(cancel_token, "cancelled", False)) and flight.result is None
+            with self._lock:
+                self._flights.pop(camera_id, None)
+            flight.done.set()
+
+    def put(self, camera_id: str, frame, captured_at: float | None = None):
+        """Stores a frame captured outside of get(), e.g. by a prefetch."""
+        captured_at = captured_at or time.time()
+        size = self.size_of(frame)
+        with self._lock:
+            self._remove(camera_id)
+            if size > self.max_bytes:
+                logging.warning(f"Frame for {camera_id} ({size} bytes) exceeds the cache budget; not caching.")
+                return
+            self._entries[camera_id] = _Entry(frame, captured_at, size)
+            self._bytes += size
+            self._evict(time.time())
+
+    def invalidate(self, camera_id: str):
+        with self._lock:
+            self._remove(camera_id)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._remeasure()
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits,
+                    "misses": self.misses, "coalesced": self.coalesced}
@@ -0,0 +1,227 @@
+import hashlib
+import logging
+import os
+import torch
+from PIL import Image
+from fake_vlm import FakeMoondream
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+MODEL_BACKEND = os.environ.get("CV4VI_MODEL_BACKEND", "eager")
+COMPILE_MODE = os.environ.get("CV4VI_COMPILE_MODE", "default")
+ONNX_DIR = os.environ.get("CV4VI_ONNX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "cv4vi"))
+# Moondream2's vision encoder splits its 378x378 input into 14x14 patches.
+PATCH_SIZE = 14
+ENCODER_INPUT_SIZE = 378
+
+
+class InferenceBackend:
+    """
+    A loaded Moondream2 model behind one encode/answer interface.
+
+    Backends change how the model runs, not what it computes. Each one prepares
+    the model once in prepare(); everything else (text_model, batch_answer, the
+    Moondream2 method names the analyzer calls) is delegated to the model, so a
+    backend stands in for the model anywhere.
+
+    Args:
+        model: The loaded, eval-mode Moondream2 model.
+        tokenizer: The loaded Moondream2 tokenizer.
+    """
+    name = "eager"
+
+    def __init__(self, model, tokenizer):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.prepare()
+
+    def prepare(self):
+        """Adapts the model to this backend; eager runs it as loaded."""
+
+    def encode(self, image):
+        """Runs the vision encoder on a PIL image; returns the image embedding."""
+        return self.model.encode_image(image)
+
+    def answer(self, embedding, question: str, **generate_kwargs) -> str:
+        """Answers a question about an encoded image."""
+        return self.model.answer_question(embedding, question, self.tokenizer, **generate_kwargs)
+
+    def encode_image(self, image):
+        return self.encode(image)
+
+    def answer_question(self, embedding, question: str, tokenizer=None, **generate_kwargs) -> str:
+        return self.answer(embedding, question, **generate_kwargs)
+
+    def __getattr__(self, name):
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+def _vision_modules(vision_encoder) -> list:
+    """The encoder and projection of Moondream2's vision encoder, which do all of its tensor work."""
+    modules = [getattr(vision_encoder, name, None) for name in ("encoder", "projection")]
+    return modules if all(modules) else [vision_encoder]
+
+
+class CompileBackend(InferenceBackend):
+    """
+    Runs the vision encoder and the text model's forward pass through
+    torch.compile (CV4VI_COMPILE_MODE). torch.compile only compiles on the
+    first call, so prepare() makes that call with a blank frame and a one-token
+    answer: compilation happens at load, and if it fails the model is restored
+    and create_backend falls back to eager.
+    """
+    name = "compile"
+
+    def prepare(self):
+        # Imported here because moondream_analyzer imports this module.
+        from moondream_analyzer import VerdictStoppingCriteria
+        from transformers import StoppingCriteriaList
+
+        modules = _vision_modules(self.model.vision_encoder) + [self.model.text_model]
+        originals = [(module, module.__dict__.get("forward")) for module in modules]
+        try:
+            for module in modules[:-1]:
+                module.forward = torch.compile(module.forward, mode=COMPILE_MODE)
+            # Prompt length varies with the question, so compile for dynamic shapes.
+            text_model = self.model.text_model
+            text_model.forward = torch.compile(text_model.forward, mode=COMPILE_MODE, dynamic=True)
+            with torch.no_grad():
+                embedding = self.model.encode_image(Image.new("RGB", (ENCODER_INPUT_SIZE, ENCODER_INPUT_SIZE)))
+                # Moondream2's answer_question sets max_new_tokens itself; cap the warm-up with a criterion instead.
+                one_token = VerdictStoppingCriteria(self.tokenizer, max_new_tokens=1, stop_at_verdict=[False])
+                self.model.answer_question(embedding, "Describe the image.", self.tokenizer,
+                                           stopping_criteria=StoppingCriteriaList([one_token]))
+        except Exception:
+            for module, forward in originals:
+                if forward is None:
+                    module.__dict__.pop("forward", None)
+                else:
+                    module.forward = forward
+            raise
+
+
+def weights_revision(model) -> str:
+    """
+    Identifies the loaded weights, so a graph exported from them is not reused
+    for others: the Hugging Face commit they were loaded from, or, for a local
+    checkout without one, a digest of the vision encoder's parameters.
+    """
+    revision = getattr(getattr(model, "config", None), "_commit_hash", None)
+    if revision:
+        return revision[:12]
+    digest = hashlib.blake2b(digest_size=8)
+    for name, tensor in model.vision_encoder.state_dict().items():
+        digest.update(name.encode())
+        digest.update(tensor.detach().cpu().numpy().tobytes())
+    return digest.hexdigest()
+
+
+def patchify(x):
+    """Splits preprocessed images into the flattened patches Moondream2's vision encoder takes."""
+    b, c, h, w = x.shape
+    # b c (h p1) (w p2) -> b (h w) (c p1 p2)
+    x = x.reshape(b, c, h // PATCH_SIZE, PATCH_SIZE, w // PATCH_SIZE, PATCH_SIZE)
+    return x.permute(0, 2, 4, 1, 3, 5).reshape(b, (h // PATCH_SIZE) * (w // PATCH_SIZE), c * PATCH_SIZE * PATCH_SIZE)
+
+
+class OnnxVisionEncoder(torch.nn.Module):
+    """
+    Stands in for Moondream2's vision encoder: preprocessing stays in PyTorch,
+    the encoder and projection run in ONNX Runtime on the CPU. It is a Module
+    (with no parameters) so it can replace the model's registered submodule.
+
+    Args:
+        vision_encoder: The model's vision encoder, exported on first use.
+        path: Where the exported graph is kept between runs.
+    """
+
+    def __init__(self, vision_encoder, path: str):
+        import onnxruntime
+
+        super().__init__()
+        if not hasattr(vision_encoder, "preprocess") or _vision_modules(vision_encoder) == [vision_encoder]:
+            raise ValueError("This Moondream2 revision's vision encoder layout is not supported for ONNX export")
+        self.preprocess = vision_encoder.preprocess
+        if not os.path.exists(path):
+            self._export(vision_encoder, path)
+        options = onnxruntime.SessionOptions()
+        # Stay within the thread budget set for this process (e.g. by a worker pool).
+        options.intra_op_num_threads = torch.get_num_threads()
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    @staticmethod
+    def _export(vision_encoder, path: str):
+        logging.info(f"Exporting the vision encoder to ONNX at {path}...")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        graph = torch.nn.Sequential(vision_encoder.encoder, vision_encoder.projection)
+        patches = (ENCODER_INPUT_SIZE // PATCH_SIZE) ** 2
+        sample = torch.zeros((1, patches, 3 * PATCH_SIZE * PATCH_SIZE), dtype=torch.float32)
+        partial = f"{path}.partial"
+        with torch.no_grad():
+            torch.onnx.export(graph, sample, partial, input_names=["patches"], output_names=["embeddings"],
+                              dynamic_axes={"patches": {0: "batch"}, "embeddings": {0: "batch"}}, opset_version=17)
+        os.replace(partial, path)
+
+    def forward(self, images):
+        if not isinstance(images, list):
+            images = [images]
+        x = patchify(torch.stack([self.preprocess(image.convert("RGB")) for image in images]).float())
+        embeddings = self.session.run(None, {"patches": x.numpy()})[0]
+        return torch.from_numpy(embeddings)
+
+
+class OnnxBackend(InferenceBackend):
+    """
+    Runs the vision encoder in ONNX Runtime (exported once per weights
+    revision to CV4VI_ONNX_DIR) and the text model in PyTorch eager mode.
+    Needs fp32 weights and the optional onnxruntime package.
+    """
+    name = "onnx"
+
+    def prepare(self):
+        if self.model.dtype != torch.float32:
+            raise ValueError("The onnx backend needs fp32 weights")
+        revision = weights_revision(self.model)
+        path = os.path.join(ONNX_DIR, f"{type(self.model).__name__}-{revision}-vision-encoder.onnx")
+        self.model.vision_encoder = OnnxVisionEncoder(self.model.vision_encoder, path)
+
+
+class FakeBackend(InferenceBackend):
+    """
+    The weight-free FakeMoondream (see fake_vlm). load_model builds it instead
+    of loading the real model, so it cannot be applied to a loaded model.
+    """
+    name = "fake"
+
+    def prepare(self):
+        if not isinstance(self.model, FakeMoondream):
+            raise ValueError("The fake backend replaces the model; select it when calling load_model")
+
+
+BACKENDS = {backend.name: backend for backend in (InferenceBackend, CompileBackend, OnnxBackend, FakeBackend)}
+
+
+def create_backend(model, tokenizer, name: str | None = None) -> InferenceBackend:
+    """
+    Wraps a loaded model in an inference backend.
+
+    Args:
+        model: The loaded Moondream2 model.
+        tokenizer: The loaded Moondream2 tokenizer.
+        name: "eager", "compile", "onnx" or "fake". Defaults to CV4VI_MODEL_BACKEND.
+
+    Returns:
+        The backend; the eager one if the requested backend could not be prepared.
+    """
+    name = name or MODEL_BACKEND
+    try:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown model backend '{name}', expected one of {tuple(BACKENDS)}")
+        backend = BACKENDS[name](model, tokenizer)
+        logging.info(f"Using the {name} inference backend")
+        return backend
+    except Exception as e:
+        logging.error(f"Failed to prepare the {name} backend, falling back to eager: {e}")
+        return InferenceBackend(model, tokenizer)
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import queue
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Any, Callable
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_MAX_BATCH_SIZE = 4
+DEFAULT_MAX_WAIT_SECONDS = 0.025
+LATENCY_WINDOW = 1000
+
+
+class _Request:
+    def __init__(self, payload):
+        self.payload = payload
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class InferenceScheduler:
+    """
+    Coalesces concurrent inference requests into micro-batches for one shared model.
+
+    A single worker thread owns the model. It takes the first queued request, keeps
+    collecting more until max_batch_size is reached or max_wait_seconds has passed,
+    and hands the whole batch to batch_fn, which must return one result per payload.
+    Because only the worker calls the model, concurrent sessions never contend on it.
+    """
+
+    def __init__(self, batch_fn: Callable[[list], list], max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS, name: str = "inference-scheduler"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._queue_waits = deque(maxlen=LATENCY_WINDOW)
+        self._max_queue_depth = 0
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, payload) -> Future:
+        """Queues one request and returns a Future for its result."""
+        if self._closed:
+            raise RuntimeError("Inference scheduler is closed")
+        request = _Request(payload)
+        self._queue.put(request)
+        with self._lock:
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return request.future
+
+    def run(self, payload, timeout: float | None = None) -> Any:
+        """Submits a request and blocks until its result is ready."""
+        return self.submit(payload).result(timeout)
+
+    async def run_async(self, payload) -> Any:
+        """Submits a request and awaits its result without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(payload))
+
+    def _collect_batch(self, first: _Request) -> list:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [r for r in self._collect_batch(first) if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.monotonic()
+            try:
+                results = self.batch_fn([r.payload for r in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} requests")
+                for request, result in zip(batch, results):
+                    request.future.set_result(result)
+            except Exception as e:
+                logging.error(f"Inference batch of {len(batch)} failed: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+            finished = time.monotonic()
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+                for request in batch:
+                    self._queue_waits.append(started - request.enqueued_at)
+                    self._latencies.append(finished - request.enqueued_at)
+
+    def stats(self) -> dict:
+        """Queue depth, batch size histogram and per-request latency percentiles (seconds)."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            waits = list(self._queue_waits)
+            histogram = dict(sorted(self._batch_sizes.items()))
+            max_depth = self._max_queue_depth
+
+        def pct(values, q):
+            return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": max_depth,
+            "batch_size_histogram": histogram,
+            "batches": sum(histogram.values()),
+            "requests": sum(size * count for size, count in histogram.items()),
+            "latency_p50": pct(latencies, 0.5),
+            "latency_p90": pct(latencies, 0.9),
+            "latency_p99": pct(latencies, 0.99),
+            "queue_wait_mean": statistics.fmean(waits) if waits else 0.0,
+        }
+
+    def close(self):
+        """Stops the worker after the requests already queued have been served."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._worker.join()
@@ -1,5 +1,56 @@
 import re
 
+def normalize_street(s: str) -> str:
+    """
+    Normalizes a single street name to the canonical NYCTMC form.
+    Example: "First Avenue" -> "1 Ave"
+    """
+    s = s.lower().strip()
+
+    # Remove extra whitespace
+    s = ' '.join(s.split())
+
+    # Convert written numbers to digits
+    num_map = {
+        'first': '1', 'second': '2', 'third': '3', 'fourth': '4', 'fifth': '5',
+        'sixth': '6', 'seventh': '7', 'eighth': '8', 'ninth': '9', 'tenth': '10'
+    }
+    for word, digit in num_map.items():
+        s = s.replace(word, digit)
+
+    # Remove ordinal suffixes (st, nd, rd, th) but keep the number
+    s = re.sub(r'(\d+)(?:st|nd|rd|th)', r'\1', s)
+
+    # Abbreviate and capitalize street types
+    type_map = {
+        'avenue': 'Ave', 'ave': 'Ave',
+        'street': 'St', 'st': 'St',
+        'road': 'Rd', 'rd': 'Rd',
+        'boulevard': 'Blvd', 'blvd': 'Blvd',
+        'drive': 'Dr', 'dr': 'Dr',
+        'place': 'Pl', 'pl': 'Pl',
+        'court': 'Ct', 'ct': 'Ct'
+    }
+
+    parts = s.split()
+    name_parts = []
+    type_part = ""
+
+    for part in parts:
+        if part in type_map:
+            type_part = type_map[part]
+        else:
+            # Capitalize name parts, but handle numbers correctly
+            name_parts.append(part.title() if not part.isdigit() else part)
+
+    # Join name parts and add the type
+    full_name = " ".join(name_parts)
+    if type_part:
+        full_name += f" {type_part}"
+
+    return full_name
+
+
 def extract_and_normalize_location(query: str) -> str | None:
     """
     Extracts and normalizes a location from a user query.
@@ -24,52 +75,6 @@ def extract_and_normalize_location(query: str) -> str | None:
     if not match:
         return None
 
-    def normalize_street(s: str) -> str:
-        s = s.lower().strip()
-        
-        # Remove extra whitespace
-        s = ' '.join(s.split())
-
-        # Convert written numbers to digits
-        num_map = {
-            'first': '1', 'second': '2', 'third': '3', 'fourth': '4', 'fifth': '5',
-            'sixth': '6', 'seventh': '7', 'eighth': '8', 'ninth': '9', 'tenth': '10'
-        }
-        for word, digit in num_map.items():
-            s = s.replace(word, digit)
-
-        # Remove ordinal suffixes (st, nd, rd, th) but keep the number
-        s = re.sub(r'(\d+)(?:st|nd|rd|th)', r'\1', s)
-
-        # Abbreviate and capitalize street types
-        type_map = {
-            'avenue': 'Ave', 'ave': 'Ave',
-            'street': 'St', 'st': 'St',
-            'road': 'Rd', 'rd': 'Rd',
-            'boulevard': 'Blvd', 'blvd': 'Blvd',
-            'drive': 'Dr', 'dr': 'Dr',
-            'place': 'Pl', 'pl': 'Pl',
-            'court': 'Ct', 'ct': 'Ct'
-        }
-
-        parts = s.split()
-        name_parts = []
-        type_part = ""
-
-        for part in parts:
-            if part in type_map:
-                type_part = type_map[part]
-            else:
-                # Capitalize name parts, but handle numbers correctly
-                name_parts.append(part.title() if not part.isdigit() else part)
-        
-        # Join name parts and add the type
-        full_name = " ".join(name_parts)
-        if type_part:
-            full_name += f" {type_part}"
-        
-        return full_name
-
     street1 = normalize_street(match.group('street1'))
     street2 = normalize_street(match.group('street2'))
 
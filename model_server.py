@@ -0,0 +1,507 @@
+"""
+Local Moondream2 inference server shared by every app process.
+
+The server loads the model once and serves encode, answer, analyze and
+follow-up questions (whole or streamed) over a
+Unix socket (or localhost TCP) with multiprocessing.connection. Clients pass
+frames through a shared-memory buffer instead of pickling image bytes into the
+socket. Front ends use ModelClient and never import torch or load the model.
+
+Requests are pickled, so connections are authenticated with a shared key:
+CV4VI_MODEL_SERVER_KEY if set, otherwise a random key the server writes to
+CV4VI_MODEL_SERVER_KEY_FILE (mode 0600) for clients run by the same user.
+Listening on anything but a loopback address requires CV4VI_MODEL_SERVER_KEY.
+
+Usage:
+    python model_server.py --address /tmp/cv4vi-model.sock --precision int8
+    CV4VI_MODEL_SERVER=/tmp/cv4vi-model.sock streamlit run app.py
+"""
+
+import argparse
+import ipaddress
+import itertools
+import logging
+import os
+import secrets
+import socket
+import threading
+from collections import OrderedDict, deque
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener
+from frame import Frame
+from verdict import INCOMPLETE_ANALYSIS, AnalysisResult, Verdict
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_ADDRESS = os.environ.get("CV4VI_MODEL_SERVER", "/tmp/cv4vi-model.sock")
+MODEL_SERVER_KEY = os.environ.get("CV4VI_MODEL_SERVER_KEY")
+KEY_FILE = os.environ.get("CV4VI_MODEL_SERVER_KEY_FILE",
+                          os.path.join(os.path.expanduser("~"), ".cache", "cv4vi", "model-server.key"))
+MIN_SHARED_BUFFER_BYTES = 1024 * 1024
+MAX_ENCODED_FRAMES = 64
+
+# Shared-memory blocks created by clients in this process.
+_owned_buffers = set()
+
+
+class ModelServerError(RuntimeError):
+    """Raised by ModelClient when the server rejects or fails a request."""
+
+
+def parse_address(address: str):
+    """Returns (address, family): "host:port" is localhost TCP, anything else a Unix socket path."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and not address.startswith("/"):
+        return (host or "127.0.0.1", int(port)), "AF_INET"
+    return address, "AF_UNIX"
+
+
+def server_authkey(path: str = KEY_FILE) -> bytes:
+    """
+    The key a server authenticates clients with: CV4VI_MODEL_SERVER_KEY, or
+    the key in path, generated (readable only by this user) if it does not exist yet.
+    """
+    if MODEL_SERVER_KEY:
+        return MODEL_SERVER_KEY.encode()
+    try:
+        return client_authkey(path)
+    except ModelServerError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    key = secrets.token_hex(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(key)
+    logging.info(f"Generated a model server key at {path}")
+    return key.encode()
+
+
+def client_authkey(path: str = KEY_FILE) -> bytes:
+    """
+    The key a client connects with: CV4VI_MODEL_SERVER_KEY, or the key a server
+    on this host wrote to path.
+
+    Raises:
+        ModelServerError: If no key is configured and the key file is missing.
+    """
+    if MODEL_SERVER_KEY:
+        return MODEL_SERVER_KEY.encode()
+    try:
+        with open(path) as f:
+            key = f.read().strip()
+    except FileNotFoundError:
+        key = ""
+    if not key:
+        raise ModelServerError(f"No model server key: set CV4VI_MODEL_SERVER_KEY or start the server to create {path}")
+    return key.encode()
+
+
+def is_loopback(address) -> bool:
+    """Whether a parsed address only accepts local connections (Unix sockets always do)."""
+    if not isinstance(address, tuple):
+        return True
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(address[0])).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(name=name)
+    if name not in _owned_buffers:
+        # The client owns the block; stop this process's resource tracker from unlinking it at exit.
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+class ModelServer:
+    """
+    Owns one loaded model and answers requests from any number of client connections.
+
+    Every answer goes through an InferenceScheduler, so requests from different
+    front ends are batched together. encode returns a handle to the server-side
+    frame, whose embedding stays in the server's embedding cache; answer then
+    only pays for decoding.
+
+    Args:
+        authkey: The connection key; defaults to server_authkey(). A TCP address
+            that is not loopback is refused unless a key is given here or in
+            CV4VI_MODEL_SERVER_KEY.
+    """
+
+    def __init__(self, model, tokenizer, address: str = DEFAULT_ADDRESS, authkey: bytes | None = None):
+        self.address, self.family = parse_address(address)
+        if authkey is None and not MODEL_SERVER_KEY and not is_loopback(self.address):
+            raise ValueError(f"Refusing to serve on non-loopback address {address} without CV4VI_MODEL_SERVER_KEY")
+        self.authkey = authkey or server_authkey()
+
+        from inference_scheduler import InferenceScheduler
+        import moondream_analyzer
+
+        self.model = model
+        self.tokenizer = tokenizer
+        self._analyzer = moondream_analyzer
+        self._model_lock = threading.Lock()
+        self._scheduler = InferenceScheduler(
+            self._answer_batch,
+            max_batch_size=int(os.environ.get("CV4VI_MAX_BATCH_SIZE", "4")),
+            max_wait_seconds=float(os.environ.get("CV4VI_MAX_BATCH_WAIT_MS", "25")) / 1000,
+            name="model-server-scheduler",
+        )
+        self._frames = OrderedDict()
+        self._frames_lock = threading.Lock()
+        self._handles = itertools.count(1)
+        self._listener = None
+        self._closed = False
+
+    def _answer_batch(self, requests: list) -> list:
+        with self._model_lock:
+            return self._analyzer.answer_questions_batch(self.model, self.tokenizer, requests)
+
+    def _remember(self, frame: Frame) -> int:
+        handle = next(self._handles)
+        with self._frames_lock:
+            self._frames[handle] = frame
+            while len(self._frames) > MAX_ENCODED_FRAMES:
+                self._frames.popitem(last=False)
+        return handle
+
+    def _frame_for(self, handle: int) -> Frame:
+        with self._frames_lock:
+            frame = self._frames.get(handle)
+        if frame is None:
+            raise KeyError(f"Unknown or expired frame handle {handle}")
+        return frame
+
+    def encode(self, frame: Frame) -> int:
+        with self._model_lock:
+            if self._analyzer.encode_image_cached(self.model, frame) is None:
+                raise ValueError("Frame could not be decoded")
+        return self._remember(frame)
+
+    def answer(self, handle: int, question: str) -> str:
+        return self._scheduler.run((self._frame_for(handle), question)).text
+
+    def analyze(self, frame: Frame, question: str | None = None, session_id: str | None = None) -> AnalysisResult:
+        if question is None:
+            return self._analyzer.analyze_image(self.model, self.tokenizer, frame, scheduler=self._scheduler,
+                                                session_id=session_id)
+        return self._scheduler.run((frame, question))
+
+    def analyze_stream(self, frame: Frame, session_id: str | None = None):
+        return self._analyzer.stream_moondream_analysis(self.model, self.tokenizer, frame, scheduler=self._scheduler,
+                                                        session_id=session_id)
+
+    def follow_up(self, session_id: str, question: str) -> AnalysisResult | None:
+        return self._analyzer.follow_up(self.model, self.tokenizer, session_id, question, scheduler=self._scheduler)
+
+    def follow_up_stream(self, session_id: str, question: str):
+        return self._analyzer.stream_follow_up(self.model, self.tokenizer, session_id, question,
+                                               scheduler=self._scheduler)
+
+    def stats(self) -> dict:
+        prompt_cache = self._analyzer.get_prompt_cache(self.model)
+        return {
+            "backend": getattr(self.model, "name", "eager"),
+            "scheduler": self._scheduler.stats(),
+            "embedding_cache": self._analyzer.get_embedding_cache().stats(),
+            "encoder": self._analyzer.get_encoder_stats().stats(),
+            "decode": self._analyzer.get_decode_stats().stats(),
+            "verdict_cache": self._analyzer.get_verdict_cache().stats(),
+            "prompt_cache": prompt_cache.stats() if prompt_cache else None,
+            "sessions": self._analyzer.get_session_store().stats(),
+            "frames": len(self._frames),
+        }
+
+    @staticmethod
+    def _read_frame(header: dict, buffers: dict) -> Frame:
+        name = header["shm"]
+        if name not in buffers:
+            for old in buffers.values():
+                old.close()
+            buffers.clear()
+            buffers[name] = _attach(name)
+        data = bytes(buffers[name].buf[:header["size"]])
+        return Frame(data, camera_id=header.get("camera_id"), location=header.get("location"),
+                     source=header.get("source", ""), captured_at=header.get("captured_at"),
+                     metadata=header.get("metadata"))
+
+    def _dispatch(self, method: str, args: dict, buffers: dict):
+        if method == "ping":
+            return "pong"
+        if method == "stats":
+            return self.stats()
+        if method == "encode":
+            return self.encode(self._read_frame(args["frame"], buffers))
+        if method == "answer":
+            return self.answer(args["handle"], args["question"])
+        if method == "analyze":
+            return self.analyze(self._read_frame(args["frame"], buffers), args.get("question"), args.get("session_id"))
+        if method == "follow_up":
+            return self.follow_up(args["session_id"], args["question"])
+        raise ValueError(f"Unknown method '{method}'")
+
+    def _serve_connection(self, conn):
+        buffers = {}
+        try:
+            while True:
+                try:
+                    method, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if method in ("analyze_stream", "follow_up_stream"):
+                        if method == "analyze_stream":
+                            stream = self.analyze_stream(self._read_frame(args["frame"], buffers), args.get("session_id"))
+                        else:
+                            stream = self.follow_up_stream(args["session_id"], args["question"])
+                        for text in stream:
+                            conn.send(("chunk", text))
+                        conn.send(("ok", None))
+                        continue
+                    conn.send(("ok", self._dispatch(method, args, buffers)))
+                except Exception as e:
+                    logging.error(f"Model server request '{method}' failed: {e}")
+                    conn.send(("error", f"{type(e).__name__}: {e}"))
+        finally:
+            for shm in buffers.values():
+                shm.close()
+            conn.close()
+
+    def serve_forever(self):
+        if self.family == "AF_UNIX" and os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = Listener(self.address, family=self.family, authkey=self.authkey)
+        logging.info(f"Model server listening on {self.address}")
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._closed:
+                    return
+                raise
+            except Exception as e:
+                logging.warning(f"Rejected model server connection: {e}")
+                continue
+            threading.Thread(target=self._serve_connection, args=(conn,), name="model-server-conn", daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        if self._listener is not None:
+            self._listener.close()
+        self._scheduler.close()
+
+
+class _ClientConnection:
+    def __init__(self, address, family, authkey):
+        self.conn = Client(address, family=family, authkey=authkey)
+        self.shm = None
+
+    def frame_header(self, frame: Frame) -> dict:
+        size = len(frame.data)
+        if self.shm is None or self.shm.size < size:
+            self.release_buffer()
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, MIN_SHARED_BUFFER_BYTES))
+            _owned_buffers.add(self.shm.name)
+        self.shm.buf[:size] = frame.data
+        return {"shm": self.shm.name, "size": size, "camera_id": frame.camera_id, "location": frame.location,
+                "source": frame.source, "captured_at": frame.captured_at, "metadata": frame.metadata}
+
+    def release_buffer(self):
+        if self.shm is not None:
+            _owned_buffers.discard(self.shm.name)
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def close(self):
+        self.conn.close()
+        self.release_buffer()
+
+
+class ModelClient:
+    """
+    Thin client for a ModelServer. Safe to share between threads: each call
+    checks out its own connection and shared-memory buffer, so concurrent
+    sessions reach the server's batcher together instead of queueing behind
+    one socket. Idle connections are kept for reuse.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, authkey: bytes | None = None):
+        self.address, self.family = parse_address(address)
+        self.authkey = authkey
+        self._idle = deque()
+        self._lock = threading.Lock()
+
+    def _checkout(self) -> _ClientConnection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        if self.authkey is None:
+            self.authkey = client_authkey()
+        return _ClientConnection(self.address, self.family, self.authkey)
+
+    def _checkin(self, connection: _ClientConnection):
+        with self._lock:
+            self._idle.append(connection)
+
+    def _call(self, method: str, frame: Frame | None = None, **args):
+        for attempt in range(2):
+            connection = self._checkout()
+            try:
+                if frame is not None:
+                    args["frame"] = connection.frame_header(frame)
+                connection.conn.send((method, args))
+            except (EOFError, OSError):
+                # The server restarted or the socket broke before the request went out; reconnect once.
+                connection.close()
+                if attempt:
+                    raise
+                continue
+            except BaseException:
+                connection.close()
+                raise
+            try:
+                status, result = connection.conn.recv()
+            except BaseException:
+                # The request may already have run, so it is not sent again, and a
+                # connection with an unread reply must not be reused.
+                connection.close()
+                raise
+            self._checkin(connection)
+            break
+        if status != "ok":
+            raise ModelServerError(result)
+        return result
+
+    def ping(self) -> bool:
+        try:
+            return self._call("ping") == "pong"
+        except Exception as e:
+            logging.error(f"Model server at {self.address} is not reachable: {e}")
+            return False
+
+    def encode(self, frame: Frame) -> int:
+        """Encodes a frame on the server; returns a handle to pass to answer()."""
+        return self._call("encode", frame=frame)
+
+    def answer(self, handle: int, question: str) -> str:
+        return self._call("answer", handle=handle, question=question)
+
+    def analyze(self, frame: Frame, question: str | None = None, session_id: str | None = None) -> AnalysisResult:
+        """
+        Runs the street-crossing analysis on the server.
+
+        Args:
+            frame: The captured frame.
+            question: A question other than the analysis prompt, if any.
+            session_id: If given, the server (re)starts this user's follow-up session on the frame.
+
+        Returns:
+            The analysis with its verdict, or the "unable to determine" verdict if the request failed.
+        """
+        try:
+            return self._call("analyze", frame=frame, question=question, session_id=session_id)
+        except Exception as e:
+            logging.error(f"Remote image analysis failed: {e}")
+            return AnalysisResult.unknown()
+
+    def analyze_stream(self, frame: Frame, session_id: str | None = None):
+        """
+        Runs the street-crossing analysis on the server, yielding text as it is generated.
+
+        Yields:
+            Chunks of the analysis; the "unable to determine" verdict if the request failed before any text.
+        """
+        return self._stream("analyze_stream", frame, session_id=session_id)
+
+    def follow_up(self, session_id: str, question: str) -> AnalysisResult | None:
+        """
+        Answers a follow-up question from the frame kept in the user's session on the server.
+
+        Returns:
+            The answer, None if the session has expired, or the "unable to determine" verdict if the request failed.
+        """
+        try:
+            return self._call("follow_up", session_id=session_id, question=question)
+        except Exception as e:
+            logging.error(f"Remote follow-up question failed: {e}")
+            return AnalysisResult.unknown()
+
+    def follow_up_stream(self, session_id: str, question: str):
+        """
+        Answers a follow-up question on the server, yielding text as it is generated.
+
+        Yields:
+            Chunks of the answer; SESSION_EXPIRED if the session has expired.
+        """
+        return self._stream("follow_up_stream", session_id=session_id, question=question)
+
+    def _stream(self, method: str, frame: Frame | None = None, **args):
+        streamed = False
+        connection = None
+        finished = False
+        try:
+            connection = self._checkout()
+            if frame is not None:
+                args["frame"] = connection.frame_header(frame)
+            connection.conn.send((method, args))
+            while True:
+                status, result = connection.conn.recv()
+                if status == "chunk":
+                    streamed = True
+                    yield result
+                    continue
+                finished = True
+                if status != "ok":
+                    raise ModelServerError(result)
+                break
+        except Exception as e:
+            logging.error(f"Remote streamed request '{method}' failed: {e}")
+            yield f" {INCOMPLETE_ANALYSIS}" if streamed else Verdict.UNKNOWN.sentence
+        finally:
+            if connection is not None:
+                # A stream abandoned midway leaves unread messages on the connection; don't reuse it.
+                if finished:
+                    self._checkin(connection)
+                else:
+                    connection.close()
+
+    def stats(self) -> dict:
+        return self._call("stats")
+
+    def close(self):
+        with self._lock:
+            connections = list(self._idle)
+            self._idle.clear()
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Moondream2 to CV4VI front ends.")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="Unix socket path or host:port")
+    parser.add_argument("--precision", default=None, help="fp32, bf16 or int8 (default: CV4VI_MODEL_PRECISION)")
+    parser.add_argument("--prompt-cache", default=None, help="off, tokens or prefix (default: CV4VI_PROMPT_CACHE)")
+    parser.add_argument("--backend", default=None, help="eager, compile or onnx (default: CV4VI_MODEL_BACKEND)")
+    args = parser.parse_args()
+
+    from moondream_analyzer import load_model, warm_up
+    model, tokenizer = load_model(args.precision, args.prompt_cache, args.backend)
+    if model is None:
+        raise SystemExit("Failed to load the Moondream model.")
+    warm_up(model)
+    server = ModelServer(model, tokenizer, address=args.address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,113 @@
 import os
+import threading
+import time
 import torch
 import logging
+from concurrent.futures import Future
+from typing import Iterator
 from PIL import Image
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+from frame import Frame
+from embedding_cache import EmbeddingCache, frame_digest
+from fake_vlm import load_fake_model
+from inference_backends import MODEL_BACKEND, create_backend
+from inference_scheduler import InferenceScheduler
+from prompt_cache import PROMPT_CACHE_MODES, PromptCache
+from analysis_session import SESSION_EXPIRED, AnalysisSession, SessionStore
+from camera_regions import CameraRegionRegistry, crop_region
+from signal_classifier import DONT_WALK, WALK, SignalReading, classify_signal
+from verdict import INCOMPLETE_ANALYSIS, AnalysisResult, Verdict, find_verdict, truncate_after_verdict
+from verdict_cache import VerdictCache, scene_thumbnail
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def load_model():
-    """Load the Moondream2 model and tokenizer."""
+_embedding_cache = EmbeddingCache(
+    max_bytes=int(os.environ.get("CV4VI_EMBEDDING_CACHE_BYTES", str(256 * 1024 * 1024))),
+)
+
+UNABLE_TO_DETERMINE = Verdict.UNKNOWN.sentence
+ANALYSIS_QUESTION = "You are a helpful assistant for a visually impaired person. Analyze this traffic camera image. Describe the pedestrian signal status (e.g., 'Walk' sign, 'Don't Walk' sign, countdown timer). Are there any cars, bicycles, or other vehicles currently moving through or about to enter the crosswalk area? Based ONLY on the visual information, conclude with a direct, one-sentence recommendation: 'It appears safe to cross the street now.' or 'It does not appear safe to cross the street now.' or 'Unable to determine safety from this image.'"
+
+_schedulers = {}
+
+# A camera's last verdict is reused for later frames whose most changed tile differs from its frame
+# by at most CV4VI_VERDICT_REUSE_DELTA grey levels on average, until it is CV4VI_VERDICT_MAX_AGE seconds old (0 disables).
+_verdict_cache = VerdictCache(
+    max_delta=float(os.environ.get("CV4VI_VERDICT_REUSE_DELTA", "2.0")),
+    max_age_seconds=float(os.environ.get("CV4VI_VERDICT_MAX_AGE", "6")),
+)
+# The signal head covers few pixels, so it is compared on its own small thumbnail as well.
+SIGNAL_THUMBNAIL_SIZE = 8
+
+# Follow-up questions are answered from the user's last analyzed frame, without recapturing or
+# re-encoding it, until the session has been idle for CV4VI_SESSION_TTL seconds. Sessions beyond
+# CV4VI_SESSION_BYTES of frames and embeddings are evicted, least recently used first.
+_sessions = SessionStore(
+    ttl_seconds=float(os.environ.get("CV4VI_SESSION_TTL", "120")),
+    max_bytes=int(os.environ.get("CV4VI_SESSION_BYTES", str(128 * 1024 * 1024))),
+    max_turns=int(os.environ.get("CV4VI_SESSION_MAX_TURNS", "4")),
+)
+
+_camera_regions = CameraRegionRegistry.load()
+SIGNAL_CONFIDENCE = float(os.environ.get("CV4VI_SIGNAL_CONFIDENCE", "0.85"))
+# Signal states answered without the VLM. A white "Walk" figure alone does not rule
+# out turning vehicles, so by default only the "Don't Walk" hand short-circuits.
+SIGNAL_FAST_PATH_STATES = {s.strip() for s in os.environ.get("CV4VI_SIGNAL_FAST_PATH", DONT_WALK).split(",") if s.strip()}
+SIGNAL_ANSWERS = {
+    DONT_WALK: "The pedestrian signal shows the orange 'Don't Walk' hand. It does not appear safe to cross the street now.",
+    WALK: "The pedestrian signal shows the white 'Walk' figure. It appears safe to cross the street now.",
+}
+
+# Generation stops after this many new tokens, or as soon as the analysis has given its verdict.
+MAX_NEW_TOKENS = int(os.environ.get("CV4VI_MAX_NEW_TOKENS", "128"))
+STOP_AT_VERDICT = os.environ.get("CV4VI_STOP_AT_VERDICT", "1") != "0"
+# Every verdict sentence fits in this many trailing tokens.
+VERDICT_WINDOW_TOKENS = 32
+
+# Longest pause between streamed tokens before the stream is abandoned.
+STREAM_TIMEOUT_SECONDS = float(os.environ.get("CV4VI_STREAM_TIMEOUT", "60"))
+
+# Moondream2's vision encoder works on 378x378 inputs; crosswalk crops are resized to it.
+ENCODER_INPUT_SIZE = int(os.environ.get("CV4VI_ENCODER_INPUT_SIZE", "378"))
+
+PRECISIONS = ("fp32", "bf16", "int8")
+MODEL_PRECISION = os.environ.get("CV4VI_MODEL_PRECISION", "fp32")
+
+# How much of the constant analysis prompt is prepared at load: "off", "tokens" or "prefix" (see PromptCache).
+PROMPT_CACHE = os.environ.get("CV4VI_PROMPT_CACHE", "off")
+_prompt_caches = {}
+
+def load_model(precision: str | None = None, prompt_cache: str | None = None, backend: str | None = None):
+    """
+    Load the Moondream2 model and tokenizer.
+
+    Args:
+        precision: "fp32" (default), "bf16" to load the weights in bfloat16, or
+            "int8" to load in fp32 and dynamically quantize every nn.Linear to
+            int8 (weights quantized once, activations per call). Defaults to
+            CV4VI_MODEL_PRECISION.
+        prompt_cache: "off", "tokens" or "prefix"; how much of the analysis
+            prompt to prepare once at load (see build_prompt_cache). Defaults
+            to CV4VI_PROMPT_CACHE.
+        backend: "eager", "compile" or "onnx"; how the model runs (see
+            inference_backends). "fake" skips the weights entirely and
+            returns the deterministic FakeMoondream (see fake_vlm), for
+            load-testing the rest of the pipeline. Defaults to
+            CV4VI_MODEL_BACKEND.
+
+    Returns:
+        (model, tokenizer), or (None, None) if loading failed. The model is
+        wrapped in its inference backend.
+    """
+    precision = precision or MODEL_PRECISION
+    backend = backend or MODEL_BACKEND
+    if backend == "fake":
+        model, tokenizer = load_fake_model()
+        return create_backend(model, tokenizer, backend), tokenizer
     try:
-        logging.info("Loading Moondream2 model and tokenizer...")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown model precision '{precision}', expected one of {PRECISIONS}")
+        logging.info(f"Loading Moondream2 model and tokenizer ({precision})...")
         moondream_path = '/python_code_src/moondream2'
         
         if not os.path.isdir(moondream_path):
@@ -20,51 +118,723 @@ def load_model():
             moondream_path,
             trust_remote_code=True,
             local_files_only=True,
-            torch_dtype=torch.float32,
+            torch_dtype=torch.bfloat16 if precision == "bf16" else torch.float32,
             device_map="cpu",
         )
+        if precision == "int8":
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.eval()
         tokenizer = AutoTokenizer.from_pretrained(
             moondream_path,
             trust_remote_code=True,
             local_files_only=True
         )
         logging.info("Moondream2 model and tokenizer loaded successfully.")
+        model = create_backend(model, tokenizer, backend)
+        build_prompt_cache(model, tokenizer, prompt_cache)
         return model, tokenizer
     except Exception as e:
         logging.error(f"Failed to load Moondream2 model: {e}")
         return None, None
 
-def get_moondream_analysis(model, tokenizer, image_path: str) -> str:
+def warm_up(model) -> float | None:
     """
-    Analyzes a traffic camera image using the Moondream2 model with a specific prompt.
+    Runs the vision encoder once on a blank frame, so the first real request
+    does not pay for lazy initialization (allocator growth, kernel selection).
+
+    Returns:
+        The warm-up time in seconds, or None if it failed.
+    """
+    try:
+        start = time.perf_counter()
+        model.encode_image(Image.new("RGB", (ENCODER_INPUT_SIZE, ENCODER_INPUT_SIZE)))
+        seconds = time.perf_counter() - start
+        logging.info(f"Vision encoder warmed up in {seconds:.2f}s")
+        return seconds
+    except Exception as e:
+        logging.warning(f"Vision encoder warm-up failed: {e}")
+        return None
+
+def build_prompt_cache(model, tokenizer, mode: str | None = None) -> PromptCache | None:
+    """
+    Prepares the analysis prompt for a model once, so requests skip re-tokenizing
+    it and, in "prefix" mode, re-prefilling it.
 
     Args:
         model: The loaded Moondream2 model.
         tokenizer: The loaded Moondream2 tokenizer.
-        image_path: The path to the image file.
+        mode: "off", "tokens" or "prefix". Defaults to CV4VI_PROMPT_CACHE.
 
     Returns:
-        The textual analysis of the image.
+        The cache, or None if it is off or could not be built (answers then go
+        through answer_question as usual).
     """
+    mode = mode or PROMPT_CACHE
+    _prompt_caches.pop(id(model), None)
+    if mode == "off":
+        return None
     try:
-        logging.info(f"Analyzing image at: {image_path}")
-        if not os.path.exists(image_path):
-            logging.error(f"Image file not found at: {image_path}")
-            return "Unable to determine safety from this image."
+        if mode not in PROMPT_CACHE_MODES:
+            raise ValueError(f"Unknown prompt cache mode '{mode}', expected one of {PROMPT_CACHE_MODES}")
+        _prompt_caches[id(model)] = PromptCache(model, tokenizer, ANALYSIS_QUESTION, mode)
+        return _prompt_caches[id(model)]
+    except Exception as e:
+        logging.error(f"Failed to build the prompt cache, answering without it: {e}")
+        return None
 
-        image = Image.open(image_path).convert('RGB')
-        enc_image = model.encode_image(image)
-        
-        question = "You are a helpful assistant for a visually impaired person. Analyze this traffic camera image. Describe the pedestrian signal status (e.g., 'Walk' sign, 'Don't Walk' sign, countdown timer). Are there any cars, bicycles, or other vehicles currently moving through or about to enter the crosswalk area? Based ONLY on the visual information, conclude with a direct, one-sentence recommendation: 'It appears safe to cross the street now.' or 'It does not appear safe to cross the street now.' or 'Unable to determine safety from this image.'"
+def get_prompt_cache(model) -> PromptCache | None:
+    """Returns the analysis prompt cache built for a model, if any."""
+    return _prompt_caches.get(id(model))
+
+def _to_rgb_image(image) -> Image.Image | None:
+    """Returns an RGB PIL image for a Frame, a PIL image, or a path to an image file."""
+    if isinstance(image, Frame):
+        return image.image
+    if isinstance(image, Image.Image):
+        return image if image.mode == 'RGB' else image.convert('RGB')
+    if not os.path.exists(image):
+        logging.error(f"Image file not found at: {image}")
+        return None
+    return Image.open(image).convert('RGB')
+
+def _crosswalk_crop(image, rgb_image: Image.Image) -> Image.Image | None:
+    """The frame cropped to its camera's crosswalk region at the encoder's resolution, if one is configured."""
+    if not isinstance(image, Frame) or image.metadata.get("full_page"):
+        return None
+    regions = _camera_regions.get(image.camera_id)
+    if regions is None or regions.crosswalk is None:
+        return None
+    return crop_region(rgb_image, regions.crosswalk, ENCODER_INPUT_SIZE)
+
+def _encoder_input(image, crop: bool = True) -> tuple:
+    """
+    Returns (encoder input, cropped): the crosswalk crop for cameras with a
+    configured region (unless crop is False), otherwise the full RGB frame.
+    (None, False) if the image could not be loaded.
+    """
+    rgb_image = _to_rgb_image(image)
+    if rgb_image is None:
+        return None, False
+    cropped = _crosswalk_crop(image, rgb_image) if crop else None
+    return (cropped, True) if cropped is not None else (rgb_image, False)
+
+class EncoderStats:
+    """
+    Vision-encoder timings for full frames and crosswalk crops. The time saved
+    is estimated from the mean full-frame encode time, so it is only reported
+    once both kinds of input have been encoded.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = {"full": 0, "crop": 0}
+        self.seconds = {"full": 0.0, "crop": 0.0}
+
+    def record(self, cropped: bool, seconds: float):
+        kind = "crop" if cropped else "full"
+        with self._lock:
+            self.calls[kind] += 1
+            self.seconds[kind] += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            mean = {k: self.seconds[k] / self.calls[k] if self.calls[k] else None for k in self.calls}
+            saved = None
+            if mean["full"] is not None and mean["crop"] is not None:
+                saved = self.calls["crop"] * (mean["full"] - mean["crop"])
+            return {
+                "full_frame_encodes": self.calls["full"],
+                "crop_encodes": self.calls["crop"],
+                "mean_full_frame_seconds": mean["full"],
+                "mean_crop_seconds": mean["crop"],
+                "seconds_saved_estimate": saved,
+            }
+
+_encoder_stats = EncoderStats()
+
+def get_encoder_stats() -> EncoderStats:
+    """Returns the process-wide vision-encoder timings."""
+    return _encoder_stats
+
+class DecodeStats:
+    """Tokens decoded per generated answer, to track decode cost."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.answers = 0
+        self.tokens = 0
+        self.max_tokens = 0
+
+    def record(self, tokens: int):
+        with self._lock:
+            self.answers += 1
+            self.tokens += tokens
+            self.max_tokens = max(self.max_tokens, tokens)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "answers": self.answers,
+                "tokens": self.tokens,
+                "mean_tokens": self.tokens / self.answers if self.answers else 0.0,
+                "max_tokens": self.max_tokens,
+            }
+
+_decode_stats = DecodeStats()
+
+def get_decode_stats() -> DecodeStats:
+    """Returns the process-wide decode token counts."""
+    return _decode_stats
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Returns the process-wide image-embedding cache."""
+    return _embedding_cache
+
+def _frame_hash(image, rgb_image: Image.Image, cropped: bool = False) -> int:
+    """
+    Exact digest of a frame's encoder input (its crosswalk crop or the full
+    frame), memoized on Frame objects so each is computed once per capture.
+    """
+    if isinstance(image, Frame):
+        key = "crop_digest" if cropped else "digest"
+        if key not in image.metadata:
+            image.metadata[key] = frame_digest(rgb_image)
+        return image.metadata[key]
+    return frame_digest(rgb_image)
+
+def encode_image_cached(model, image, crop: bool = True):
+    """
+    Runs the vision encoder on an image, reusing the cached embedding when the
+    identical encoder input was encoded before.
+    Frames from cameras with a crosswalk region are cropped to it first.
+
+    Args:
+        model: The loaded Moondream2 model.
+        image: A captured Frame, a PIL image, or the path to an image file.
+        crop: False to encode the full frame even if a crosswalk region is configured.
+
+    Returns:
+        The image embedding, or None if the image could not be loaded.
+    """
+    rgb_image, cropped = _encoder_input(image, crop)
+    if rgb_image is None:
+        return None
+    frame_hash = _frame_hash(image, rgb_image, cropped)
+    enc_image = _embedding_cache.get(id(model), frame_hash)
+    if enc_image is not None:
+        logging.info(f"Reusing cached image embedding for frame digest {frame_hash:x}")
+        return enc_image
+    start = time.perf_counter()
+    enc_image = model.encode_image(rgb_image)
+    _encoder_stats.record(cropped, time.perf_counter() - start)
+    _embedding_cache.put(id(model), frame_hash, enc_image)
+    return enc_image
+
+def get_camera_regions() -> CameraRegionRegistry:
+    """Returns the per-camera region registry (CV4VI_CAMERA_REGIONS)."""
+    return _camera_regions
+
+def read_signal(image) -> SignalReading | None:
+    """
+    Classifies the pedestrian signal in a frame's configured signal-head region.
+
+    Returns:
+        The reading, or None if the image is not a camera frame with a configured
+        signal-head region (or is a full-page fallback screenshot).
+    """
+    if not isinstance(image, Frame) or image.metadata.get("full_page"):
+        return None
+    regions = _camera_regions.get(image.camera_id)
+    if regions is None or regions.signal_head is None:
+        return None
+    if "signal" not in image.metadata:
+        height, width = image.array.shape[:2]
+        left, top, right, bottom = regions.signal_head.box(width, height)
+        image.metadata["signal"] = classify_signal(image.array[top:bottom, left:right])
+    return image.metadata["signal"]
+
+def get_verdict_cache() -> VerdictCache:
+    """Returns the process-wide per-camera verdict cache."""
+    return _verdict_cache
+
+def _scene_thumbnails(frame: Frame) -> tuple:
+    """
+    Grayscale thumbnails of the whole frame and, for cameras with configured
+    regions, of the crosswalk (in more detail than the whole-frame thumbnail
+    gives it) and of the signal head; memoized on the frame.
+    """
+    if "scene" not in frame.metadata:
+        gray = frame.image.convert("L")
+        thumbnails = [scene_thumbnail(gray)]
+        regions = _camera_regions.get(frame.camera_id)
+        if regions is not None and regions.crosswalk is not None:
+            thumbnails.append(scene_thumbnail(gray.crop(regions.crosswalk.box(*gray.size))))
+        if regions is not None and regions.signal_head is not None:
+            signal_head = gray.crop(regions.signal_head.box(*gray.size))
+            thumbnails.append(scene_thumbnail(signal_head, SIGNAL_THUMBNAIL_SIZE))
+        frame.metadata["scene"] = tuple(thumbnails)
+    return frame.metadata["scene"]
+
+def _reusable(image) -> bool:
+    return (_verdict_cache.enabled and isinstance(image, Frame) and image.camera_id is not None
+            and not image.metadata.get("full_page"))
+
+def reuse_analysis(image) -> AnalysisResult | None:
+    """
+    The camera's last verdict if this frame shows the same scene and the verdict
+    is recent enough.
+
+    Returns:
+        The earlier result with reused=True, or None if the frame must be analyzed.
+    """
+    if not _reusable(image):
+        return None
+    try:
+        return _verdict_cache.lookup(image.camera_id, _scene_thumbnails(image))
+    except Exception as e:
+        logging.warning(f"Frame comparison failed, analyzing the frame: {e}")
+        return None
+
+def remember_analysis(image, result: AnalysisResult):
+    """Keeps a freshly computed verdict for reuse on the camera's next frames."""
+    if not _reusable(image) or result.reused:
+        return
+    try:
+        _verdict_cache.store(image.camera_id, _scene_thumbnails(image), result, image.captured_at)
+    except Exception as e:
+        logging.warning(f"Failed to remember the verdict for camera {image.camera_id}: {e}")
+
+def fast_signal_analysis(image) -> str | None:
+    """
+    Answers from the pedestrian signal alone when the classifier is confident.
+
+    Returns:
+        The analysis text, or None if the VLM should be asked instead.
+    """
+    try:
+        reading = read_signal(image)
+    except Exception as e:
+        logging.warning(f"Signal classification failed, falling back to Moondream2: {e}")
+        return None
+    if reading is None:
+        return None
+    logging.info(f"Signal reading for {image.camera_id}: {reading.state} ({reading.confidence:.2f})")
+    if reading.state in SIGNAL_FAST_PATH_STATES and reading.confidence >= SIGNAL_CONFIDENCE:
+        return SIGNAL_ANSWERS[reading.state]
+    return None
+
+class VerdictStoppingCriteria(StoppingCriteria):
+    """
+    Stops generation once every sequence in the batch has produced a canonical
+    verdict sentence, an end-of-sequence token, or max_new_tokens tokens, and
+    records how many tokens each sequence decoded.
+    """
+
+    def __init__(self, tokenizer, max_new_tokens: int = MAX_NEW_TOKENS, stop_at_verdict: list | None = None):
+        self.tokenizer = tokenizer
+        self.max_new_tokens = max_new_tokens
+        self.stop_at_verdict = stop_at_verdict
+        self.tokens_generated = []
+        self._done = []
+        self._prompt_length = None
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        rows, length = input_ids.shape[0], input_ids.shape[1]
+        if self._prompt_length is None:
+            # First call comes right after the first new token.
+            self._prompt_length = length - 1
+            self.tokens_generated = [0] * rows
+            self._done = [False] * rows
+        generated = length - self._prompt_length
+        eos_token_id = getattr(self.tokenizer, "eos_token_id", None)
+        for row in range(rows):
+            if self._done[row]:
+                continue
+            self.tokens_generated[row] = generated
+            if generated >= self.max_new_tokens or (eos_token_id is not None and int(input_ids[row, -1]) == eos_token_id):
+                self._done[row] = True
+            elif self.stop_at_verdict is None or self.stop_at_verdict[row]:
+                # Only new tokens: a prompt passed as ids may itself quote the verdict sentences.
+                new_tokens = input_ids[row, self._prompt_length:]
+                tail = self.tokenizer.decode(new_tokens[-VERDICT_WINDOW_TOKENS:], skip_special_tokens=True)
+                self._done[row] = find_verdict(tail) is not None
+        return all(self._done)
+
+def _bounded(tokenizer, questions: list) -> tuple:
+    """Generation kwargs that cap the decode and stop at the verdict of analysis prompts."""
+    criteria = VerdictStoppingCriteria(
+        tokenizer, MAX_NEW_TOKENS, stop_at_verdict=[STOP_AT_VERDICT and q == ANALYSIS_QUESTION for q in questions])
+    return criteria, {"stopping_criteria": StoppingCriteriaList([criteria])}
 
-        logging.info("Generating analysis with Moondream2...")
-        analysis = model.answer_question(
-            enc_image,
-            question,
-            tokenizer
+def _result(answer: str, question: str, tokens_generated: int) -> AnalysisResult:
+    if question == ANALYSIS_QUESTION:
+        answer = truncate_after_verdict(answer)
+    _decode_stats.record(tokens_generated)
+    return AnalysisResult.from_text(answer, tokens_generated=tokens_generated)
+
+def _answer_one(model, tokenizer, enc_image, question: str, generate_kwargs: dict | None = None) -> AnalysisResult:
+    prompt_cache = _prompt_caches.get(id(model)) if question == ANALYSIS_QUESTION else None
+    criteria, kwargs = _bounded(tokenizer, [question])
+    if prompt_cache is not None:
+        try:
+            answer = prompt_cache.answer(enc_image, **kwargs, **(generate_kwargs or {}))
+            tokens = criteria.tokens_generated[0] if criteria.tokens_generated else 0
+            return _result(answer, question, tokens)
+        except Exception as e:
+            logging.error(f"Prompt cache failed, answering without it from now on: {e}")
+            _prompt_caches.pop(id(model), None)
+            criteria, kwargs = _bounded(tokenizer, [question])
+    answer = model.answer_question(enc_image, question, tokenizer, **kwargs, **(generate_kwargs or {}))
+    tokens = criteria.tokens_generated[0] if criteria.tokens_generated else 0
+    return _result(answer, question, tokens)
+
+def answer_questions_batch(model, tokenizer, requests: list) -> list:
+    """
+    Answers a batch of (image, question) requests with as few model calls as possible.
+
+    Frames whose embedding is cached only need decoding. The rest go through
+    the model's batch_answer (one batched vision-encoder pass and one padded
+    decode) when the model provides it, and one at a time otherwise. Requests
+    that carry generation kwargs (e.g. a streamer) are always answered alone.
+    Answers decoded one at a time use the model's prompt cache, if built. With
+    a "prefix" cache batch_answer is skipped, since it would lay the prompt out
+    image-first and the answers would depend on whether a request was batched.
+    Every decode is capped at MAX_NEW_TOKENS and, for the analysis prompt,
+    stops at the verdict sentence.
+
+    Args:
+        model: The loaded Moondream2 model.
+        tokenizer: The loaded Moondream2 tokenizer.
+        requests: (image, question) or (image, question, generate_kwargs) tuples;
+            images may be Frames, PIL images or paths. A follow-up passes its
+            AnalysisSession as the image, with generate_kwargs, and is answered
+            from the session's embedding.
+
+    Returns:
+        One AnalysisResult per request; the "unable to determine" verdict where
+        an image could not be loaded.
+    """
+    results = [AnalysisResult.unknown()] * len(requests)
+    misses = []
+    for i, (image, question, *generate_kwargs) in enumerate(requests):
+        if generate_kwargs:
+            enc_image = _session_embedding(model, image) if isinstance(image, AnalysisSession) else encode_image_cached(model, image)
+            if enc_image is not None:
+                results[i] = _answer_one(model, tokenizer, enc_image, question, generate_kwargs[0])
+            continue
+        rgb_image, cropped = _encoder_input(image)
+        if rgb_image is None:
+            continue
+        enc_image = _embedding_cache.get(id(model), _frame_hash(image, rgb_image, cropped))
+        if enc_image is not None:
+            results[i] = _answer_one(model, tokenizer, enc_image, question)
+        else:
+            misses.append((i, image, rgb_image, question))
+
+    prompt_cache = _prompt_caches.get(id(model))
+    prefix_layout = prompt_cache is not None and prompt_cache.mode == "prefix"
+    if len(misses) > 1 and hasattr(model, "batch_answer") and not prefix_layout:
+        logging.info(f"Answering {len(misses)} uncached frames in one batch")
+        questions = [question for _, _, _, question in misses]
+        criteria, kwargs = _bounded(tokenizer, questions)
+        batch = model.batch_answer(
+            images=[rgb_image for _, _, rgb_image, _ in misses],
+            prompts=questions,
+            tokenizer=tokenizer,
+            **kwargs,
         )
-        logging.info(f"Moondream2 analysis generated: {analysis}")
-        return analysis
+        for row, ((i, _, _, question), answer) in enumerate(zip(misses, batch)):
+            tokens = criteria.tokens_generated[row] if row < len(criteria.tokens_generated) else 0
+            results[i] = _result(answer, question, tokens)
+    else:
+        for i, image, _, question in misses:
+            results[i] = _answer_one(model, tokenizer, encode_image_cached(model, image), question)
+    return results
+
+def get_inference_scheduler(model, tokenizer) -> InferenceScheduler:
+    """
+    Returns the shared micro-batching scheduler for a model, creating it on first use.
+
+    CV4VI_MAX_BATCH_SIZE and CV4VI_MAX_BATCH_WAIT_MS bound how many requests are
+    coalesced and how long the first one waits for company.
+    """
+    scheduler = _schedulers.get(id(model))
+    if scheduler is None:
+        scheduler = InferenceScheduler(
+            lambda requests: answer_questions_batch(model, tokenizer, requests),
+            max_batch_size=int(os.environ.get("CV4VI_MAX_BATCH_SIZE", "4")),
+            max_wait_seconds=float(os.environ.get("CV4VI_MAX_BATCH_WAIT_MS", "25")) / 1000,
+            name="moondream-scheduler",
+        )
+        _schedulers[id(model)] = scheduler
+    return scheduler
+
+def analyze_image(model, tokenizer, image, scheduler: InferenceScheduler | None = None,
+                  session_id: str | None = None) -> AnalysisResult:
+    """
+    Analyzes a traffic camera image using the Moondream2 model with a specific prompt.
+
+    Args:
+        model: The loaded Moondream2 model.
+        tokenizer: The loaded Moondream2 tokenizer.
+        image: A captured Frame, a PIL image, or the path to an image file.
+        scheduler: If given, the request is queued on this scheduler and batched
+            with concurrent requests instead of calling the model directly.
+        session_id: If given, the user's follow-up session is (re)started on
+            this frame (see start_session).
+
+    Returns:
+        The analysis text with its parsed verdict, the number of tokens decoded,
+        and whether it was reused from the camera's previous, unchanged frame.
+    """
+    result = _analyze_image(model, tokenizer, image, scheduler)
+    if session_id is not None:
+        start_session(model, session_id, image, result.text)
+    return result
+
+def _analyze_image(model, tokenizer, image, scheduler: InferenceScheduler | None = None) -> AnalysisResult:
+    try:
+        logging.info(f"Analyzing image: {image!r}")
+        result = reuse_analysis(image)
+        if result is not None:
+            return result
+        analysis = fast_signal_analysis(image)
+        if analysis is not None:
+            logging.info(f"Answered from the pedestrian signal without Moondream2: {analysis}")
+            result = AnalysisResult.from_text(analysis)
+        else:
+            logging.info("Generating analysis with Moondream2...")
+            if scheduler is not None:
+                result = scheduler.run((image, ANALYSIS_QUESTION))
+            else:
+                result = answer_questions_batch(model, tokenizer, [(image, ANALYSIS_QUESTION)])[0]
+            logging.info(f"Moondream2 analysis generated ({result.tokens_generated} tokens, {result.verdict.name}): {result.text}")
+        remember_analysis(image, result)
+        return result
     except Exception as e:
         logging.error(f"An error occurred during image analysis: {e}")
-        return "Unable to determine safety from this image."
+        return AnalysisResult.unknown()
+
+def get_moondream_analysis(model, tokenizer, image, scheduler: InferenceScheduler | None = None) -> str:
+    """
+    Analyzes a traffic camera image using the Moondream2 model with a specific prompt.
+
+    Args:
+        model: The loaded Moondream2 model.
+        tokenizer: The loaded Moondream2 tokenizer.
+        image: A captured Frame, a PIL image, or the path to an image file.
+        scheduler: If given, the request is queued on this scheduler.
+
+    Returns:
+        The textual analysis of the image.
+    """
+    return analyze_image(model, tokenizer, image, scheduler=scheduler).text
+
+def _answer_in_thread(model, tokenizer, request: tuple) -> Future:
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(answer_questions_batch(model, tokenizer, [request])[0])
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="moondream-stream", daemon=True).start()
+    return future
+
+def _submit_streamed(model, tokenizer, image, question: str, generate_kwargs: dict,
+                     scheduler: InferenceScheduler | None) -> tuple:
+    """Queues a request whose text is streamed; returns (streamer, future of its AnalysisResult)."""
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True,
+                                    timeout=STREAM_TIMEOUT_SECONDS)
+    request = (image, question, {**generate_kwargs, "streamer": streamer})
+    future = scheduler.submit(request) if scheduler is not None else _answer_in_thread(model, tokenizer, request)
+    # Generation ends the streamer itself; this also ends it when generation fails or never starts.
+    future.add_done_callback(lambda _: streamer.end())
+    return streamer, future
+
+def stream_moondream_analysis(model, tokenizer, image, scheduler: InferenceScheduler | None = None,
+                              session_id: str | None = None) -> Iterator[str]:
+    """
+    Analyzes a traffic camera image like analyze_image, yielding the
+    text as it is generated instead of returning it when generation finishes.
+
+    Generation runs on the scheduler's worker (or a helper thread) with a
+    TextIteratorStreamer; this generator only relays its output. Streamed
+    requests are not batched, since batch_answer cannot stream.
+
+    Args:
+        model: The loaded Moondream2 model.
+        tokenizer: The loaded Moondream2 tokenizer.
+        image: A captured Frame, a PIL image, or the path to an image file.
+        scheduler: If given, the request is queued on this scheduler.
+        session_id: If given, the user's follow-up session is (re)started on
+            this frame once the analysis is complete.
+
+    Yields:
+        Chunks of the analysis text; a single fallback verdict on failure, or
+        INCOMPLETE_ANALYSIS if generation fails after some text was yielded.
+    """
+    chunks = []
+    for text in _stream_analysis(model, tokenizer, image, scheduler):
+        chunks.append(text)
+        yield text
+    if session_id is not None:
+        start_session(model, session_id, image, "".join(chunks).strip())
+
+def _stream_analysis(model, tokenizer, image, scheduler: InferenceScheduler | None) -> Iterator[str]:
+    logging.info(f"Streaming analysis of image: {image!r}")
+    reused = reuse_analysis(image)
+    if reused is not None:
+        yield reused.text
+        return
+    analysis = fast_signal_analysis(image)
+    if analysis is not None:
+        remember_analysis(image, AnalysisResult.from_text(analysis))
+        yield analysis
+        return
+
+    streamed = False
+    try:
+        streamer, future = _submit_streamed(model, tokenizer, image, ANALYSIS_QUESTION, {}, scheduler)
+        for text in streamer:
+            if text:
+                streamed = True
+                yield text
+        result = future.result()
+        remember_analysis(image, result)
+        analysis = result.text
+        logging.info(f"Moondream2 analysis streamed ({result.tokens_generated} tokens, {result.verdict.name}): {analysis}")
+    except Exception as e:
+        logging.error(f"An error occurred during streamed image analysis: {e}")
+        # Text already shown or spoken must not stand as a finished answer.
+        yield f" {INCOMPLETE_ANALYSIS}" if streamed else UNABLE_TO_DETERMINE
+        return
+    if not streamed:
+        yield analysis
+
+def get_session_store() -> SessionStore:
+    """Returns the process-wide store of follow-up sessions."""
+    return _sessions
+
+def start_session(model, session_id: str, image, analysis: str) -> AnalysisSession | None:
+    """
+    Starts a user's follow-up session on a frame that has just been analyzed,
+    replacing the user's previous session. Follow-ups are answered from the
+    full frame, not the crosswalk crop the analysis may have used. Its embedding
+    is taken from the embedding cache when the analysis encoded the full frame;
+    otherwise (crosswalk crops, reused verdicts, the signal fast path) the full
+    frame is encoded on the first follow-up.
+
+    Args:
+        model: The loaded Moondream2 model.
+        session_id: The user's session id.
+        image: The analyzed Frame, PIL image or image path.
+        analysis: The analysis text, kept as the first turn of the conversation.
+
+    Returns:
+        The session, or None if the image could not be loaded or the session
+        would not fit in CV4VI_SESSION_BYTES.
+    """
+    try:
+        # Follow-ups may ask about anything in view (e.g. the countdown on a signal head
+        # outside the crosswalk crop), so sessions use the full frame's embedding.
+        rgb_image, _ = _encoder_input(image, crop=False)
+        if rgb_image is None:
+            return None
+        embedding = _embedding_cache.get(id(model), _frame_hash(image, rgb_image))
+        return _sessions.start(session_id, image, ANALYSIS_QUESTION, analysis, embedding)
+    except Exception as e:
+        logging.error(f"Failed to start the follow-up session {session_id}: {e}")
+        return None
+
+def _session_embedding(model, session: AnalysisSession):
+    if session.embedding is None:
+        embedding = encode_image_cached(model, session.frame, crop=False)
+        if embedding is not None:
+            _sessions.set_embedding(session, embedding)
+        return embedding
+    return session.embedding
+
+def follow_up(model, tokenizer, session_id: str, question: str,
+              scheduler: InferenceScheduler | None = None) -> AnalysisResult | None:
+    """
+    Answers a follow-up question about the frame in the user's session, from
+    its cached embedding and with the earlier turns as chat history.
+
+    Args:
+        model: The loaded Moondream2 model.
+        tokenizer: The loaded Moondream2 tokenizer.
+        session_id: The user's session id.
+        question: The follow-up question.
+        scheduler: If given, the request is queued on this scheduler.
+
+    Returns:
+        The answer, or None if the session has expired (the frame must be
+        captured and analyzed again).
+    """
+    session = _sessions.get(session_id)
+    if session is None:
+        return None
+    try:
+        request = (session, question, {"chat_history": session.chat_history()})
+        if scheduler is not None:
+            result = scheduler.run(request)
+        else:
+            result = answer_questions_batch(model, tokenizer, [request])[0]
+        session.add_turn(question, result.text)
+        logging.info(f"Follow-up answered ({result.tokens_generated} tokens): {result.text}")
+        return result
+    except Exception as e:
+        logging.error(f"An error occurred while answering a follow-up question: {e}")
+        return AnalysisResult.unknown()
+
+def stream_follow_up(model, tokenizer, session_id: str, question: str,
+                     scheduler: InferenceScheduler | None = None) -> Iterator[str]:
+    """
+    Answers a follow-up question like follow_up, yielding the text as it is generated.
+
+    Yields:
+        Chunks of the answer; SESSION_EXPIRED if the session has expired, or a
+        single fallback answer on failure (INCOMPLETE_ANALYSIS if it breaks off
+        after some text was yielded).
+    """
+    session = _sessions.get(session_id)
+    if session is None:
+        yield SESSION_EXPIRED
+        return
+    streamed = False
+    try:
+        streamer, future = _submit_streamed(model, tokenizer, session, question,
+                                            {"chat_history": session.chat_history()}, scheduler)
+        for text in streamer:
+            if text:
+                streamed = True
+                yield text
+        answer = future.result().text
+        session.add_turn(question, answer)
+        logging.info(f"Follow-up streamed: {answer}")
+    except Exception as e:
+        logging.error(f"An error occurred while streaming a follow-up answer: {e}")
+        yield f" {INCOMPLETE_ANALYSIS}" if streamed else UNABLE_TO_DETERMINE
+        return
+    if not streamed:
+        yield answer
+
+class LocalAnalyzer:
+    """
+    The model in this process behind the interface of ModelClient and
+    WorkerPool, so front ends stream analyses and follow-ups the same way
+    wherever the model runs.
+    """
+
+    def __init__(self, model, tokenizer, scheduler: InferenceScheduler | None = None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.scheduler = scheduler
+
+    def analyze_stream(self, frame, session_id: str | None = None) -> Iterator[str]:
+        return stream_moondream_analysis(self.model, self.tokenizer, frame, self.scheduler, session_id)
+
+    def follow_up_stream(self, session_id: str, question: str) -> Iterator[str]:
+        return stream_follow_up(self.model, self.tokenizer, session_id, question, self.scheduler)
@@ -0,0 +1,157 @@
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Resources the capture flow never needs: web fonts, analytics beacons, map
+# tiles and media. Patterns use the DevTools Network.setBlockedURLs syntax.
+DEFAULT_BLOCKED_URL_PATTERNS = (
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*analytics*",
+    "*tile.openstreetmap.org*", "*arcgis*", "*mapbox*", "*maps.googleapis.com*", "*maps.gstatic.com*",
+    "*.mp4", "*.webm", "*.mp3",
+)
+
+# Typical transfer sizes by DevTools resource type, used to estimate the savings of a
+# blocked request until a completed one of the same type has been seen. In "block"
+# mode the blocked types never load, so without these every estimate would be 0.
+DEFAULT_RESOURCE_BYTES = {
+    "Font": 30 * 1024,
+    "Image": 15 * 1024,  # camera thumbnails and map tiles
+    "Script": 60 * 1024,  # analytics and tag-manager bundles
+    "Media": 256 * 1024,
+    "XHR": 2 * 1024,
+    "Fetch": 2 * 1024,
+    "Ping": 512,
+    "Other": 4 * 1024,
+}
+
+COUNT_SKIPPED_IMAGES_SCRIPT = """
+return Array.from(document.images).filter(function (img) {
+    return img.getAttribute('src') && img.naturalWidth === 0;
+}).length;
+"""
+
+
+@dataclass(frozen=True)
+class NetworkFilter:
+    """
+    Which requests a pooled headless Chrome should drop.
+
+    blocked_url_patterns are blocked through DevTools. With block_images, Chrome
+    loads no images at all (camera thumbnails, map tiles); the capture flow then
+    reads the feed image's URL from the page and downloads just that one.
+    """
+    blocked_url_patterns: tuple = DEFAULT_BLOCKED_URL_PATTERNS
+    block_images: bool = False
+
+    def configure_options(self, options):
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        if self.block_images:
+            options.add_argument("--blink-settings=imagesEnabled=false")
+
+    def install(self, driver):
+        driver.execute_cdp_cmd("Network.enable", {})
+        if self.blocked_url_patterns:
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(self.blocked_url_patterns)})
+
+
+@dataclass
+class NetworkStats:
+    """Requests and bytes for one capture, plus what the filter saved."""
+    requests: int = 0
+    bytes_loaded: int = 0
+    requests_blocked: int = 0
+    images_skipped: int = 0
+    bytes_saved_estimate: int = 0
+    blocked_by_type: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "bytes_loaded": self.bytes_loaded,
+            "requests_saved": self.requests_blocked + self.images_skipped,
+            "bytes_saved_estimate": self.bytes_saved_estimate,
+            "blocked_by_type": dict(self.blocked_by_type),
+        }
+
+
+class NetworkUsageTracker:
+    """
+    Turns Chrome performance logs into per-capture NetworkStats.
+
+    Blocked requests never report a size, so bytes saved are estimated from the
+    average size of completed requests of the same resource type, learned from
+    every capture this tracker has seen (including unfiltered ones), or from
+    DEFAULT_RESOURCE_BYTES for types it has never seen load.
+    """
+
+    def __init__(self):
+        self._type_bytes = {}
+        self._type_counts = {}
+        self._lock = threading.Lock()
+
+    def average_bytes(self, resource_type: str) -> int:
+        with self._lock:
+            count = self._type_counts.get(resource_type, 0)
+            if count:
+                return self._type_bytes[resource_type] // count
+        return DEFAULT_RESOURCE_BYTES.get(resource_type, DEFAULT_RESOURCE_BYTES["Other"])
+
+    def _learn(self, resource_type: str, size: int):
+        with self._lock:
+            self._type_bytes[resource_type] = self._type_bytes.get(resource_type, 0) + size
+            self._type_counts[resource_type] = self._type_counts.get(resource_type, 0) + 1
+
+    def summarize(self, log_entries: list, images_skipped: int = 0) -> NetworkStats:
+        """Builds NetworkStats from entries returned by driver.get_log("performance")."""
+        stats = NetworkStats(images_skipped=images_skipped)
+        types = {}
+        for entry in log_entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                types[request_id] = params.get("type", "Other")
+            elif method == "Network.loadingFinished":
+                size = int(params.get("encodedDataLength", 0))
+                stats.requests += 1
+                stats.bytes_loaded += size
+                self._learn(types.get(request_id, "Other"), size)
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                resource_type = params.get("type") or types.get(request_id, "Other")
+                stats.requests_blocked += 1
+                stats.blocked_by_type[resource_type] = stats.blocked_by_type.get(resource_type, 0) + 1
+        for resource_type, count in stats.blocked_by_type.items():
+            stats.bytes_saved_estimate += count * self.average_bytes(resource_type)
+        stats.bytes_saved_estimate += images_skipped * self.average_bytes("Image")
+        return stats
+
+    def collect(self, driver, network_filter: NetworkFilter | None) -> NetworkStats | None:
+        """Drains the driver's performance log and summarizes it; None if logging is off."""
+        if network_filter is None:
+            return None
+        try:
+            entries = driver.get_log("performance")
+            skipped = driver.execute_script(COUNT_SKIPPED_IMAGES_SCRIPT) if network_filter.block_images else 0
+        except Exception as e:
+            logging.warning(f"Could not read network usage: {e}")
+            return None
+        return self.summarize(entries, images_skipped=skipped or 0)
+
+    @staticmethod
+    def drain(driver, network_filter: NetworkFilter | None):
+        """Discards buffered log entries so the next collect() covers only the next capture."""
+        if network_filter is None:
+            return
+        try:
+            driver.get_log("performance")
+        except Exception:
+            pass
@@ -0,0 +1,113 @@
+import copy
+import logging
+import threading
+import time
+import torch
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# "tokens" keeps Moondream2's own prompt layout (image, then question) and only
+# tokenizes and embeds the constant question once. "prefix" puts the question
+# before the image so its key/value states can be prefilled once and reused.
+PROMPT_CACHE_MODES = ("off", "tokens", "prefix")
+
+# answer_question's own decode limit; callers bound it further with stopping criteria.
+ANSWER_MAX_NEW_TOKENS = 512
+
+
+class PromptCache:
+    """
+    The constant parts of one question's prompt, prepared once per model.
+
+    Moondream2 prompts are [BOS][image embeddings][question text]. With causal
+    attention the question's key/value states depend on the image before it, so
+    in that layout ("tokens") only the tokenization and embedding lookup of the
+    question can be reused. The "prefix" layout asks [BOS][question][image]
+    ["Answer:"] instead: the question's key/value states are computed at load,
+    and each request prefills only the image and the short answer cue.
+
+    Args:
+        model: The loaded Moondream2 model.
+        tokenizer: The loaded Moondream2 tokenizer.
+        question: The constant question, e.g. the analysis prompt.
+        mode: "tokens" or "prefix".
+    """
+
+    def __init__(self, model, tokenizer, question: str, mode: str = "tokens"):
+        if mode not in PROMPT_CACHE_MODES[1:]:
+            raise ValueError(f"Unknown prompt cache mode '{mode}', expected one of {PROMPT_CACHE_MODES[1:]}")
+        self.model = model
+        self.tokenizer = tokenizer
+        self.question = question
+        self.mode = mode
+        self.past_key_values = None
+        self.prefill_seconds = 0.0
+        self._lock = threading.Lock()
+        self.requests = 0
+
+        if mode == "prefix":
+            before, after = f"Question: {question}\n\n", "\n\nAnswer:"
+        else:
+            before, after = "", f"\n\nQuestion: {question}\n\nAnswer:"
+        with torch.no_grad():
+            bos = torch.tensor([[tokenizer.bos_token_id]], device=model.device)
+            prefix_ids = torch.cat([bos, self._tokenize(before)], dim=1)
+            embed = model.text_model.get_input_embeddings()
+            self.prefix_embeds = embed(prefix_ids)
+            self.suffix_embeds = embed(self._tokenize(after))
+            if mode == "prefix":
+                start = time.perf_counter()
+                self.past_key_values = model.text_model(inputs_embeds=self.prefix_embeds, use_cache=True).past_key_values
+                self.prefill_seconds = time.perf_counter() - start
+        self.prefix_tokens = self.prefix_embeds.shape[1]
+        logging.info(f"Prompt cache ready ({mode}): {self.prefix_tokens} prefix and {self.suffix_embeds.shape[1]} "
+                     f"suffix tokens, prefix prefill {self.prefill_seconds * 1000:.0f} ms")
+
+    def _tokenize(self, text: str):
+        if not text:
+            return torch.zeros((1, 0), dtype=torch.long, device=self.model.device)
+        return self.tokenizer(text, return_tensors="pt", add_special_tokens=False).input_ids.to(self.model.device)
+
+    def input_embeds(self, image_embeds):
+        """The full prompt embeddings for one encoded image."""
+        image_embeds = image_embeds.to(device=self.model.device, dtype=self.prefix_embeds.dtype)
+        return torch.cat([self.prefix_embeds, image_embeds, self.suffix_embeds], dim=1)
+
+    def answer(self, image_embeds, **generate_kwargs) -> str:
+        """
+        Answers the cached question about an encoded image, like answer_question.
+
+        In "prefix" mode generation starts from a copy of the prefilled cache
+        (decoding appends to it), so only the image and suffix are prefilled.
+
+        Args:
+            image_embeds: The output of model.encode_image.
+            **generate_kwargs: Passed to generate, e.g. stopping_criteria or a streamer.
+
+        Returns:
+            The stripped answer text.
+        """
+        config = {
+            "eos_token_id": self.tokenizer.eos_token_id,
+            "bos_token_id": self.tokenizer.bos_token_id,
+            "pad_token_id": self.tokenizer.bos_token_id,
+            "max_new_tokens": ANSWER_MAX_NEW_TOKENS,
+            **generate_kwargs,
+        }
+        if self.past_key_values is not None:
+            config["past_key_values"] = copy.deepcopy(self.past_key_values)
+        with torch.no_grad():
+            output_ids = self.model.text_model.generate(inputs_embeds=self.input_embeds(image_embeds), **config)
+        with self._lock:
+            self.requests += 1
+        return self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)[0].strip()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "prefix_tokens": self.prefix_tokens,
+                "suffix_tokens": self.suffix_embeds.shape[1],
+                "prefix_prefill_seconds": self.prefill_seconds,
+                "requests": self.requests,
+            }
@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+import numpy as np
+
+WALK = "walk"
+DONT_WALK = "dont_walk"
+UNKNOWN = "unknown"
+
+# Below this share of lit pixels the head is dark (off phase of a flashing hand, or night glare cut off).
+MIN_LIT_FRACTION = 0.02
+# Above it the region is probably sky, glare or a white wall rather than a signal lens.
+MAX_LIT_FRACTION = 0.6
+
+
+@dataclass(frozen=True)
+class SignalReading:
+    """The pedestrian signal state seen in a signal-head region, with a confidence in [0, 1]."""
+    state: str
+    confidence: float
+    orange_fraction: float = 0.0
+    white_fraction: float = 0.0
+
+
+def _color_masks(pixels: np.ndarray) -> tuple:
+    """Boolean masks of lit orange ("Don't Walk" hand) and lit white ("Walk" figure) pixels."""
+    rgb = pixels[..., :3].astype(np.float32) / 255.0
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    value = rgb.max(axis=-1)
+    delta = value - rgb.min(axis=-1)
+    saturation = np.divide(delta, value, out=np.zeros_like(value), where=value > 0)
+    # Hue of red-to-yellow pixels (red is the largest channel, green at least blue), in degrees.
+    hue = 60.0 * np.divide(g - b, delta, out=np.zeros_like(delta), where=delta > 0)
+    orange = (r >= g) & (g >= b) & (hue >= 8.0) & (hue <= 45.0) & (saturation > 0.45) & (value > 0.45)
+    white = (saturation < 0.25) & (value > 0.7)
+    return orange, white
+
+
+def _shape_score(mask: np.ndarray, state: str) -> float:
+    """How well the lit pixels' bounding box fits the symbol: a tall figure or a compact hand."""
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    height = rows[-1] - rows[0] + 1
+    width = cols[-1] - cols[0] + 1
+    fill = mask.sum() / (height * width)
+    if state == WALK:
+        return 1.0 if height >= 1.1 * width else 0.8
+    return 1.0 if fill >= 0.4 else 0.8
+
+
+def classify_signal(pixels: np.ndarray) -> SignalReading:
+    """
+    Classifies a cropped pedestrian signal head by color and shape.
+
+    Counts lit orange and lit white pixels in one vectorized pass. The state is
+    the dominant color; the confidence combines how dominant it is, how much of
+    the region is lit, and whether the lit blob has the expected shape.
+
+    Args:
+        pixels: An HxWx3 uint8 RGB array of the signal-head region.
+
+    Returns:
+        A SignalReading; UNKNOWN with confidence 0 if the head is dark.
+    """
+    orange, white = _color_masks(pixels)
+    total = orange.size
+    orange_fraction = float(orange.sum()) / total
+    white_fraction = float(white.sum()) / total
+    lit_fraction = orange_fraction + white_fraction
+    if lit_fraction < MIN_LIT_FRACTION:
+        return SignalReading(UNKNOWN, 0.0, orange_fraction, white_fraction)
+
+    state, mask, dominant = ((DONT_WALK, orange, orange_fraction) if orange_fraction >= white_fraction
+                             else (WALK, white, white_fraction))
+    purity = dominant / lit_fraction
+    coverage = min(1.0, dominant / (3 * MIN_LIT_FRACTION))
+    confidence = purity * coverage * _shape_score(mask, state)
+    if lit_fraction > MAX_LIT_FRACTION:
+        confidence *= 0.5
+    return SignalReading(state, round(confidence, 3), orange_fraction, white_fraction)
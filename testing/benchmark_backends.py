@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Cold-start time, steady-state latency and memory of the Moondream2 inference backends.
+
+Each backend (eager, compile, onnx) is loaded in its own subprocess so cold
+start and peak memory are measured cleanly. Cold start runs from process start
+to the end of the first analysis, so it includes model load, ONNX export or
+torch.compile compilation, and first-call warm-up. Steady state is the median
+encode and answer time over the remaining runs on the same frames. Verdicts
+are compared with the eager backend's.
+
+Usage:
+    python testing/benchmark_backends.py --images frames/
+    python testing/benchmark_backends.py --images frames/ --backends eager,onnx --runs 5 --json results.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+START = time.perf_counter()
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from verdict import parse_verdict
+
+
+def image_files(directory: str) -> list:
+    return sorted(f for f in os.listdir(directory) if f.lower().endswith((".jpg", ".jpeg", ".png")))
+
+
+def run_worker(backend: str, directory: str, runs: int, precision: str | None) -> dict:
+    """Loads one backend and analyzes every frame; runs in a fresh process."""
+    from PIL import Image
+    from moondream_analyzer import ANALYSIS_QUESTION, load_model
+
+    model, tokenizer = load_model(precision, backend=backend)
+    if model is None:
+        return {"backend": backend, "error": "model failed to load"}
+    load_seconds = time.perf_counter() - START
+    if model.name != backend:
+        return {"backend": backend, "error": f"backend could not be prepared (fell back to {model.name})"}
+
+    images = {name: Image.open(os.path.join(directory, name)).convert("RGB") for name in image_files(directory)}
+    first = next(iter(images.values()))
+    model.answer(model.encode(first), ANALYSIS_QUESTION)
+    cold_start = time.perf_counter() - START
+
+    results = {}
+    for name, image in images.items():
+        encode_times, answer_times, analysis = [], [], ""
+        for _ in range(runs):
+            start = time.perf_counter()
+            embedding = model.encode(image)
+            encode_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            analysis = model.answer(embedding, ANALYSIS_QUESTION)
+            answer_times.append(time.perf_counter() - start)
+        results[name] = {"verdict": parse_verdict(analysis).label, "analysis": analysis,
+                         "encode": statistics.median(encode_times), "answer": statistics.median(answer_times)}
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "cold_start_seconds": cold_start,
+        # ru_maxrss is reported in kilobytes on Linux.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "images": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Moondream2 inference backends on a fixed frame set.")
+    parser.add_argument("--images", required=True, help="Directory of saved camera frames")
+    parser.add_argument("--backends", default="eager,compile,onnx")
+    parser.add_argument("--precision", default=None, help="fp32, bf16 or int8 (default: CV4VI_MODEL_PRECISION)")
+    parser.add_argument("--runs", type=int, default=3, help="Timed repetitions per frame (median is reported)")
+    parser.add_argument("--json", help="Write raw per-frame results to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # Keep stdout clean for the JSON result; model code may print.
+        with contextlib.redirect_stdout(sys.stderr):
+            result = run_worker(args.worker, args.images, args.runs, args.precision)
+        json.dump(result, sys.stdout)
+        return
+
+    if not image_files(args.images):
+        sys.exit(f"No .jpg/.png images in {args.images}")
+
+    results = {}
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        print(f"Running {backend}...", file=sys.stderr)
+        command = [sys.executable, __file__, "--worker", backend, "--images", args.images, "--runs", str(args.runs)]
+        if args.precision:
+            command += ["--precision", args.precision]
+        completed = subprocess.run(command, stdout=subprocess.PIPE, check=False)
+        try:
+            results[backend] = json.loads(completed.stdout)
+        except ValueError:
+            results[backend] = {"backend": backend, "error": f"worker exited with {completed.returncode}"}
+
+    reference = results.get("eager", {}).get("images")
+    print(f"{'backend':<10}{'load':>8}{'cold':>8}{'rss':>10}{'encode':>10}{'answer':>10}{'vs eager':>10}")
+    for backend, result in results.items():
+        if "error" in result:
+            print(f"{backend:<10}  {result['error']}")
+            continue
+        images = result["images"]
+        encode = statistics.median(r["encode"] for r in images.values()) * 1000
+        answer = statistics.median(r["answer"] for r in images.values()) * 1000
+        agreement = "-"
+        if reference and backend != "eager":
+            shared = [name for name in images if name in reference]
+            if shared:
+                agreement = f"{sum(images[n]['verdict'] == reference[n]['verdict'] for n in shared) / len(shared):.0%}"
+        print(f"{backend:<10}{result['load_seconds']:>7.1f}s{result['cold_start_seconds']:>7.1f}s"
+              f"{result['peak_rss_mb']:>8.0f}MB{encode:>8.0f}ms{answer:>8.0f}ms{agreement:>10}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
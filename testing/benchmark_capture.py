@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Capture-path latency benchmark against the local NYCTMC stand-in site.
+
+Reports cold and warm latency percentiles for each capture backend:
+  selenium-cold  a fresh Chrome per capture, as get_camera_feed_screenshot used to work
+  selenium-warm  get_camera_feed_screenshot on the warm driver pool
+  http           fetch_camera_frame straight from the camera catalog
+  cached         capture_camera_frame through the per-camera frame cache
+
+Usage:
+    python testing/benchmark_capture.py --runs 20 --filter-delay 0.3 --dialog-delay 0.2
+    python testing/benchmark_capture.py --backends http,cached --json results.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from nyctmc_stub_server import StubNyctmcServer
+
+BACKENDS = ["selenium-cold", "selenium-warm", "http", "cached"]
+
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        p50 = p90 = p99 = ordered[0]
+    else:
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+        p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+    return {"n": len(ordered), "mean": statistics.fmean(ordered), "p50": p50, "p90": p90, "p99": p99, "max": ordered[-1]}
+
+
+def timed(fn) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run_backend(name: str, locations: list, runs: int, camera_controller) -> dict:
+    """Returns {"cold": [...], "warm": [...], "failures": n} latencies in seconds."""
+    cold, warm, failures = [], [], 0
+
+    def record(samples, elapsed, ok):
+        nonlocal failures
+        if ok:
+            samples.append(elapsed)
+        else:
+            failures += 1
+
+    if name == "selenium-cold":
+        from driver_pool import ChromeDriverPool
+        for i in range(runs):
+            location = locations[i % len(locations)]
+
+            def capture():
+                pool = ChromeDriverPool(size=1, url=f"{camera_controller.NYCTMC_BASE_URL}/cameras-list",
+                                        health_check_interval=None).start()
+                camera_controller._driver_pool = pool
+                try:
+                    return camera_controller.get_camera_feed_screenshot(location)
+                finally:
+                    pool.close()
+                    camera_controller._driver_pool = None
+
+            elapsed, frame = timed(capture)
+            record(cold, elapsed, frame is not None)
+        return {"cold": cold, "warm": warm, "failures": failures}
+
+    if name == "selenium-warm":
+        elapsed, pool = timed(camera_controller.get_driver_pool)
+        cold.append(elapsed)
+        capture = camera_controller.get_camera_feed_screenshot
+    elif name == "http":
+        capture = camera_controller.fetch_camera_frame
+    elif name == "cached":
+        capture = lambda location: camera_controller.capture_camera_frame(location)
+    else:
+        raise ValueError(f"Unknown backend: {name}")
+
+    for i in range(runs + 1):
+        location = locations[i % len(locations)]
+        elapsed, frame = timed(lambda: capture(location))
+        # The first capture pays one-off costs (catalog download, index build, first page use).
+        record(cold if i == 0 else warm, elapsed, frame is not None)
+    return {"cold": cold, "warm": warm, "failures": failures}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark camera capture latency against the local stand-in site.")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help=f"Comma-separated subset of {BACKENDS}")
+    parser.add_argument("--runs", type=int, default=10, help="Warm captures per backend")
+    parser.add_argument("--page-delay", type=float, default=0.0)
+    parser.add_argument("--filter-delay", type=float, default=0.0)
+    parser.add_argument("--dialog-delay", type=float, default=0.0)
+    parser.add_argument("--image-delay", type=float, default=0.0)
+    parser.add_argument("--frame-ttl", type=float, default=2.0, help="Frame cache TTL for the cached backend")
+    parser.add_argument("--json", help="Write raw results to this file")
+    args = parser.parse_args()
+
+    stub = StubNyctmcServer(page_delay=args.page_delay, filter_delay=args.filter_delay,
+                            dialog_delay=args.dialog_delay, image_delay=args.image_delay).start()
+    # camera_controller reads its configuration at import time.
+    os.environ["NYCTMC_BASE_URL"] = stub.base_url
+    os.environ["CV4VI_DRIVER_POOL_SIZE"] = "1"
+    os.environ["CV4VI_FRAME_TTL"] = str(args.frame_ttl)
+    import camera_controller
+
+    locations = [camera["name"] for camera in stub.cameras]
+    results = {}
+    try:
+        for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+            print(f"Running {name}...", file=sys.stderr)
+            results[name] = run_backend(name, locations, args.runs, camera_controller)
+    finally:
+        if camera_controller._driver_pool is not None:
+            camera_controller._driver_pool.close()
+        stub.stop()
+
+    print(f"{'backend':<15}{'phase':<7}{'n':>4}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  failures")
+    for name, result in results.items():
+        for phase in ("cold", "warm"):
+            stats = percentiles(result[phase])
+            if not stats:
+                continue
+            print(f"{name:<15}{phase:<7}{stats['n']:>4}"
+                  + "".join(f"{stats[k] * 1000:>7.1f}ms" for k in ("mean", "p50", "p90", "p99", "max"))
+                  + f"  {result['failures']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({name: {phase: percentiles(r[phase]) for phase in ("cold", "warm")} | {"failures": r["failures"]}
+                       for name, r in results.items()}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
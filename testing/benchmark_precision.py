@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Accuracy/latency comparison of Moondream2 load-time precisions on a fixed image set.
+
+Each precision (fp32, bf16, int8) is loaded in its own subprocess so load time
+and peak memory are measured cleanly. Every image is analyzed with the app's
+prompt; the harness reports load time, peak RSS, encode and answer latency, and
+how often the verdict matches the labels (if given) and the fp32 verdict.
+
+The image directory should hold saved camera frames (.jpg/.png). Labels are an
+optional JSON object mapping file name to "safe", "unsafe" or "unknown".
+
+Usage:
+    python testing/benchmark_precision.py --images frames/ --labels frames/labels.json
+    python testing/benchmark_precision.py --images frames/ --precisions fp32,int8 --runs 3 --json results.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from verdict import parse_verdict
+
+
+def image_files(directory: str) -> list:
+    return sorted(f for f in os.listdir(directory) if f.lower().endswith((".jpg", ".jpeg", ".png")))
+
+
+def run_worker(precision: str, directory: str, runs: int) -> dict:
+    """Loads one precision and analyzes every image; runs in a fresh process."""
+    from PIL import Image
+    from moondream_analyzer import ANALYSIS_QUESTION, load_model
+
+    start = time.perf_counter()
+    model, tokenizer = load_model(precision)
+    load_seconds = time.perf_counter() - start
+    if model is None:
+        return {"precision": precision, "error": "model failed to load"}
+
+    results = {}
+    for name in image_files(directory):
+        image = Image.open(os.path.join(directory, name)).convert("RGB")
+        encode_times, answer_times, analysis = [], [], ""
+        for _ in range(runs):
+            start = time.perf_counter()
+            enc_image = model.encode_image(image)
+            encode_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            analysis = model.answer_question(enc_image, ANALYSIS_QUESTION, tokenizer)
+            answer_times.append(time.perf_counter() - start)
+        results[name] = {"verdict": parse_verdict(analysis).label, "analysis": analysis,
+                         "encode": statistics.median(encode_times), "answer": statistics.median(answer_times)}
+    return {
+        "precision": precision,
+        "load_seconds": load_seconds,
+        # ru_maxrss is reported in kilobytes on Linux.
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "images": results,
+    }
+
+
+def summarize(result: dict, labels: dict, reference: dict | None) -> dict:
+    images = result["images"]
+    encode = [r["encode"] for r in images.values()]
+    answer = [r["answer"] for r in images.values()]
+    summary = {
+        "load_s": result["load_seconds"],
+        "peak_rss_mb": result["peak_rss_mb"],
+        "encode_ms": statistics.median(encode) * 1000 if encode else 0.0,
+        "answer_ms": statistics.median(answer) * 1000 if answer else 0.0,
+    }
+    labelled = [name for name in images if name in labels]
+    if labelled:
+        summary["accuracy"] = sum(images[n]["verdict"] == labels[n] for n in labelled) / len(labelled)
+    if reference:
+        shared = [name for name in images if name in reference]
+        summary["fp32_agreement"] = sum(images[n]["verdict"] == reference[n]["verdict"] for n in shared) / len(shared) if shared else 0.0
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Moondream2 precisions on a fixed image set.")
+    parser.add_argument("--images", required=True, help="Directory of saved camera frames")
+    parser.add_argument("--labels", help="JSON file mapping image file name to safe/unsafe/unknown")
+    parser.add_argument("--precisions", default="fp32,bf16,int8")
+    parser.add_argument("--runs", type=int, default=1, help="Timed repetitions per image (median is reported)")
+    parser.add_argument("--json", help="Write raw per-image results to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # Keep stdout clean for the JSON result; model code may print.
+        with contextlib.redirect_stdout(sys.stderr):
+            result = run_worker(args.worker, args.images, args.runs)
+        json.dump(result, sys.stdout)
+        return
+
+    if not image_files(args.images):
+        sys.exit(f"No .jpg/.png images in {args.images}")
+    labels = {}
+    if args.labels:
+        with open(args.labels) as f:
+            labels = json.load(f)
+
+    results = {}
+    for precision in [p.strip() for p in args.precisions.split(",") if p.strip()]:
+        print(f"Running {precision}...", file=sys.stderr)
+        completed = subprocess.run(
+            [sys.executable, __file__, "--worker", precision, "--images", args.images, "--runs", str(args.runs)],
+            stdout=subprocess.PIPE, check=False,
+        )
+        try:
+            results[precision] = json.loads(completed.stdout)
+        except ValueError:
+            results[precision] = {"precision": precision, "error": f"worker exited with {completed.returncode}"}
+
+    reference = results.get("fp32", {}).get("images")
+    print(f"{'precision':<10}{'load':>8}{'rss':>10}{'encode':>10}{'answer':>10}{'accuracy':>10}{'vs fp32':>9}")
+    for precision, result in results.items():
+        if "error" in result:
+            print(f"{precision:<10}  {result['error']}")
+            continue
+        s = summarize(result, labels, reference if precision != "fp32" else None)
+        accuracy = f"{s['accuracy']:.0%}" if "accuracy" in s else "-"
+        agreement = f"{s['fp32_agreement']:.0%}" if "fp32_agreement" in s else "-"
+        print(f"{precision:<10}{s['load_s']:>7.1f}s{s['peak_rss_mb']:>8.0f}MB{s['encode_ms']:>8.0f}ms"
+              f"{s['answer_ms']:>8.0f}ms{accuracy:>10}{agreement:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Prefill time saved per question by the analysis prompt cache.
+
+Loads Moondream2 once and, for every image, times the prefill (the forward
+pass over the whole prompt before the first token is decoded) four ways:
+
+    uncached       Moondream2's own path: tokenize and embed the prompt, prefill it all
+    tokens         the same layout with the question tokenized and embedded at load
+    prefix_full    the question-first layout, prefilled in full
+    prefix         the question-first layout, reusing the question's prefilled key/values
+
+With --answers it also generates both layouts' answers and reports how often
+their verdicts agree, since the question-first layout is not the one the model
+was trained on.
+
+Usage:
+    python testing/benchmark_prompt_cache.py --images frames/ --runs 5
+    python testing/benchmark_prompt_cache.py --images frames/ --precision int8 --answers
+"""
+
+import argparse
+import copy
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import torch
+from PIL import Image
+
+from moondream_analyzer import ANALYSIS_QUESTION, load_model
+from prompt_cache import PromptCache
+from verdict import parse_verdict
+
+MODES = ("uncached", "tokens", "prefix_full", "prefix")
+
+
+def load_images(directory: str | None) -> dict:
+    if not directory:
+        # Prefill cost does not depend on what the frame shows.
+        return {"blank": Image.new("RGB", (378, 378), (128, 128, 128))}
+    names = sorted(f for f in os.listdir(directory) if f.lower().endswith((".jpg", ".jpeg", ".png")))
+    return {name: Image.open(os.path.join(directory, name)).convert("RGB") for name in names}
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    with torch.no_grad():
+        fn()
+    return time.perf_counter() - start
+
+
+def prefill_times(model, tokenizer, tokens_cache: PromptCache, prefix_cache: PromptCache, enc_image) -> dict:
+    text_model = model.text_model
+    prompt = f"<image>\n\nQuestion: {ANALYSIS_QUESTION}\n\nAnswer:"
+    image_and_suffix = lambda: torch.cat([enc_image.to(prefix_cache.prefix_embeds.dtype), prefix_cache.suffix_embeds], dim=1)
+    return {
+        "uncached": timed(lambda: text_model(inputs_embeds=model.input_embeds(prompt, enc_image, tokenizer), use_cache=True)),
+        "tokens": timed(lambda: text_model(inputs_embeds=tokens_cache.input_embeds(enc_image), use_cache=True)),
+        "prefix_full": timed(lambda: text_model(inputs_embeds=prefix_cache.input_embeds(enc_image), use_cache=True)),
+        "prefix": timed(lambda: text_model(inputs_embeds=image_and_suffix(),
+                                           past_key_values=copy.deepcopy(prefix_cache.past_key_values), use_cache=True)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure prefill time saved by the analysis prompt cache.")
+    parser.add_argument("--images", help="Directory of saved camera frames (default: one blank frame)")
+    parser.add_argument("--precision", default=None, help="fp32, bf16 or int8 (default: CV4VI_MODEL_PRECISION)")
+    parser.add_argument("--runs", type=int, default=3, help="Timed repetitions per image (median is reported)")
+    parser.add_argument("--answers", action="store_true", help="Also compare the verdicts of both prompt layouts")
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if not images:
+        sys.exit(f"No .jpg/.png images in {args.images}")
+    model, tokenizer = load_model(args.precision, prompt_cache="off")
+    if model is None:
+        sys.exit("Failed to load the Moondream model.")
+    tokens_cache = PromptCache(model, tokenizer, ANALYSIS_QUESTION, "tokens")
+    prefix_cache = PromptCache(model, tokenizer, ANALYSIS_QUESTION, "prefix")
+
+    times = {mode: [] for mode in MODES}
+    agree = 0
+    for name, image in images.items():
+        enc_image = model.encode_image(image)
+        prefill_times(model, tokenizer, tokens_cache, prefix_cache, enc_image)  # warm-up
+        runs = [prefill_times(model, tokenizer, tokens_cache, prefix_cache, enc_image) for _ in range(args.runs)]
+        for mode in MODES:
+            times[mode].append(statistics.median(run[mode] for run in runs))
+        if args.answers:
+            baseline = parse_verdict(model.answer_question(enc_image, ANALYSIS_QUESTION, tokenizer))
+            cached = parse_verdict(prefix_cache.answer(enc_image))
+            agree += baseline == cached
+            print(f"{name}: {baseline.label} / {cached.label}", file=sys.stderr)
+
+    baseline = statistics.median(times["uncached"])
+    print(f"prompt: {tokens_cache.suffix_embeds.shape[1]} question tokens, prefix prefilled once in "
+          f"{prefix_cache.prefill_seconds * 1000:.0f} ms ({prefix_cache.prefix_tokens} tokens)")
+    print(f"{'mode':<14}{'prefill':>10}{'saved':>10}")
+    for mode in MODES:
+        median = statistics.median(times[mode])
+        print(f"{mode:<14}{median * 1000:>8.1f}ms{(baseline - median) * 1000:>8.1f}ms")
+    if args.answers:
+        print(f"verdict agreement, image-first vs question-first: {agree}/{len(images)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Throughput of worker-pool layouts (processes x intra-op threads) on this host.
+
+For each layout a WorkerPool is started, warmed up with one request per worker,
+and then sent a fixed number of analysis requests from several client threads
+at once. The harness reports throughput and latency percentiles per layout, so
+the best split of a host's cores can be read off the table. The embedding cache
+is disabled in the workers so repeated frames are encoded every time.
+
+With --cameras N the frames are tagged with N camera ids and the embedding and
+verdict caches stay on, to see how well routing each camera to the same worker
+keeps those per-process caches warm. Each worker's hit rates are reported as
+"embedding%/verdict%".
+
+Usage:
+    python testing/benchmark_workers.py --images frames/ --layouts 1x32,2x16,4x8,8x4
+    python testing/benchmark_workers.py --images frames/ --workers 1,2,4 --threads 4,8 --requests 64 --json results.json
+    python testing/benchmark_workers.py --images frames/ --layouts 4x8 --cameras 6
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from frame import Frame
+from worker_pool import WorkerPool, available_cpus
+
+
+def load_frames(directory: str, cameras: int = 0) -> list:
+    names = sorted(f for f in os.listdir(directory) if f.lower().endswith((".jpg", ".jpeg", ".png")))
+    frames = []
+    for i, name in enumerate(names):
+        with open(os.path.join(directory, name), "rb") as f:
+            camera_id = f"bench-{i % cameras}" if cameras else None
+            frames.append(Frame(f.read(), camera_id=camera_id, source="benchmark"))
+    return frames
+
+
+def hit_rates(server: dict) -> tuple:
+    """A worker's embedding-cache hit rate and verdict-cache reuse rate."""
+    verdicts = server.get("verdict_cache") or {}
+    lookups = verdicts.get("reused", 0) + verdicts.get("computed", 0)
+    return ((server.get("embedding_cache") or {}).get("hit_rate", 0.0),
+            verdicts.get("reused", 0) / lookups if lookups else 0.0)
+
+
+def parse_layouts(args) -> list:
+    if args.layouts:
+        return [tuple(int(n) for n in layout.split("x")) for layout in args.layouts.split(",") if layout.strip()]
+    workers = [int(n) for n in args.workers.split(",")]
+    threads = [int(n) for n in args.threads.split(",")]
+    cores = len(available_cpus())
+    return [(w, t) for w, t in itertools.product(workers, threads) if w * t <= cores]
+
+
+def run_layout(workers: int, threads: int, frames: list, requests: int, concurrency: int, affinity: bool,
+               precision: str | None) -> dict:
+    start = time.perf_counter()
+    pool = WorkerPool(workers=workers, threads=threads, affinity=affinity, precision=precision).start()
+    startup = time.perf_counter() - start
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(pool.analyze, frames[:1] * workers))
+
+        def one(i):
+            t = time.perf_counter()
+            frame = frames[i % len(frames)]
+            # Stamped as a fresh capture, so the verdict cache's age limit applies as it does live.
+            pool.analyze(Frame(frame.data, camera_id=frame.camera_id, source=frame.source))
+            return time.perf_counter() - t
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+        stats = pool.stats()["workers"]
+        dispatched = [w["dispatched"] for w in stats]
+        cache_hits = [hit_rates(w["server"]) for w in stats]
+    finally:
+        pool.close()
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {"workers": workers, "threads": threads, "startup_s": startup, "requests": requests,
+            "throughput": requests / elapsed, "p50": cuts[49], "p90": cuts[89], "dispatched": dispatched,
+            "cache_hits": cache_hits}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep worker processes x threads for analysis throughput.")
+    parser.add_argument("--images", required=True, help="Directory of saved camera frames")
+    parser.add_argument("--layouts", help="Comma-separated WORKERSxTHREADS, e.g. 1x32,4x8")
+    parser.add_argument("--workers", default="1,2,4", help="Worker counts to sweep (without --layouts)")
+    parser.add_argument("--threads", default="4,8,16", help="Threads per worker to sweep (without --layouts)")
+    parser.add_argument("--requests", type=int, default=32, help="Timed requests per layout")
+    parser.add_argument("--concurrency", type=int, default=0, help="Client threads (default: twice the workers)")
+    parser.add_argument("--no-affinity", action="store_true", help="Do not pin workers to cores")
+    parser.add_argument("--precision", default=None, help="fp32, bf16 or int8 (default: CV4VI_MODEL_PRECISION)")
+    parser.add_argument("--cameras", type=int, default=0,
+                        help="Tag the frames with this many camera ids and keep the workers' caches on")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    frames = load_frames(args.images, args.cameras)
+    if not frames:
+        sys.exit(f"No .jpg/.png images in {args.images}")
+    if not args.cameras:
+        os.environ["CV4VI_EMBEDDING_CACHE_BYTES"] = "0"
+
+    results = []
+    print(f"{'layout':<10}{'startup':>9}{'req/s':>8}{'p50':>9}{'p90':>9}  dispatched  cache hits (embedding/verdict)")
+    for workers, threads in parse_layouts(args):
+        concurrency = args.concurrency or 2 * workers
+        try:
+            r = run_layout(workers, threads, frames, args.requests, concurrency, not args.no_affinity, args.precision)
+        except Exception as e:
+            print(f"{workers}x{threads:<8}  failed: {e}")
+            continue
+        results.append(r)
+        print(f"{workers}x{threads:<8}{r['startup_s']:>8.1f}s{r['throughput']:>8.2f}{r['p50']:>8.2f}s"
+              f"{r['p90']:>8.2f}s  {r['dispatched']}  "
+              f"{' '.join(f'{e:.0%}/{v:.0%}' for e, v in r['cache_hits'])}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
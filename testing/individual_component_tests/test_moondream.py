@@ -5,11 +5,14 @@ Tests basic functionality before building the full PoC app
 """
 
 import os
+import sys
 import numpy as np
 from PIL import Image
 import torch
 import streamlit as st
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
 def create_test_image():
     """Create a simple test image for initial testing"""
     # Create a simple test image with geometric shapes
@@ -188,23 +191,10 @@ def load_moondream_model():
 
 def create_mock_model():
     """Create a mock model for testing the interface when real model fails to load"""
-    class MockModel:
-        def caption(self, image, length="normal"):
-            return {"caption": f"Mock caption: This appears to be a {image.size[0]}x{image.size[1]} image with geometric shapes and colors."}
-        
-        def query(self, image, question):
-            if "color" in question.lower():
-                return {"answer": "I can see red and green squares on a light blue background."}
-            elif "shape" in question.lower():
-                return {"answer": "I can see rectangular shapes arranged in a pattern."}
-            else:
-                return {"answer": f"Mock response to: {question}"}
-    
-    class MockTokenizer:
-        pass
-    
+    from fake_vlm import load_fake_model
+    model, tokenizer = load_fake_model(encode_latency="fixed:0", answer_latency="fixed:0")
     st.info("Using mock model for interface testing")
-    return {"model": MockModel(), "tokenizer": MockTokenizer(), "type": "mock"}
+    return {"model": model, "tokenizer": tokenizer, "type": "mock"}
 
 def test_moondream_basic():
     """Basic test of the Moondream2 model"""
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the NYCTMC webcam site.
+
+Serves a fake camera catalog at /api/cameras, a small JPEG per camera at
+/api/cameras/<id>/image, and a /cameras-list page with the same DOM structure
+the Selenium XPaths rely on (search box, table with checkboxes, "View Selected",
+camera preview dialog with an expand button and feed image). Artificial delays
+let the capture paths be benchmarked reproducibly and offline.
+
+Usage:
+    python testing/nyctmc_stub_server.py --port 8765 --filter-delay 0.3
+    NYCTMC_BASE_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CAMERAS = [
+    {"id": "cam-1-ave-110-st", "name": "1 Ave @ 110 St", "area": "Manhattan", "latitude": 40.7925, "longitude": -73.9385, "isOnline": "true"},
+    {"id": "cam-11-ave-42-st", "name": "11 Ave @ 42 St", "area": "Manhattan", "latitude": 40.7608, "longitude": -73.9982, "isOnline": "true"},
+    {"id": "cam-1-ave-14-st", "name": "1 Ave @ 14 St", "area": "Manhattan", "latitude": 40.7316, "longitude": -73.9824, "isOnline": "true"},
+    {"id": "cam-broadway-42-st", "name": "Broadway @ 42 St", "area": "Manhattan", "latitude": 40.7570, "longitude": -73.9859, "isOnline": "true"},
+    {"id": "cam-flatbush-ave-atlantic-ave", "name": "Flatbush Ave @ Atlantic Ave", "area": "Brooklyn", "latitude": 40.6843, "longitude": -73.9776, "isOnline": "true"},
+]
+
+
+# Rendered by script rather than markup because the real Angular app nests a
+# <body> inside <app-root>, which an HTML parser would not allow.
+CAMERAS_LIST_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<title>NYCTMC stand-in</title>
+<style>
+mat-checkbox { display: inline-block; width: 16px; height: 16px; border: 1px solid #333; cursor: pointer; }
+.cdk-overlay-container { position: fixed; top: 0; left: 0; width: 100%; height: 100%; }
+.cdk-overlay-backdrop { position: absolute; width: 100%; height: 100%; background: rgba(0, 0, 0, 0.3); }
+mat-dialog-container { position: relative; display: block; background: #fff; margin: 40px; padding: 8px; }
+app-camera-view, app-dialog-camera-preview { display: block; }
+app-camera-view img { display: block; }
+</style>
+</head>
+<body>
+<script>
+var CONFIG = __CONFIG__;
+var cameras = [];
+var visible = [];
+var selected = [];
+var dialogCount = 0;
+
+function el(tag, attrs, children) {
+    var node = document.createElement(tag);
+    Object.keys(attrs || {}).forEach(function (k) { node.setAttribute(k, attrs[k]); });
+    (children || []).forEach(function (c) { node.appendChild(typeof c === 'string' ? document.createTextNode(c) : c); });
+    return node;
+}
+
+function imageUrl(camera) { return '/api/cameras/' + camera.id + '/image?t=' + Date.now(); }
+
+function renderRows() {
+    var tbody = document.getElementById('camera-rows');
+    tbody.innerHTML = '';
+    visible.forEach(function (camera) {
+        var checkbox = el('mat-checkbox', {'class': selected.indexOf(camera.id) >= 0 ? 'mat-checkbox-checked' : ''},
+                          [el('input', {type: 'checkbox'})]);
+        checkbox.querySelector('input').checked = selected.indexOf(camera.id) >= 0;
+        checkbox.addEventListener('click', function (event) {
+            var i = selected.indexOf(camera.id);
+            if (i >= 0) { selected.splice(i, 1); } else { selected.push(camera.id); }
+            if (event.target.tagName !== 'INPUT') { renderRows(); } else { setTimeout(renderRows, 0); }
+        });
+        var thumb = el('img', {src: imageUrl(camera), width: '32', height: '24', 'class': 'thumbnail'});
+        tbody.appendChild(el('tr', {}, [el('td', {}, [checkbox]), el('td', {}, [thumb]), el('td', {}, [camera.name])]));
+    });
+}
+
+function search() {
+    var query = document.getElementById('mat-input-0').value.trim().toLowerCase();
+    setTimeout(function () {
+        visible = cameras.filter(function (c) { return c.name.toLowerCase().indexOf(query) >= 0; });
+        renderRows();
+    }, CONFIG.filter_delay_ms);
+}
+
+function closeDialog() {
+    var overlay = document.querySelector('.cdk-overlay-container');
+    if (overlay) { overlay.innerHTML = ''; }
+}
+
+function openDialog() {
+    var chosen = cameras.filter(function (c) { return selected.indexOf(c.id) >= 0; });
+    if (!chosen.length) { return; }
+    setTimeout(function () {
+        dialogCount += 1;
+        var views = chosen.map(function (camera) {
+            return el('app-camera-view', {}, [el('div', {}, [
+                el('span', {'class': 'camera-title'}, [camera.name]),
+                el('div', {}, [el('img', {'class': 'placeholder', alt: ''}), el('img', {src: imageUrl(camera), alt: camera.name})])
+            ])]);
+        });
+        var expand = el('button', {mattooltip: 'Toggle full screen', type: 'button'}, ['Expand']);
+        expand.addEventListener('click', function () {
+            document.querySelector('mat-dialog-container').classList.toggle('full-screen');
+        });
+        var preview = el('app-dialog-camera-preview', {}, [el('div', {}, [
+            el('div', {}, [expand, el('button', {type: 'button', 'class': 'close'}, ['Close'])]),
+            el('div', {}, views)
+        ])]);
+        var container = el('mat-dialog-container', {id: 'mat-dialog-' + dialogCount}, [preview]);
+        var backdrop = el('div', {'class': 'cdk-overlay-backdrop'});
+        backdrop.addEventListener('click', closeDialog);
+        preview.querySelector('.close').addEventListener('click', closeDialog);
+        var overlay = document.querySelector('.cdk-overlay-container');
+        overlay.innerHTML = '';
+        overlay.appendChild(backdrop);
+        overlay.appendChild(container);
+    }, CONFIG.dialog_delay_ms);
+}
+
+function bootstrap(data) {
+    cameras = data;
+    visible = data;
+    var input = el('input', {id: 'mat-input-0', type: 'text', placeholder: 'Search'});
+    input.addEventListener('input', function () { if (!input.value) { search(); } });
+    var searchButton = el('button', {type: 'button'}, ['Search']);
+    searchButton.addEventListener('click', search);
+    var form = el('form', {}, [searchButton, el('button', {type: 'reset'}, ['Clear'])]);
+    form.insertBefore(input, form.firstChild);
+    form.addEventListener('submit', function (e) { e.preventDefault(); search(); });
+    var viewSelected = el('button', {type: 'button'}, ['View Selected']);
+    viewSelected.addEventListener('click', openDialog);
+    var camerasList = el('app-cameras-list', {}, [el('div', {}, [
+        el('div', {}, [el('app-search', {}, [form])]),
+        el('div', {}, [viewSelected]),
+        el('table', {}, [el('tbody', {id: 'camera-rows'})])
+    ])]);
+    var innerBody = el('body', {}, [el('div', {}, [el('div', {}, ['NYCTMC']), el('div', {}, [camerasList])])]);
+    var appRoot = el('app-root', {}, [innerBody]);
+    document.body.appendChild(appRoot);
+    document.body.appendChild(el('div', {'class': 'cdk-overlay-container'}));
+    document.addEventListener('keydown', function (e) { if (e.key === 'Escape') { closeDialog(); } });
+    renderRows();
+}
+
+setTimeout(function () {
+    fetch('/api/cameras').then(function (r) { return r.json(); }).then(bootstrap);
+}, CONFIG.page_delay_ms);
+</script>
+</body>
+</html>
+"""
+
+
+def fake_jpeg(camera_id: str) -> bytes:
+    """Returns a tiny, valid JPEG that is unique per camera."""
+    try:
+        import io
+        import zlib
+        from PIL import Image
+        seed = zlib.crc32(camera_id.encode())
+        color = (seed & 0xFF, (seed >> 8) & 0xFF, (seed >> 16) & 0xFF)
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 48), color).save(buffer, format="JPEG")
+        return buffer.getvalue()
+    except ImportError:
+        # Without Pillow, fall back to bytes that at least carry JPEG markers.
+        return b"\xff\xd8\xff\xe0" + camera_id.encode() + b"\xff\xd9"
+
+
+class StubNyctmcServer:
+    """
+    A threaded HTTP server that mimics the NYCTMC camera API and cameras-list page.
+
+    Delays are in seconds: page_delay before the app renders its list,
+    filter_delay before a search filters the table, dialog_delay before the
+    preview dialog opens, and image_delay before each image response.
+    """
+
+    def __init__(self, cameras: list | None = None, host: str = "127.0.0.1", port: int = 0,
+                 page_delay: float = 0.0, filter_delay: float = 0.0, dialog_delay: float = 0.0,
+                 image_delay: float = 0.0):
+        self.cameras = cameras if cameras is not None else DEFAULT_CAMERAS
+        self.page_delay = page_delay
+        self.filter_delay = filter_delay
+        self.dialog_delay = dialog_delay
+        self.image_delay = image_delay
+        self.images = {camera["id"]: fake_jpeg(camera["id"]) for camera in self.cameras}
+        self.requests = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _record(self, path: str):
+        with self._lock:
+            self.requests.append(path)
+
+    def _new_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def cameras_list_page(self) -> bytes:
+        config = {
+            "page_delay_ms": int(self.page_delay * 1000),
+            "filter_delay_ms": int(self.filter_delay * 1000),
+            "dialog_delay_ms": int(self.dialog_delay * 1000),
+        }
+        return CAMERAS_LIST_PAGE.replace("__CONFIG__", json.dumps(config)).encode()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                server._new_connection()
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                server._record(path)
+                if path in ("/", "/cameras-list"):
+                    self._send(200, server.cameras_list_page(), "text/html; charset=utf-8")
+                    return
+                if path == "/api/cameras":
+                    self._send(200, json.dumps(server.cameras).encode(), "application/json")
+                    return
+                match = re.fullmatch(r"/api/cameras/([^/]+)/image", path)
+                if match and match.group(1) in server.images:
+                    if server.image_delay:
+                        time.sleep(server.image_delay)
+                    self._send(200, server.images[match.group(1)], "image/jpeg")
+                    return
+                self._send(404, b"not found", "text/plain")
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the NYCTMC webcam site.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--page-delay", type=float, default=0.0, help="Seconds before the list renders")
+    parser.add_argument("--filter-delay", type=float, default=0.0, help="Seconds before a search filters the list")
+    parser.add_argument("--dialog-delay", type=float, default=0.0, help="Seconds before the preview dialog opens")
+    parser.add_argument("--image-delay", type=float, default=0.0, help="Seconds before each image response")
+    args = parser.parse_args()
+    stub = StubNyctmcServer(host=args.host, port=args.port, page_delay=args.page_delay,
+                            filter_delay=args.filter_delay, dialog_delay=args.dialog_delay,
+                            image_delay=args.image_delay)
+    print(f"Serving fake NYCTMC site at {stub.base_url}")
+    stub._httpd.serve_forever()
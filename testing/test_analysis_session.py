@@ -0,0 +1,108 @@
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis_session import SESSION_EXPIRED, AnalysisSession, SessionStore
+
+ANALYSIS = "No cars. It appears safe to cross the street now."
+
+
+def embedding(nbytes=1000):
+    return np.zeros(nbytes, dtype=np.uint8)
+
+
+def test_chat_history_keeps_the_last_turns_in_prompt_format():
+    session = AnalysisSession("user", Image.new("RGB", (4, 4)), max_turns=2)
+    session.add_turn("Is it safe?", ANALYSIS)
+    session.add_turn("Any bikes?", "One bike.")
+    session.add_turn("Countdown?", "12 seconds.")
+    assert session.chat_history() == ("Question: Any bikes?\n\nAnswer: One bike.\n\n"
+                                      "Question: Countdown?\n\nAnswer: 12 seconds.\n\n")
+    assert session.nbytes == 4 * 4 * 3
+
+
+def test_sessions_expire_after_the_ttl():
+    store = SessionStore(ttl_seconds=0.05)
+    store.start("user", Image.new("RGB", (4, 4)), "Is it safe?", ANALYSIS)
+    assert store.get("user") is not None
+    time.sleep(0.1)
+    assert store.get("user") is None
+    assert store.stats()["expired"] == 1
+
+
+def test_least_recently_used_sessions_are_evicted_over_the_memory_limit():
+    frame = Image.new("RGB", (1, 1))
+    store = SessionStore(max_bytes=2500)
+    store.start("a", frame, "Is it safe?", ANALYSIS, embedding())
+    store.start("b", frame, "Is it safe?", ANALYSIS, embedding())
+    assert store.get("a") is not None
+    session = store.start("c", frame, "Is it safe?", ANALYSIS)
+    # Encoding c's frame later pushes the store over its limit; b was used least recently.
+    store.set_embedding(session, embedding())
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+    assert store.stats()["evicted"] == 1
+    assert store.start("huge", frame, "Is it safe?", ANALYSIS, embedding(5000)) is None
+
+
+def test_follow_ups_are_answered_from_the_cached_embedding(monkeypatch):
+    pytest.importorskip("torch")
+    import fake_vlm
+    import moondream_analyzer
+
+    monkeypatch.setattr(fake_vlm, "FAKE_ENCODE_LATENCY", "fixed:0")
+    monkeypatch.setattr(fake_vlm, "FAKE_ANSWER_LATENCY", "fixed:0")
+    model, tokenizer = moondream_analyzer.load_model(backend="fake")
+    image = Image.new("RGB", (32, 32), (60, 70, 80))
+    analysis = moondream_analyzer.analyze_image(model, tokenizer, image, session_id="user")
+    encodes = model.stats()["encodes"]
+
+    chunks = list(moondream_analyzer.stream_follow_up(model, tokenizer, "user", "Are there bikes?"))
+    assert "".join(chunks).strip() == "This is a fake answer to: Are there bikes?"
+    result = moondream_analyzer.follow_up(model, tokenizer, "user", "How many seconds are left?")
+    assert result.text == "This is a fake answer to: How many seconds are left?"
+    assert model.stats()["encodes"] == encodes
+
+    session = moondream_analyzer.get_session_store().get("user")
+    assert session.turns[0] == (moondream_analyzer.ANALYSIS_QUESTION, analysis.text)
+    assert session.turns[1][0] == "Are there bikes?"
+    assert moondream_analyzer.follow_up(model, tokenizer, "nobody", "Any bikes?") is None
+    assert list(moondream_analyzer.stream_follow_up(model, tokenizer, "nobody", "Any bikes?")) == [SESSION_EXPIRED]
+
+
+def test_follow_ups_see_the_full_frame_when_the_analysis_was_cropped(monkeypatch):
+    pytest.importorskip("torch")
+    import fake_vlm
+    import moondream_analyzer
+    from camera_regions import CameraRegionRegistry, CameraRegions, Region
+    from frame import Frame
+
+    monkeypatch.setattr(fake_vlm, "FAKE_ENCODE_LATENCY", "fixed:0")
+    monkeypatch.setattr(fake_vlm, "FAKE_ANSWER_LATENCY", "fixed:0")
+    regions = CameraRegionRegistry({"cam-9": CameraRegions("cam-9", crosswalk=Region(0.0, 0.5, 0.5, 1.0))})
+    monkeypatch.setattr(moondream_analyzer, "_camera_regions", regions)
+    model, tokenizer = moondream_analyzer.load_model(backend="fake")
+    encoded = []
+    encode_image = model.model.encode_image
+    monkeypatch.setattr(model.model, "encode_image", lambda image: (encoded.append(image.size), encode_image(image))[1])
+
+    image = Image.new("RGB", (320, 240), (60, 70, 80))
+    # The signal head sits outside the crosswalk crop.
+    image.paste((255, 120, 0), (280, 10, 300, 40))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    frame = Frame(buffer.getvalue(), camera_id="cam-9", source="http")
+    moondream_analyzer.analyze_image(model, tokenizer, frame, session_id="cropped-user")
+    assert encoded == [(moondream_analyzer.ENCODER_INPUT_SIZE,) * 2]
+
+    moondream_analyzer.follow_up(model, tokenizer, "cropped-user", "How many seconds are left?")
+    moondream_analyzer.follow_up(model, tokenizer, "cropped-user", "Any bikes?")
+    # The full frame is encoded once, on the first follow-up.
+    assert encoded[1:] == [(320, 240)]
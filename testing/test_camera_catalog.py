@@ -0,0 +1,96 @@
+import os
+import sys
+import time
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from camera_catalog import CameraCatalog, CameraFrameFetcher, CatalogUnavailableError, split_camera_name
+from nyctmc_stub_server import StubNyctmcServer
+
+
+@pytest.fixture
+def stub():
+    with StubNyctmcServer() as server:
+        yield server
+
+
+def test_split_camera_name():
+    assert split_camera_name("1 Ave @ 110 St") == ("1 Ave", "110 St")
+    assert split_camera_name("Broadway & W 42 St") == ("Broadway", "W 42 St")
+
+
+def test_catalog_is_downloaded_once(stub):
+    fetcher = CameraFrameFetcher(base_url=stub.base_url)
+    catalog = fetcher.load_catalog()
+    assert len(catalog) == len(stub.cameras)
+    assert catalog.get("cam-1-ave-110-st").streets == ("1 Ave", "110 St")
+    assert fetcher.load_catalog() is catalog
+    assert stub.requests.count("/api/cameras") == 1
+
+
+class UnreachableSession(requests.Session):
+    def __init__(self):
+        super().__init__()
+        self.attempts = 0
+
+    def get(self, url, **kwargs):
+        self.attempts += 1
+        raise requests.ConnectionError("camera API unreachable")
+
+
+def test_failed_catalog_download_is_backed_off():
+    session = UnreachableSession()
+    fetcher = CameraFrameFetcher(base_url="http://cameras.invalid", session=session, catalog_retry_seconds=0.1)
+    with pytest.raises(requests.ConnectionError):
+        fetcher.load_catalog()
+    # Captures in the meantime fail fast instead of each waiting out the HTTP timeout.
+    for _ in range(3):
+        with pytest.raises(CatalogUnavailableError):
+            fetcher.load_catalog()
+    assert session.attempts == 1
+    time.sleep(0.15)
+    with pytest.raises(requests.ConnectionError):
+        fetcher.load_catalog()
+    assert session.attempts == 2
+
+
+def test_fetch_frame_returns_original_bytes(stub):
+    fetcher = CameraFrameFetcher(base_url=stub.base_url)
+    frame = fetcher.fetch_frame("cam-11-ave-42-st")
+    assert frame == stub.images["cam-11-ave-42-st"]
+    assert frame.startswith(b"\xff\xd8")
+
+
+def test_fetches_reuse_keep_alive_connection(stub):
+    fetcher = CameraFrameFetcher(base_url=stub.base_url)
+    for camera in fetcher.load_catalog():
+        assert fetcher.fetch_frame(camera.camera_id) is not None
+    assert stub.connections == 1
+
+
+def test_unknown_camera_returns_none(stub):
+    fetcher = CameraFrameFetcher(base_url=stub.base_url)
+    assert fetcher.fetch_frame("no-such-camera") is None
+
+
+def test_catalog_round_trips_through_local_file(stub, tmp_path):
+    path = str(tmp_path / "catalog.json")
+    CameraFrameFetcher(base_url=stub.base_url, catalog_path=path).load_catalog()
+    catalog = CameraCatalog.load(path)
+    assert catalog.get("cam-1-ave-14-st").name == "1 Ave @ 14 St"
+    assert CameraFrameFetcher(base_url=stub.base_url, catalog_path=path).load_catalog().cameras == catalog.cameras
+    assert stub.requests.count("/api/cameras") == 1
+
+
+
+def test_stub_serves_cameras_list_page_with_configured_delays():
+    with StubNyctmcServer(filter_delay=0.25, dialog_delay=0.1) as server:
+        page = requests.get(f"{server.base_url}/cameras-list").text
+    assert "mat-input-0" in page
+    assert "View Selected" in page
+    assert '"filter_delay_ms": 250' in page
+    assert '"dialog_delay_ms": 100' in page
@@ -0,0 +1,245 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import camera_controller
+from camera_catalog import CameraFrameFetcher
+from frame_cache import FrameCache
+from nyctmc_stub_server import StubNyctmcServer
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    with StubNyctmcServer() as server:
+        monkeypatch.setattr(camera_controller, "_frame_fetcher", CameraFrameFetcher(base_url=server.base_url))
+        monkeypatch.setattr(camera_controller, "_frame_cache", FrameCache(ttl_seconds=60, size_of=lambda f: f.nbytes))
+        monkeypatch.setattr(camera_controller, "CAPTURE_MODE", "http")
+        yield server
+
+
+def test_http_capture_resolves_camera_and_caches_frame(stub):
+    first = camera_controller.capture_camera_frame("1 Ave @ 110 St")
+    second = camera_controller.capture_camera_frame("110 St @ 1 Ave")
+    assert first.frame.data == stub.images["cam-1-ave-110-st"]
+    assert first.frame.camera_id == "cam-1-ave-110-st"
+    assert first.frame.source == "http"
+    assert second.hit and second.frame is first.frame
+    assert stub.requests.count("/api/cameras/cam-1-ave-110-st/image") == 1
+
+
+def test_async_capture_does_not_block_event_loop(stub):
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        cached = await camera_controller.capture_camera_frame_async("11 Ave @ 42 St")
+        task.cancel()
+        return cached, ticks
+
+    cached, ticks = asyncio.run(run())
+    assert cached.frame.camera_id == "cam-11-ave-42-st"
+    assert ticks > 0
+
+
+def test_async_capture_timeout_cancels_capture(monkeypatch):
+    released = threading.Event()
+
+    def slow_capture(location_query, cancel_token=None):
+        cancel_token.on_cancel(released.set)
+        released.wait(5)
+        return None
+
+    monkeypatch.setattr(camera_controller, "capture_camera_frame", slow_capture)
+    start = time.monotonic()
+    result = asyncio.run(camera_controller.capture_camera_frame_async("1 Ave @ 110 St", timeout=0.05))
+    assert result is None
+    assert released.is_set()
+    assert time.monotonic() - start < 1
+
+
+def test_cancel_token_runs_late_callbacks_immediately():
+    token = camera_controller.CancelToken()
+    token.cancel()
+    called = []
+    token.on_cancel(lambda: called.append(1))
+    assert called == [1]
+    with pytest.raises(camera_controller.CaptureCancelled):
+        token.raise_if_cancelled()
+
+
+def test_async_cancel_callbacks_do_not_block_the_event_loop(monkeypatch):
+    quit_threads = []
+
+    def slow_capture(location_query, cancel_token=None):
+        # Stands in for discarding the session, which quits Chrome.
+        cancel_token.on_cancel(lambda: (time.sleep(0.5), quit_threads.append(threading.current_thread())))
+        time.sleep(1)
+        return None
+
+    async def run():
+        start = time.monotonic()
+        await camera_controller.capture_camera_frame_async("1 Ave @ 110 St", timeout=0.05)
+        return time.monotonic() - start, threading.current_thread()
+
+    monkeypatch.setattr(camera_controller, "capture_camera_frame", slow_capture)
+    elapsed, loop_thread = asyncio.run(run())
+    assert elapsed < 0.4
+    assert quit_threads and quit_threads[0] is not loop_thread
+
+
+class CancellingDriver:
+    """Cancels the capture from its first page interaction, as if the caller gave up mid-search."""
+
+    def __init__(self, token):
+        self.token = token
+
+    def __getattr__(self, name):
+        def interact(*args, **kwargs):
+            self.token.cancel()
+            raise WebDriverException("session quit")
+        return interact
+
+
+class LeaseRecordingPool:
+    network_filter = None
+
+    def __init__(self, driver=None, on_acquire=None):
+        self.pooled = type("Pooled", (), {"driver": driver})()
+        self.on_acquire = on_acquire
+        self.released = []
+        self.discarded = []
+
+    def acquire(self, timeout=None):
+        if self.on_acquire:
+            self.on_acquire()
+        return self.pooled
+
+    def release(self, pooled, healthy=True):
+        self.released.append(healthy)
+
+    def discard(self, pooled):
+        self.discarded.append(pooled)
+
+
+def test_cancel_returns_an_idle_lease_and_quits_one_mid_navigation(monkeypatch):
+    monkeypatch.setattr(camera_controller, "resolve_camera", lambda query: None)
+
+    token = camera_controller.CancelToken()
+    pool = LeaseRecordingPool(on_acquire=token.cancel)
+    monkeypatch.setattr(camera_controller, "get_driver_pool", lambda: pool)
+    assert camera_controller.get_camera_feed_screenshot("1 Ave @ 110 St", cancel_token=token) is None
+    # Cancelled before the capture touched the page: the warm session goes back to the pool.
+    assert (pool.discarded, pool.released) == ([], [True])
+
+    token = camera_controller.CancelToken()
+    pool = LeaseRecordingPool(driver=CancellingDriver(token))
+    monkeypatch.setattr(camera_controller, "get_driver_pool", lambda: pool)
+    assert camera_controller.get_camera_feed_screenshot("1 Ave @ 110 St", cancel_token=token) is None
+    assert pool.discarded == [pool.pooled]
+
+
+class FakeImageDriver:
+    def __init__(self, loaded_xpaths):
+        self.loaded_xpaths = loaded_xpaths
+        self.queried = []
+
+    def find_elements(self, by, xpath):
+        self.queried.append(xpath)
+        return [xpath] if xpath in self.loaded_xpaths else []
+
+    def execute_script(self, script, element):
+        return self.loaded_xpaths[element]
+
+
+def test_feed_image_wait_prefers_last_working_selector(monkeypatch):
+    preferred = camera_controller.FEED_XPATHS[3]
+    monkeypatch.setattr(camera_controller, "_preferred_feed_xpath", preferred)
+    driver = FakeImageDriver({preferred: True, camera_controller.FEED_XPATHS[0]: True})
+    assert camera_controller._loaded_feed_image(driver) == (preferred, preferred)
+    assert driver.queried == [preferred]
+
+
+def test_feed_image_wait_requires_decoded_image(monkeypatch):
+    monkeypatch.setattr(camera_controller, "_preferred_feed_xpath", None)
+    driver = FakeImageDriver({camera_controller.FEED_XPATHS[0]: False})
+    assert camera_controller._loaded_feed_image(driver) is False
+    assert driver.queried == camera_controller.FEED_XPATHS
+
+
+def test_capture_timer_shares_one_budget():
+    timer = camera_controller.CaptureTimer(0.05)
+    with timer.step("first"):
+        time.sleep(0.06)
+    assert timer.remaining() == 0
+    with pytest.raises(camera_controller.TimeoutException):
+        timer.wait(driver=None)
+    report = timer.report()
+    assert report["steps"]["first"] >= 0.05
+    assert report["total"] >= report["steps"]["first"]
+
+
+def test_batch_capture_returns_frame_or_error_per_location(stub, monkeypatch):
+    browser_batches = []
+
+    def fake_browser_batch(queries, cancel_token=None):
+        browser_batches.append(queries)
+        return [camera_controller.CaptureResult(q, error="Camera not found in the NYCTMC camera list") for q in queries]
+
+    monkeypatch.setattr(camera_controller, "get_camera_feed_screenshots", fake_browser_batch)
+    camera_controller.capture_camera_frame("1 Ave @ 14 St")
+    results = camera_controller.capture_camera_frames(
+        ["1 Ave @ 14 St", "Broadway @ 42 St", "Nowhere St @ Elsewhere Ave", "Main St @ Side St"])
+    assert [r.location for r in results] == ["1 Ave @ 14 St", "Broadway @ 42 St", "Nowhere St @ Elsewhere Ave", "Main St @ Side St"]
+    assert results[0].cached.hit
+    assert results[1].frame.data == stub.images["cam-broadway-42-st"]
+    assert results[2].frame is None and results[2].error
+    assert browser_batches == [["Nowhere St @ Elsewhere Ave", "Main St @ Side St"]]
+
+
+def test_xpath_literal_quotes_apostrophes():
+    assert camera_controller.xpath_literal("1 Ave @ 110 St") == "'1 Ave @ 110 St'"
+    assert camera_controller.xpath_literal("St. Mark's Pl") == "\"St. Mark's Pl\""
+    assert camera_controller.xpath_literal("O'Brien \"Sq\"") == "concat('O', \"'\", 'Brien \"Sq\"')"
+
+
+@pytest.fixture
+def browser(stub, monkeypatch):
+    from driver_pool import ChromeDriverPool
+    try:
+        pool = ChromeDriverPool(size=1, url=f"{stub.base_url}/cameras-list", health_check_interval=None).start()
+    except Exception as e:
+        pytest.skip(f"Chrome is not available: {e}")
+    if pool._total() == 0:
+        pool.close()
+        pytest.skip("Chrome is not available")
+    monkeypatch.setattr(camera_controller, "_driver_pool", pool)
+    yield stub
+    pool.close()
+
+
+def test_batch_browser_capture_survives_a_missing_camera(browser, monkeypatch):
+    monkeypatch.setattr(camera_controller, "CAPTURE_BUDGET_SECONDS", 4.0)
+    monkeypatch.setattr(camera_controller, "BATCH_CAMERA_BUDGET_SECONDS", 1.0)
+    monkeypatch.setattr(camera_controller, "BATCH_DIALOG_RESERVE_SECONDS", 2.0)
+    start = time.monotonic()
+    results = camera_controller.get_camera_feed_screenshots(
+        ["Nowhere St @ Elsewhere Ave", "1 Ave @ 110 St", "Broadway @ 42 St"])
+    # The missing camera only used its own slice; the cameras after it were still searched and captured.
+    assert results[0].frame is None and "not found" in results[0].error
+    assert results[1].frame.camera_id == "cam-1-ave-110-st"
+    assert results[2].frame.camera_id == "cam-broadway-42-st"
+    assert time.monotonic() - start < 6
@@ -0,0 +1,63 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from camera_catalog import CameraRecord, split_camera_name
+from camera_index import IntersectionIndex, canonical_streets
+from location_parser import extract_and_normalize_location
+
+
+def make_camera(camera_id, name):
+    return CameraRecord(camera_id=camera_id, name=name, streets=split_camera_name(name), image_url=f"http://x/{camera_id}")
+
+
+CAMERAS = [
+    make_camera("a", "1 Ave @ 110 St"),
+    make_camera("b", "11 Ave @ 110 St"),
+    make_camera("c", "1 Ave @ E 14 St"),
+    make_camera("d", "Broadway @ W 42 St"),
+    make_camera("e", "Flatbush Ave @ Atlantic Ave"),
+    make_camera("f", "Amsterdam Ave @ 72 St"),
+]
+
+
+def test_canonical_streets_match_location_parser():
+    location = extract_and_normalize_location("I'm at 1st Avenue and 110th Street, can I cross?")
+    assert canonical_streets(location) == canonical_streets("1 Ave @ 110 St")
+
+
+def test_exact_match_ignores_street_order():
+    index = IntersectionIndex(CAMERAS)
+    match = index.lookup("110 St @ 1 Ave")
+    assert match.camera.camera_id == "a"
+    assert match.tier == "exact"
+
+
+def test_numbered_avenues_do_not_partially_match():
+    index = IntersectionIndex(CAMERAS)
+    assert index.lookup("1 Ave @ 110 St").camera.camera_id == "a"
+    assert index.lookup("11 Ave @ 110 St").camera.camera_id == "b"
+    assert index.lookup("1 Ave @ 42 St") is None
+
+
+def test_token_set_match_allows_directional_prefix():
+    index = IntersectionIndex(CAMERAS)
+    match = index.lookup("1 Ave @ 14 St")
+    assert match.camera.camera_id == "c"
+    assert match.tier == "token_set"
+
+
+def test_fuzzy_match_tolerates_typos():
+    index = IntersectionIndex(CAMERAS)
+    match = index.lookup("Amsterdm Ave @ 72 St")
+    assert match.camera.camera_id == "f"
+    assert match.tier == "fuzzy"
+    assert index.lookup("Amsterdm Ave @ 73 St") is None
+
+
+def test_lookup_many():
+    index = IntersectionIndex(CAMERAS)
+    results = index.lookup_many(["Atlantic Ave @ Flatbush Ave", "Nowhere St @ Elsewhere Ave"])
+    assert results["Atlantic Ave @ Flatbush Ave"].camera.camera_id == "e"
+    assert results["Nowhere St @ Elsewhere Ave"] is None
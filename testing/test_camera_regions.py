@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from camera_regions import CameraRegionRegistry, CameraRegions, Region, crop_region, regions_path_for_catalog
+
+
+def test_region_registry_round_trip():
+    path = os.path.join(tempfile.mkdtemp(), "regions.json")
+    registry = CameraRegionRegistry()
+    registry.set(CameraRegions("cam-1", crosswalk=Region(0.1, 0.5, 0.9, 1.0), signal_head=Region(0.5, 0.25, 0.75, 0.5)))
+    registry.set(CameraRegions("cam-2", crosswalk=Region(0.0, 0.0, 0.5, 0.5)))
+    registry.save(path)
+    loaded = CameraRegionRegistry.load(path)
+    assert loaded.get("cam-1").signal_head.box(400, 200) == (200, 50, 300, 100)
+    assert loaded.get("cam-2").signal_head is None
+    assert loaded.get("cam-3") is None
+    assert len(CameraRegionRegistry.load(os.path.join(tempfile.mkdtemp(), "missing.json"))) == 0
+    with pytest.raises(ValueError):
+        Region(0.6, 0.2, 0.4, 0.5)
+
+
+def test_registry_is_kept_next_to_the_catalog():
+    assert regions_path_for_catalog("/data/cv4vi/cameras.json") == "/data/cv4vi/camera_regions.json"
+
+
+def test_crop_is_square_inside_the_frame_and_resized():
+    image = Image.new("RGB", (640, 360))
+    # A wide crosswalk strip along the bottom edge: the square grows upward, not past the frame.
+    region = Region(0.25, 0.8, 0.75, 1.0)
+    assert region.square_box(640, 360) == (160, 40, 480, 360)
+    assert crop_region(image, region, 378).size == (378, 378)
+    whole = Region(0.0, 0.0, 1.0, 1.0)
+    assert whole.square_box(640, 360) == (0, 0, 640, 360)
+    assert crop_region(image, whole, 378).size == (378, 378)
@@ -0,0 +1,140 @@
+import os
+import sys
+import threading
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from driver_pool import ChromeDriverPool, PooledDriver
+
+URL = "http://localhost/cameras-list"
+
+
+class FakeDriver:
+    def __init__(self):
+        self.current_url = URL
+        self.quit_called = False
+        self.scripts = 0
+
+    def execute_script(self, script):
+        self.scripts += 1
+        return 0
+
+    def get(self, url):
+        self.current_url = url
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakePool(ChromeDriverPool):
+    def __init__(self, **kwargs):
+        super().__init__(url=URL, driver_path="unused", health_check_interval=None, **kwargs)
+        self.launched = []
+        self._port = 9000
+
+    def _launch(self):
+        self._port += 1
+        pooled = PooledDriver(FakeDriver(), f"/tmp/does-not-exist-{self._port}", self._port)
+        self.launched.append(pooled)
+        return pooled
+
+
+def test_start_prelaunches_sessions_with_distinct_ports():
+    pool = FakePool(size=3).start()
+    assert pool.stats()["idle"] == 3
+    assert len({p.debugging_port for p in pool.launched}) == 3
+
+
+def test_sessions_are_reused_and_reset():
+    pool = FakePool(size=1).start()
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        pass
+    assert first is second
+    assert first.uses == 2
+    assert first.driver.scripts == 2
+    assert len(pool.launched) == 1
+
+
+def test_crashed_session_is_recycled_on_acquire():
+    pool = FakePool(size=1).start()
+    crashed = pool.launched[0]
+    crashed.driver.current_url = "about:blank"
+    pooled = pool.acquire()
+    assert pooled is not crashed
+    assert crashed.driver.quit_called
+
+
+def test_webdriver_error_discards_session():
+    pool = FakePool(size=1).start()
+    with pytest.raises(WebDriverException):
+        with pool.lease() as pooled:
+            raise WebDriverException("chrome not reachable")
+    assert pooled.driver.quit_called
+
+
+def test_leaked_lease_is_reclaimed():
+    pool = FakePool(size=1, max_lease_seconds=0).start()
+    leaked = pool.acquire()
+    pool.check_health()
+    assert leaked.driver.quit_called
+    assert pool.stats() == {"size": 1, "idle": 1, "leased": 0, "launching": 0}
+    pool.release(leaked)
+    assert pool.stats()["idle"] == 1
+
+
+def test_acquire_times_out_when_exhausted():
+    pool = FakePool(size=1).start()
+    pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+
+
+def test_waiting_acquire_is_woken_by_release():
+    pool = FakePool(size=1).start()
+    held = pool.acquire()
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(pool.acquire(timeout=5)))
+    waiter.start()
+    pool.release(held)
+    waiter.join()
+    assert result == [held]
+
+
+class SlowProbeDriver(FakeDriver):
+    """A session whose liveness probe blocks until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.probing = threading.Event()
+        self.unblock = threading.Event()
+
+    @property
+    def current_url(self):
+        self.probing.set()
+        self.unblock.wait(5)
+        return URL
+
+    @current_url.setter
+    def current_url(self, url):
+        pass
+
+
+def test_sessions_under_health_check_still_count_toward_size():
+    pool = FakePool(size=1).start()
+    slow = pool.launched[0].driver = SlowProbeDriver()
+    checker = threading.Thread(target=pool.check_health)
+    checker.start()
+    assert slow.probing.wait(5)
+    # The only session is being probed, not gone: a concurrent acquire waits rather than launching a second Chrome.
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+    slow.unblock.set()
+    checker.join()
+    assert len(pool.launched) == 1
+    assert pool.acquire(timeout=1) is pool.launched[0]
+
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from embedding_cache import EmbeddingCache, embedding_nbytes, frame_digest
+
+
+def street_scene(seed=0, size=(320, 240)):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 255, (size[1] // 16, size[0] // 16, 3), dtype=np.uint8)
+    return Image.fromarray(pixels).resize(size, Image.Resampling.NEAREST)
+
+
+def with_signal(image, color):
+    """The scene with a 12x16 pedestrian signal head painted in color."""
+    pixels = np.asarray(image).copy()
+    pixels[40:56, 200:212] = color
+    return Image.fromarray(pixels)
+
+
+def test_digest_sees_a_small_signal_change():
+    scene = street_scene(size=(640, 480))
+    dont_walk, walk = with_signal(scene, (255, 120, 0)), with_signal(scene, (240, 240, 240))
+    assert frame_digest(dont_walk) == frame_digest(with_signal(scene, (255, 120, 0)))
+    assert frame_digest(dont_walk) != frame_digest(walk)
+    assert frame_digest(scene) != frame_digest(scene.resize((320, 240)))
+
+
+def test_cache_hits_and_misses_are_counted():
+    cache = EmbeddingCache()
+    embedding = np.zeros(16, dtype=np.float32)
+    assert cache.get("model", 1) is None
+    cache.put("model", 1, embedding)
+    assert cache.get("model", 1) is embedding
+    assert cache.get("other-model", 1) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_signal_change_forces_a_re_encode():
+    pytest.importorskip("torch")
+    import moondream_analyzer
+    from fake_vlm import FakeMoondream
+
+    model = FakeMoondream(encode_latency="fixed:0", answer_latency="fixed:0")
+    scene = street_scene(size=(640, 480))
+    dont_walk = moondream_analyzer.encode_image_cached(model, with_signal(scene, (255, 120, 0)))
+    assert moondream_analyzer.encode_image_cached(model, with_signal(scene, (255, 120, 0))) is dont_walk
+    walk = moondream_analyzer.encode_image_cached(model, with_signal(scene, (240, 240, 240)))
+    assert model.stats()["encodes"] == 2
+    assert bytes(walk) != bytes(dont_walk)
+
+
+def test_lru_eviction_under_byte_budget():
+    cache = EmbeddingCache(max_bytes=2 * 64)
+    for key in range(3):
+        cache.put("m", key, np.zeros(16, dtype=np.float32))
+        cache.get("m", 0)
+    assert cache.get("m", 0) is not None
+    assert cache.get("m", 1) is None
+    assert cache.stats()["bytes"] == 128
+
+
+def test_embedding_nbytes_handles_nested_outputs():
+    assert embedding_nbytes((np.zeros(4, dtype=np.float32), [np.zeros(2, dtype=np.float64)])) == 32
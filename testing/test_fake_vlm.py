@@ -0,0 +1,96 @@
+import os
+import random
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_vlm import FakeMoondream, FakeTokenizer, LatencyDistribution
+from verdict import Verdict, find_verdict, parse_verdict
+
+QUESTION = "Is it safe to cross the street now?"
+
+
+def fake(**kwargs):
+    return FakeMoondream(encode_latency="fixed:0", answer_latency="fixed:0", **kwargs)
+
+
+def test_answers_are_deterministic_per_frame_and_seed():
+    image = Image.new("RGB", (64, 48), (90, 90, 90))
+    answers = set()
+    for _ in range(3):
+        model = fake(seed=7)
+        answers.add(model.answer_question(model.encode_image(image), QUESTION, FakeTokenizer()))
+    assert len(answers) == 1
+    answer = answers.pop()
+    # The scripted answer runs past its verdict, as the real model sometimes does.
+    assert find_verdict(answer) is not None and not answer.endswith(parse_verdict(answer).sentence)
+
+    model = fake(seed=7, verdicts="unsafe=1")
+    verdicts = {parse_verdict(model.answer_question(model.encode_image(Image.new("RGB", (8, 8), (c, 0, 0))),
+                                                    QUESTION, FakeTokenizer())) for c in range(20)}
+    assert verdicts == {Verdict.UNSAFE}
+
+
+def test_script_cycles_verdicts_in_call_order():
+    model = fake(script="unsafe,safe")
+    embedding = model.encode_image(Image.new("RGB", (8, 8)))
+    tokenizer = FakeTokenizer()
+    verdicts = [parse_verdict(model.answer_question(embedding, QUESTION, tokenizer)) for _ in range(3)]
+    assert verdicts == [Verdict.UNSAFE, Verdict.SAFE, Verdict.UNSAFE]
+    assert model.stats()["answers"] == 3
+
+
+def test_latency_distributions():
+    rng = random.Random(0)
+    assert LatencyDistribution.parse("fixed:0.25").sample(rng) == 0.25
+    assert 0.1 <= LatencyDistribution.parse("uniform:0.1:0.2").sample(rng) <= 0.2
+    assert LatencyDistribution.parse("normal:0:0.1").sample(rng) >= 0
+    assert LatencyDistribution.parse("lognormal:1:0").sample(rng) == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        LatencyDistribution.parse("gamma:1:2")
+
+
+def test_load_model_fake_runs_the_bounded_pipeline(monkeypatch):
+    pytest.importorskip("torch")
+    import fake_vlm
+    import moondream_analyzer
+
+    monkeypatch.setattr(fake_vlm, "FAKE_ENCODE_LATENCY", "fixed:0")
+    monkeypatch.setattr(fake_vlm, "FAKE_ANSWER_LATENCY", "fixed:0")
+    model, tokenizer = moondream_analyzer.load_model(backend="fake")
+    assert model.name == "fake"
+    result = moondream_analyzer.analyze_image(model, tokenizer, Image.new("RGB", (32, 32), (10, 20, 30)))
+    # Generation stopped at the verdict, before the scripted trailing sentence.
+    assert result.text.endswith(result.verdict.sentence)
+    assert 0 < result.tokens_generated < len(tokenizer.encode(model.script_answer(
+        model.encode_image(Image.new("RGB", (32, 32), (10, 20, 30))), moondream_analyzer.ANALYSIS_QUESTION)))
+
+
+class BrokenOffMoondream(FakeMoondream):
+    """Fails after its third generated token, once part of the answer has been streamed."""
+
+    def answer_question(self, image_embeds, question, tokenizer, stopping_criteria=None, **kwargs):
+        def fail(ids, scores):
+            if ids.shape[1] >= 3:
+                raise RuntimeError("generation failed")
+            return False
+
+        return super().answer_question(image_embeds, question, tokenizer,
+                                       stopping_criteria=[fail, *(stopping_criteria or [])], **kwargs)
+
+
+def test_a_stream_that_breaks_off_says_it_is_incomplete():
+    pytest.importorskip("torch")
+    import moondream_analyzer
+    from verdict import INCOMPLETE_ANALYSIS
+
+    model = BrokenOffMoondream(encode_latency="fixed:0", answer_latency="fixed:0")
+    chunks = list(moondream_analyzer.stream_moondream_analysis(model, FakeTokenizer(),
+                                                               Image.new("RGB", (32, 32), (40, 50, 60))))
+    # The words already streamed stay on screen, so they must be followed by an explicit retraction.
+    assert len(chunks) > 1
+    assert "".join(chunks).endswith(INCOMPLETE_ANALYSIS)
+    assert parse_verdict(chunks[-1]) == Verdict.UNKNOWN
@@ -0,0 +1,50 @@
+import io
+import os
+import sys
+import threading
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from frame import Frame
+
+
+def encode(image, format="JPEG"):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def test_frame_keeps_original_bytes_and_metadata():
+    data = encode(Image.new("RGB", (32, 24), (200, 10, 10)))
+    frame = Frame(data, camera_id="cam", location="1 Ave @ 110 St", source="http")
+    assert frame.data is data
+    assert frame.format == "jpeg"
+    assert frame.nbytes == len(data)
+    assert frame.age >= 0
+
+
+def test_frame_decodes_once():
+    frame = Frame(encode(Image.new("L", (32, 24), 128), format="PNG"))
+    assert frame.format == "png"
+    image = frame.image
+    assert image.mode == "RGB"
+    assert frame.image is image
+    assert frame.array is frame.array
+    assert frame.array.shape == (24, 32, 3)
+    assert not frame.array.flags.writeable
+    assert np.all(frame.array == 128)
+    assert frame.nbytes > len(frame.data)
+
+
+def test_array_can_be_read_before_image():
+    frame = Frame(encode(Image.new("RGB", (8, 8), (0, 0, 0))))
+    shapes = []
+    # Reading array first re-enters the decode lock through image; a plain Lock deadlocks here.
+    reader = threading.Thread(target=lambda: shapes.append(frame.array.shape), daemon=True)
+    reader.start()
+    reader.join(timeout=5)
+    assert shapes == [(8, 8, 3)]
+    assert frame.image.size == (8, 8)
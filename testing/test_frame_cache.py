@@ -0,0 +1,140 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from frame_cache import FrameCache
+
+
+def test_fresh_frames_are_served_from_cache():
+    cache = FrameCache(ttl_seconds=60)
+    calls = []
+    first = cache.get("cam", lambda: calls.append(1) or b"jpeg")
+    second = cache.get("cam", lambda: calls.append(1) or b"other")
+    assert (first.frame, first.hit) == (b"jpeg", False)
+    assert (second.frame, second.hit) == (b"jpeg", True)
+    assert second.captured_at == first.captured_at
+    assert len(calls) == 1
+
+
+def test_stale_frames_are_recaptured():
+    cache = FrameCache(ttl_seconds=0.01)
+    cache.get("cam", lambda: b"old")
+    time.sleep(0.02)
+    assert cache.get("cam", lambda: b"new").frame == b"new"
+
+
+def test_failed_capture_is_not_cached():
+    cache = FrameCache(ttl_seconds=60)
+    assert cache.get("cam", lambda: None) is None
+    assert cache.get("cam", lambda: b"jpeg").frame == b"jpeg"
+
+
+def test_concurrent_misses_share_one_capture():
+    cache = FrameCache(ttl_seconds=60)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_capture():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return b"jpeg"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("cam", slow_capture))) for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    while cache.stats()["coalesced"] < 4:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert [r.frame for r in results] == [b"jpeg"] * 5
+
+
+def test_capture_errors_propagate_to_waiters():
+    cache = FrameCache(ttl_seconds=60)
+    with pytest.raises(RuntimeError):
+        cache.get("cam", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+    assert cache.get("cam", lambda: b"jpeg").frame == b"jpeg"
+
+
+def test_memory_cap_evicts_least_recently_used():
+    cache = FrameCache(ttl_seconds=60, max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.peek("a")
+    cache.put("c", b"12345")
+    assert cache.peek("a") is not None
+    assert cache.peek("b") is None
+    assert cache.stats()["bytes"] == 10
+
+
+def test_old_entries_are_evicted_by_age():
+    cache = FrameCache(ttl_seconds=0.01, max_age_seconds=0.01)
+    cache.put("a", b"12345", captured_at=time.time() - 1)
+    cache.put("b", b"12345")
+    assert cache.stats()["entries"] == 1
+
+
+def test_frames_that_grow_after_caching_count_against_the_budget():
+    from frame import Frame
+    import io
+    from PIL import Image
+
+    def jpeg(color):
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 64), color).save(buffer, format="JPEG")
+        return Frame(buffer.getvalue())
+
+    first, second = jpeg((200, 0, 0)), jpeg((0, 200, 0))
+    cache = FrameCache(ttl_seconds=60, max_bytes=len(first.data) + len(second.data) + 2 * 64 * 64 * 3,
+                       size_of=lambda frame: frame.nbytes)
+    cache.put("a", first)
+    cache.put("b", second)
+    first.array
+    second.array
+    # Both frames are now decoded; together they no longer fit, so the least recently used one goes.
+    assert cache.peek("a") is None
+    assert cache.peek("b") is not None
+    assert cache.stats()["bytes"] == second.nbytes
+
+
+def test_waiters_recapture_when_the_leader_is_cancelled():
+    class Token:
+        cancelled = False
+
+    cache = FrameCache(ttl_seconds=60)
+    token = Token()
+    started = threading.Event()
+    release = threading.Event()
+
+    def cancelled_capture():
+        started.set()
+        release.wait()
+        return None
+
+    results = {}
+    leader = threading.Thread(target=lambda: results.update(leader=cache.get("cam", cancelled_capture, token)))
+    leader.start()
+    started.wait()
+    waiter = threading.Thread(target=lambda: results.update(waiter=cache.get("cam", lambda: b"jpeg")))
+    waiter.start()
+    while cache.stats()["coalesced"] < 1:
+        time.sleep(0.001)
+    # The leader's own request times out; the waiter's did not.
+    token.cancelled = True
+    release.set()
+    leader.join()
+    waiter.join()
+    assert results["leader"] is None
+    assert results["waiter"].frame == b"jpeg" and not results["waiter"].hit
@@ -0,0 +1,154 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class FakeMoondream:
+    text_model = "text-model"
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+
+    def encode_image(self, image):
+        return ("embedding", image)
+
+    def answer_question(self, enc_image, question, tokenizer, **generate_kwargs):
+        return f"{question} {enc_image[1]} {tokenizer} {sorted(generate_kwargs)}"
+
+
+def test_eager_backend_delegates_to_the_model():
+    torch = pytest.importorskip("torch")
+    from inference_backends import create_backend
+
+    backend = create_backend(FakeMoondream(torch.float32), "tok", "eager")
+    assert backend.name == "eager"
+    embedding = backend.encode("frame")
+    assert backend.answer(embedding, "Safe?", streamer=None) == "Safe? frame tok ['streamer']"
+    # The Moondream2 method names keep working, so the backend stands in for the model.
+    assert backend.answer_question(backend.encode_image("frame"), "Safe?", "tok") == "Safe? frame tok []"
+    assert backend.text_model == "text-model"
+
+
+def test_unusable_backends_fall_back_to_eager():
+    torch = pytest.importorskip("torch")
+    from inference_backends import create_backend
+
+    assert create_backend(FakeMoondream(torch.float32), "tok", "tensorrt").name == "eager"
+    # ONNX export needs fp32 weights.
+    assert create_backend(FakeMoondream(torch.bfloat16), "tok", "onnx").name == "eager"
+
+
+class Forward:
+    def forward(self, *args):
+        return "eager"
+
+
+class CompilableMoondream(FakeMoondream):
+    def __init__(self, dtype):
+        super().__init__(dtype)
+        self.vision_encoder = Forward()
+        self.text_model = Forward()
+
+    def encode_image(self, image):
+        return self.vision_encoder.forward(image)
+
+
+def test_compile_errors_fall_back_to_eager(monkeypatch):
+    torch = pytest.importorskip("torch")
+    import inference_backends
+
+    def broken_compile(forward, **kwargs):
+        def compiled(*args):
+            raise RuntimeError("compilation failed")
+        return compiled
+
+    monkeypatch.setattr(inference_backends.torch, "compile", broken_compile)
+    model = CompilableMoondream(torch.float32)
+    # The warm-up in prepare() triggers compilation, so the error surfaces at load...
+    assert inference_backends.create_backend(model, "tok", "compile").name == "eager"
+    # ...and the eager fallback runs the original forwards, not the broken compiled ones.
+    assert model.encode_image("frame") == "eager" and model.text_model.forward() == "eager"
+
+
+class FixedLengthMoondream(CompilableMoondream):
+    """answer_question with Moondream2's signature, which passes its own max_new_tokens to generate."""
+
+    def answer_question(self, image_embeds, question, tokenizer, chat_history="", result_queue=None, **kwargs):
+        return self.generate(image_embeds, max_new_tokens=512, **kwargs)
+
+    def generate(self, image_embeds, max_new_tokens, stopping_criteria=None):
+        self.tokens_generated = 0
+        while self.tokens_generated < max_new_tokens:
+            self.tokens_generated += 1
+            ids = np.ones((1, self.tokens_generated), dtype=np.int64)
+            if stopping_criteria and any(criteria(ids, None) for criteria in stopping_criteria):
+                break
+        return "answer"
+
+
+def test_compile_warm_up_decodes_one_token(monkeypatch):
+    torch = pytest.importorskip("torch")
+    import inference_backends
+
+    monkeypatch.setattr(inference_backends.torch, "compile", lambda forward, **kwargs: forward)
+    model = FixedLengthMoondream(torch.float32)
+    assert inference_backends.create_backend(model, "tok", "compile").name == "compile"
+    assert model.tokens_generated == 1
+
+
+def test_onnx_graphs_are_keyed_on_the_weights():
+    torch = pytest.importorskip("torch")
+    from inference_backends import weights_revision
+
+    model = FakeMoondream(torch.float32)
+    model.vision_encoder = torch.nn.Linear(4, 4)
+    before = weights_revision(model)
+    with torch.no_grad():
+        model.vision_encoder.weight.add_(1.0)
+    assert weights_revision(model) != before
+
+    model.config = type("Config", (), {"_commit_hash": "05d640e6da70c37b2473e0db8fef0233c0709ce4"})()
+    assert weights_revision(model) == "05d640e6da70"
+
+
+def test_onnx_backend_replaces_a_registered_vision_encoder(tmp_path, monkeypatch):
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("onnxruntime")
+    import inference_backends
+    from PIL import Image
+
+    class VisionEncoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.encoder = torch.nn.Linear(3 * 14 * 14, 8)
+            self.projection = torch.nn.Linear(8, 4)
+
+        def preprocess(self, image):
+            return torch.from_numpy(np.asarray(image.resize((378, 378)), dtype=np.float32) / 255).permute(2, 0, 1)
+
+        def forward(self, image):
+            return self.projection(self.encoder(inference_backends.patchify(self.preprocess(image).unsqueeze(0))))
+
+    class TinyMoondream(torch.nn.Module):
+        dtype = torch.float32
+
+        def __init__(self):
+            super().__init__()
+            self.vision_encoder = VisionEncoder()
+
+        def encode_image(self, image):
+            with torch.no_grad():
+                return self.vision_encoder(image)
+
+    monkeypatch.setattr(inference_backends, "ONNX_DIR", str(tmp_path))
+    image = Image.new("RGB", (64, 48), (90, 120, 30))
+    model = TinyMoondream()
+    eager = model.encode_image(image)
+    backend = inference_backends.create_backend(model, "tok", "onnx")
+    assert backend.name == "onnx"
+    assert isinstance(model.vision_encoder, inference_backends.OnnxVisionEncoder)
+    assert torch.allclose(backend.encode(image), eager, atol=1e-5)
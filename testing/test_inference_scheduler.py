@@ -0,0 +1,67 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from inference_scheduler import InferenceScheduler
+
+
+def test_concurrent_requests_are_batched():
+    batches = []
+    release = threading.Event()
+
+    def batch_fn(payloads):
+        release.wait(1)
+        batches.append(list(payloads))
+        return [p * 2 for p in payloads]
+
+    scheduler = InferenceScheduler(batch_fn, max_batch_size=4, max_wait_seconds=0.2)
+    try:
+        futures = [scheduler.submit(i) for i in range(4)]
+        release.set()
+        assert [f.result(2) for f in futures] == [0, 2, 4, 6]
+        assert batches == [[0, 1, 2, 3]]
+        stats = scheduler.stats()
+        assert stats["batch_size_histogram"] == {4: 1}
+        assert stats["requests"] == 4
+        assert stats["max_queue_depth"] >= 1
+        assert stats["latency_p50"] > 0
+    finally:
+        scheduler.close()
+
+
+def test_batch_size_is_capped_and_wait_is_bounded():
+    scheduler = InferenceScheduler(lambda payloads: payloads, max_batch_size=2, max_wait_seconds=0.05)
+    try:
+        futures = [scheduler.submit(i) for i in range(5)]
+        assert [f.result(2) for f in futures] == list(range(5))
+        histogram = scheduler.stats()["batch_size_histogram"]
+        assert max(histogram) <= 2
+        assert sum(size * n for size, n in histogram.items()) == 5
+
+        start = time.monotonic()
+        assert scheduler.run("alone", timeout=2) == "alone"
+        assert time.monotonic() - start < 1
+    finally:
+        scheduler.close()
+
+
+def test_batch_failure_is_raised_to_every_caller():
+    def batch_fn(payloads):
+        raise ValueError("model crashed")
+
+    scheduler = InferenceScheduler(batch_fn, max_batch_size=2, max_wait_seconds=0.05)
+    try:
+        futures = [scheduler.submit(i) for i in range(2)]
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(2)
+        assert scheduler.submit(3).exception(2) is not None
+    finally:
+        scheduler.close()
+    with pytest.raises(RuntimeError):
+        scheduler.submit(4)
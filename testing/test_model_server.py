@@ -0,0 +1,195 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_vlm import FakeTokenizer
+from frame import Frame
+from model_server import ModelClient, ModelServerError, parse_address
+from verdict import INCOMPLETE_ANALYSIS, Verdict
+
+
+class FakeMoondream:
+    def __init__(self):
+        self.encoded = 0
+
+    def encode_image(self, image):
+        self.encoded += 1
+        return ("embedding", image.size)
+
+    def answer_question(self, enc_image, question, tokenizer, streamer=None, **generate_kwargs):
+        answer = f"{question} {enc_image[1][0]}x{enc_image[1][1]}"
+        if streamer is not None:
+            # Like generate: the prompt ids first, then one new token id at a time.
+            streamer.put(np.array([tokenizer.encode(question)]))
+            for token in tokenizer.encode(answer):
+                streamer.put(np.array([token]))
+            streamer.end()
+        return answer
+
+
+def jpeg_frame(size=(40, 30), color=(200, 40, 10)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return Frame(buffer.getvalue(), camera_id="cam-1", source="http")
+
+
+@pytest.fixture
+def server():
+    pytest.importorskip("torch")
+    from model_server import ModelServer
+    address = os.path.join(tempfile.mkdtemp(), "model.sock")
+    model = FakeMoondream()
+    server = ModelServer(model, tokenizer=FakeTokenizer(), address=address, authkey=b"test")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ModelClient(address, authkey=b"test")
+    for _ in range(50):
+        if client.ping():
+            break
+        threading.Event().wait(0.05)
+    yield model, client
+    client.close()
+    server.close()
+
+
+def test_parse_address():
+    assert parse_address("/tmp/cv4vi.sock") == ("/tmp/cv4vi.sock", "AF_UNIX")
+    assert parse_address("127.0.0.1:7000") == (("127.0.0.1", 7000), "AF_INET")
+    assert parse_address(":7000") == (("127.0.0.1", 7000), "AF_INET")
+
+
+def test_frames_round_trip_through_shared_memory(server):
+    model, client = server
+    result = client.analyze(jpeg_frame(), question="size?")
+    assert result.text == "size? 40x30"
+    assert result.verdict == Verdict.UNKNOWN
+    handle = client.encode(jpeg_frame())
+    assert client.answer(handle, "again?") == "again? 40x30"
+    # The identical frame was encoded once; the second analysis and the answer reused the embedding.
+    assert model.encoded == 1
+    with pytest.raises(ModelServerError):
+        client.answer(handle + 100, "gone?")
+    assert client.stats()["scheduler"]["requests"] == 2
+
+
+def test_analysis_streams_through_the_server(server):
+    model, client = server
+    chunks = list(client.analyze_stream(jpeg_frame(color=(10, 200, 40))))
+    assert len(chunks) > 1
+    assert "".join(chunks).strip().endswith("40x30")
+    # The connection is reusable after a completed stream.
+    assert client.ping()
+
+
+def test_follow_up_reuses_the_session_frame(server):
+    from analysis_session import SESSION_EXPIRED
+    model, client = server
+    list(client.analyze_stream(jpeg_frame(color=(40, 10, 200)), session_id="user-1"))
+    follow_ups = client.stats()["sessions"]["follow_ups"]
+    chunks = list(client.follow_up_stream("user-1", "bikes?"))
+    assert "".join(chunks).strip() == "bikes? 40x30"
+    assert client.follow_up("user-1", "cars?").text == "cars? 40x30"
+    # Both follow-ups were answered from the analyzed frame's embedding.
+    assert model.encoded == 1
+    assert client.stats()["sessions"]["follow_ups"] == follow_ups + 2
+    assert list(client.follow_up_stream("user-2", "bikes?")) == [SESSION_EXPIRED]
+    assert client.follow_up("user-2", "bikes?") is None
+
+
+def test_server_key_is_generated_privately_and_shared_with_clients(tmp_path, monkeypatch):
+    import model_server
+    monkeypatch.setattr(model_server, "MODEL_SERVER_KEY", None)
+    path = str(tmp_path / "cv4vi" / "model-server.key")
+    with pytest.raises(ModelServerError):
+        model_server.client_authkey(path)
+    key = model_server.server_authkey(path)
+    assert len(key) == 64 and key != b"cv4vi"
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert model_server.server_authkey(path) == key
+    assert model_server.client_authkey(path) == key
+
+
+def test_non_loopback_address_needs_an_explicit_key(monkeypatch):
+    import model_server
+    monkeypatch.setattr(model_server, "MODEL_SERVER_KEY", None)
+    assert model_server.is_loopback(parse_address("/tmp/cv4vi.sock")[0])
+    assert model_server.is_loopback(parse_address("localhost:7000")[0])
+    assert not model_server.is_loopback(parse_address("0.0.0.0:7000")[0])
+    with pytest.raises(ValueError):
+        model_server.ModelServer(None, None, address="0.0.0.0:7000")
+
+
+class ScriptedConnection:
+    def __init__(self, send_error=None, recv_error=None):
+        self.send_error = send_error
+        self.recv_error = recv_error
+        self.sent = []
+        self.closed = False
+
+    @property
+    def conn(self):
+        return self
+
+    def send(self, message):
+        if self.send_error:
+            raise self.send_error
+        self.sent.append(message)
+
+    def recv(self):
+        if self.recv_error:
+            raise self.recv_error
+        return "ok", "done"
+
+    def close(self):
+        self.closed = True
+
+
+class BrokenStreamConnection(ScriptedConnection):
+    """Streams one chunk, then loses the server."""
+
+    def __init__(self):
+        super().__init__()
+        self.replies = [("chunk", "The Walk sign is lit.")]
+
+    def recv(self):
+        if self.replies:
+            return self.replies.pop(0)
+        raise EOFError()
+
+
+def scripted_client(connections):
+    client = ModelClient("/tmp/unused.sock", authkey=b"test")
+    client._checkout = lambda: connections.pop(0)
+    return client
+
+
+def test_requests_are_resent_only_when_the_send_failed():
+    stale, fresh = ScriptedConnection(send_error=BrokenPipeError()), ScriptedConnection()
+    assert scripted_client([stale, fresh])._call("follow_up", session_id="user", question="bikes?") == "done"
+    assert stale.closed and not fresh.closed and len(fresh.sent) == 1
+
+    sent = ScriptedConnection(recv_error=EOFError())
+    spare = ScriptedConnection()
+    with pytest.raises(EOFError):
+        scripted_client([sent, spare])._call("follow_up", session_id="user", question="bikes?")
+    # The request reached the server, so it was not run a second time on another connection.
+    assert sent.closed and len(sent.sent) == 1 and not spare.sent
+
+    interrupted = ScriptedConnection(recv_error=KeyboardInterrupt())
+    with pytest.raises(KeyboardInterrupt):
+        scripted_client([interrupted])._call("stats")
+    assert interrupted.closed
+
+
+def test_a_stream_cut_off_midway_says_it_is_incomplete():
+    connection = BrokenStreamConnection()
+    chunks = list(scripted_client([connection])._stream("follow_up_stream", session_id="user", question="bikes?"))
+    assert chunks == ["The Walk sign is lit.", f" {INCOMPLETE_ANALYSIS}"]
+    assert connection.closed
@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+
+from selenium.webdriver.chrome.options import Options
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from network_filter import DEFAULT_RESOURCE_BYTES, NetworkFilter, NetworkUsageTracker
+
+
+def entry(method, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+def capture_log(blocked=0):
+    log = [
+        entry("Network.requestWillBeSent", requestId="1", type="Document"),
+        entry("Network.loadingFinished", requestId="1", encodedDataLength=1000),
+        entry("Network.requestWillBeSent", requestId="2", type="Font"),
+        entry("Network.loadingFinished", requestId="2", encodedDataLength=4000),
+    ]
+    for i in range(blocked):
+        log.append(entry("Network.requestWillBeSent", requestId=f"b{i}", type="Font"))
+        log.append(entry("Network.loadingFailed", requestId=f"b{i}", type="Font", blockedReason="inspector"))
+    return log
+
+
+def test_summarize_counts_loaded_and_blocked_requests():
+    tracker = NetworkUsageTracker()
+    stats = tracker.summarize(capture_log(blocked=3))
+    assert stats.requests == 2
+    assert stats.bytes_loaded == 5000
+    assert stats.requests_blocked == 3
+    assert stats.blocked_by_type == {"Font": 3}
+    assert stats.bytes_saved_estimate == 3 * 4000
+
+
+def test_skipped_images_are_estimated_from_learned_image_size():
+    tracker = NetworkUsageTracker()
+    tracker.summarize([entry("Network.requestWillBeSent", requestId="i", type="Image"),
+                       entry("Network.loadingFinished", requestId="i", encodedDataLength=20000)])
+    stats = tracker.summarize([], images_skipped=5)
+    assert stats.as_dict()["requests_saved"] == 5
+    assert stats.bytes_saved_estimate == 5 * 20000
+
+
+def test_block_mode_estimates_savings_without_a_measured_baseline():
+    # In "block" mode fonts and skipped images never load, so their sizes are never learned.
+    log = [entry("Network.requestWillBeSent", requestId="b", type="Font"),
+           entry("Network.loadingFailed", requestId="b", type="Font", blockedReason="inspector")]
+    stats = NetworkUsageTracker().summarize(log, images_skipped=2)
+    assert stats.bytes_saved_estimate == DEFAULT_RESOURCE_BYTES["Font"] + 2 * DEFAULT_RESOURCE_BYTES["Image"]
+    assert stats.bytes_saved_estimate > 0
+
+
+def test_filter_configures_chrome_options():
+    options = Options()
+    NetworkFilter(block_images=True).configure_options(options)
+    assert "--blink-settings=imagesEnabled=false" in options.arguments
+    assert options.to_capabilities()["goog:loggingPrefs"] == {"performance": "ALL"}
+
+
+class FakeCdpDriver:
+    def __init__(self):
+        self.commands = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.commands.append((cmd, params))
+
+
+def test_filter_installs_blocklist():
+    driver = FakeCdpDriver()
+    NetworkFilter(blocked_url_patterns=("*.woff2",)).install(driver)
+    assert driver.commands == [("Network.enable", {}), ("Network.setBlockedURLs", {"urls": ["*.woff2"]})]
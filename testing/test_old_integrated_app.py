@@ -6,6 +6,7 @@ Based on POCworkplan.md specifications
 """
 
 import os
+import sys
 import numpy as np
 import cv2
 from PIL import Image
@@ -17,6 +18,8 @@ from geopy.distance import geodesic
 import torch
 from transformers import AutoModelForCausalLM, AutoTokenizer
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 # NYC Webcam zones (based on POCworkplan.md)
 NYC_WEBCAM_ZONES = [
     {
@@ -89,34 +92,9 @@ def load_moondream_model():
 
 def create_mock_vision_model():
     """Create a mock vision model for demonstration"""
-    class MockVisionModel:
-        def caption(self, image, length="normal"):
-            # Analyze image properties for more realistic mock
-            width, height = image.size
-            
-            if "depth" in str(image.filename).lower() if hasattr(image, 'filename') else False:
-                return {"caption": "Path analysis: Clear walkway ahead with some obstacles on the sides. Ground appears level with no immediate hazards detected."}
-            else:
-                return {"caption": f"Urban scene showing a {width}x{height} view with buildings, street elements, and typical city environment."}
-        
-        def query(self, image, question):
-            question_lower = question.lower()
-            
-            if "path" in question_lower or "obstacle" in question_lower:
-                return {"answer": "The path appears clear with walkable surface. Some obstacles detected on the sides but main walking area is accessible."}
-            elif "color" in question_lower:
-                return {"answer": "Predominant colors include blues, greens, and earth tones typical of urban environments."}
-            elif "hazard" in question_lower or "danger" in question_lower:
-                return {"answer": "No immediate hazards detected in the walking path. Surface appears level and stable."}
-            elif "traffic" in question_lower:
-                return {"answer": "Typical urban traffic patterns visible with standard city street activity."}
-            else:
-                return {"answer": f"Based on the visual analysis: {question}"}
-    
-    class MockTokenizer:
-        pass
-    
-    return {"model": MockVisionModel(), "tokenizer": MockTokenizer(), "type": "mock"}
+    from fake_vlm import load_fake_model
+    model, tokenizer = load_fake_model(encode_latency="fixed:0", answer_latency="fixed:0")
+    return {"model": model, "tokenizer": tokenizer, "type": "mock"}
 
 def create_sample_depth_map():
     """Create a realistic sample depth map for testing"""
@@ -0,0 +1,66 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from verdict import Verdict
+
+
+class FakeModel:
+    def __init__(self):
+        self.questions = []
+
+    def answer_question(self, enc_image, question, tokenizer, **generate_kwargs):
+        self.questions.append(question)
+        return "It appears safe to cross the street now."
+
+
+class FakePromptCache:
+    mode = "prefix"
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    def answer(self, enc_image, **generate_kwargs):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("cache layout not supported")
+        assert "stopping_criteria" in generate_kwargs
+        return "It does not appear safe to cross the street now. Extra text."
+
+
+class Tokenizer:
+    eos_token_id = 0
+
+
+def test_analysis_question_uses_the_prompt_cache():
+    pytest.importorskip("torch")
+    import moondream_analyzer
+
+    model, cache = FakeModel(), FakePromptCache()
+    moondream_analyzer._prompt_caches[id(model)] = cache
+    try:
+        result = moondream_analyzer._answer_one(model, Tokenizer(), "enc", moondream_analyzer.ANALYSIS_QUESTION)
+        assert result.verdict == Verdict.UNSAFE
+        assert result.text == "It does not appear safe to cross the street now."
+        # Other questions keep the model's own prompt.
+        moondream_analyzer._answer_one(model, Tokenizer(), "enc", "What color is the car?")
+        assert (cache.calls, model.questions) == (1, ["What color is the car?"])
+    finally:
+        moondream_analyzer._prompt_caches.pop(id(model), None)
+
+
+def test_failing_prompt_cache_falls_back_and_is_dropped():
+    pytest.importorskip("torch")
+    import moondream_analyzer
+
+    model, cache = FakeModel(), FakePromptCache(fail=True)
+    moondream_analyzer._prompt_caches[id(model)] = cache
+    result = moondream_analyzer._answer_one(model, Tokenizer(), "enc", moondream_analyzer.ANALYSIS_QUESTION)
+    assert result.verdict == Verdict.SAFE
+    assert moondream_analyzer.get_prompt_cache(model) is None
+    moondream_analyzer._answer_one(model, Tokenizer(), "enc", moondream_analyzer.ANALYSIS_QUESTION)
+    assert cache.calls == 1
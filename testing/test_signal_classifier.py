@@ -0,0 +1,38 @@
+import os
+import sys
+
+import numpy as np
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from signal_classifier import DONT_WALK, UNKNOWN, WALK, classify_signal
+
+
+def signal_head(color=None, box=(8, 6, 24, 26), size=(32, 32)):
+    """A dark signal housing with one lit symbol drawn as a filled box (left, top, right, bottom)."""
+    pixels = np.full((size[1], size[0], 3), 25, dtype=np.uint8)
+    if color is not None:
+        left, top, right, bottom = box
+        pixels[top:bottom, left:right] = color
+    return pixels
+
+
+def test_orange_hand_is_dont_walk():
+    reading = classify_signal(signal_head((255, 120, 20), box=(8, 8, 24, 24)))
+    assert reading.state == DONT_WALK
+    assert reading.confidence >= 0.85
+
+
+def test_white_figure_is_walk():
+    reading = classify_signal(signal_head((235, 240, 245), box=(12, 4, 20, 28)))
+    assert reading.state == WALK
+    assert reading.confidence >= 0.85
+
+
+def test_dark_or_ambiguous_heads_are_not_confident():
+    assert classify_signal(signal_head()).state == UNKNOWN
+    mixed = signal_head((255, 120, 20), box=(4, 4, 16, 28))
+    mixed[4:28, 16:28] = (235, 240, 245)
+    assert classify_signal(mixed).confidence < 0.85
+    glare = np.full((32, 32, 3), 250, dtype=np.uint8)
+    assert classify_signal(glare).confidence < 0.85
+
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from verdict import AnalysisResult, Verdict, parse_verdict, truncate_after_verdict
+
+
+def test_parse_verdict():
+    assert parse_verdict("The 'Don't Walk' hand is lit. It does not appear safe to cross the street now.") == Verdict.UNSAFE
+    assert parse_verdict("Walk sign on, no cars. it appears safe to cross the street now") == Verdict.SAFE
+    assert parse_verdict("The image is too dark.") == Verdict.UNKNOWN
+    assert Verdict.UNSAFE.label == "unsafe"
+
+
+def test_text_after_the_first_verdict_is_dropped():
+    text = "Walk sign. It appears safe to cross the street now. However, It does not appear safe to cross the street now."
+    assert truncate_after_verdict(text) == "Walk sign. It appears safe to cross the street now."
+    result = AnalysisResult.from_text(truncate_after_verdict(text), tokens_generated=14)
+    assert (result.verdict, result.tokens_generated) == (Verdict.SAFE, 14)
+
+
+class WordTokenizer:
+    """Token id i is the i-th word of a fixed vocabulary."""
+    eos_token_id = 0
+    vocab = ["<eos>", "Walk", "sign.", "It", "appears", "safe", "to", "cross", "the", "street", "now.", "Also", "more"]
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(self.vocab[int(i)] for i in ids if int(i) != 0)
+
+
+def test_generation_stops_at_the_verdict_or_the_token_cap():
+    pytest.importorskip("torch")
+    from moondream_analyzer import VerdictStoppingCriteria
+
+    tokenizer = WordTokenizer()
+    answer = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
+    criteria = VerdictStoppingCriteria(tokenizer, max_new_tokens=50)
+    stopped_at = next(n for n in range(1, len(answer) + 1) if criteria(np.array([answer[:n]]), None))
+    assert stopped_at == 10
+    assert criteria.tokens_generated == [10]
+
+    capped = VerdictStoppingCriteria(tokenizer, max_new_tokens=4)
+    stopped_at = next(n for n in range(1, len(answer) + 1) if capped(np.array([answer[:n]]), None))
+    assert stopped_at == 4
+
+    # In a batch, generation continues until every row is done; free-form rows only stop at the cap or EOS.
+    batch = VerdictStoppingCriteria(tokenizer, max_new_tokens=50, stop_at_verdict=[True, False])
+    rows = np.array([answer, [11] * 5 + [0] * 7])
+    assert next(n for n in range(1, 13) if batch(rows[:, :n], None)) == 10
+    assert batch.tokens_generated == [10, 6]
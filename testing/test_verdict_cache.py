@@ -0,0 +1,110 @@
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from frame import Frame
+from verdict import AnalysisResult, Verdict
+from verdict_cache import VerdictCache, frame_delta, scene_thumbnail
+
+SAFE = AnalysisResult.from_text("No cars. It appears safe to cross the street now.", tokens_generated=12)
+
+
+def scene(shift=0, car=False):
+    pixels = np.tile(np.linspace(40, 200, 160, dtype=np.float32), (120, 1)) + shift
+    if car:
+        pixels[60:100, 40:100] = 250
+    return Image.fromarray(pixels.clip(0, 255).astype(np.uint8)).convert("RGB")
+
+
+def test_frame_delta():
+    base = (scene_thumbnail(scene()),)
+    assert frame_delta(base, (scene_thumbnail(scene(shift=1)),)) == pytest.approx(1.0, abs=0.1)
+    assert frame_delta(base, (scene_thumbnail(scene(car=True)),)) > 10
+    assert frame_delta(base, base + base) == float("inf")
+
+
+def test_verdict_is_reused_only_for_a_recent_unchanged_scene():
+    cache = VerdictCache(max_delta=2.0, max_age_seconds=6.0)
+    cache.store("cam", (scene_thumbnail(scene()),), SAFE)
+
+    reused = cache.lookup("cam", (scene_thumbnail(scene(shift=1)),))
+    assert reused.reused and reused.text == SAFE.text and reused.verdict == Verdict.SAFE
+    assert cache.lookup("cam", (scene_thumbnail(scene(car=True)),)) is None
+    assert cache.lookup("other-cam", (scene_thumbnail(scene()),)) is None
+
+    cache.store("cam", (scene_thumbnail(scene()),), SAFE, captured_at=time.time() - 7)
+    assert cache.lookup("cam", (scene_thumbnail(scene()),)) is None
+    assert cache.stats() == {"cameras": 1, "reused": 1, "computed": 3}
+
+
+def test_unknown_verdicts_are_not_reused():
+    cache = VerdictCache()
+    cache.store("cam", (scene_thumbnail(scene()),), AnalysisResult.unknown())
+    assert cache.lookup("cam", (scene_thumbnail(scene()),)) is None
+
+
+def jpeg_frame(image, camera_id="cam-7"):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=95)
+    return Frame(buffer.getvalue(), camera_id=camera_id, source="http")
+
+
+class CountingModel:
+    def __init__(self):
+        self.answers = 0
+
+    def encode_image(self, image):
+        return image.size
+
+    def answer_question(self, enc_image, question, tokenizer, **generate_kwargs):
+        self.answers += 1
+        return SAFE.text
+
+
+def test_analyze_image_reuses_the_verdict_for_an_unchanged_frame():
+    pytest.importorskip("torch")
+    import moondream_analyzer
+
+    model = CountingModel()
+    moondream_analyzer.get_verdict_cache().clear()
+    first = moondream_analyzer.analyze_image(model, None, jpeg_frame(scene()))
+    second = moondream_analyzer.analyze_image(model, None, jpeg_frame(scene(shift=1)))
+    third = moondream_analyzer.analyze_image(model, None, jpeg_frame(scene(car=True)))
+    assert (first.reused, second.reused, third.reused) == (False, True, False)
+    assert second.text == first.text
+    assert model.answers == 2
+
+
+def test_a_small_vehicle_entering_the_frame_is_a_change():
+    # A 352x240 NYCTMC still with a 40x25 px vehicle appearing near the crosswalk.
+    pixels = np.tile(np.linspace(60, 180, 352, dtype=np.float32), (240, 1))
+    before = Image.fromarray(pixels.astype(np.uint8)).convert("RGB")
+    pixels[170:195, 150:190] = 0
+    after = Image.fromarray(pixels.astype(np.uint8)).convert("RGB")
+
+    a, b = scene_thumbnail(before), scene_thumbnail(after)
+    # Averaged over the whole frame the vehicle is under the reuse threshold...
+    assert np.abs(a - b).mean() < 2.0
+    # ...but not in the tiles it covers.
+    assert frame_delta((a,), (b,)) > 10
+    cache = VerdictCache()
+    cache.store("cam", (a,), SAFE)
+    assert cache.lookup("cam", (b,)) is None
+
+
+def test_crosswalk_thumbnail_is_compared(monkeypatch):
+    pytest.importorskip("torch")
+    import moondream_analyzer
+    from camera_regions import CameraRegionRegistry, CameraRegions, Region
+
+    regions = CameraRegionRegistry({"cam-7": CameraRegions("cam-7", crosswalk=Region(0.25, 0.5, 0.75, 1.0))})
+    monkeypatch.setattr(moondream_analyzer, "_camera_regions", regions)
+    thumbnails = moondream_analyzer._scene_thumbnails(jpeg_frame(scene()))
+    assert [t.shape for t in thumbnails] == [(32, 32), (32, 32)]
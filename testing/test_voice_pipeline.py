@@ -0,0 +1,61 @@
+import asyncio
+import io
+import os
+import sys
+import wave
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from voice_pipeline import SentenceChunker, aiter_in_thread, audio_duration, speak_sentences
+
+
+def test_chunker_splits_streamed_text_into_sentences():
+    chunker = SentenceChunker()
+    text = "The signal at 1st Ave. and 110th St. shows a 'Walk' sign. Cars are stopped! It appears safe to cross the street now."
+    sentences = []
+    for i in range(0, len(text), 7):
+        sentences += chunker.feed(text[i:i + 7])
+    assert sentences == ["The signal at 1st Ave. and 110th St. shows a 'Walk' sign.", "Cars are stopped!"]
+    assert chunker.flush() == "It appears safe to cross the street now."
+    assert chunker.flush() == ""
+
+
+class FakeSpeech:
+    def __init__(self):
+        self.requested = []
+
+    async def create(self, model, voice, input, response_format):
+        self.requested.append(input)
+        # Later sentences finish first, to check that results stay in order.
+        await asyncio.sleep(0.05 if len(self.requested) == 1 else 0)
+        return type("Response", (), {"content": input.encode()})()
+
+
+class FakeClient:
+    def __init__(self):
+        self.audio = type("Audio", (), {})()
+        self.audio.speech = FakeSpeech()
+
+
+def test_each_sentence_is_spoken_in_order_as_it_completes():
+    client = FakeClient()
+    chunks = ["Walk sign ", "is on. Cars ", "are stopped. It appears safe", " to cross the street now."]
+
+    async def run():
+        return [pair async for pair in speak_sentences(aiter_in_thread(chunks), client)]
+
+    results = asyncio.run(run())
+    assert [sentence for sentence, _ in results] == [
+        "Walk sign is on.", "Cars are stopped.", "It appears safe to cross the street now."]
+    assert [audio for _, audio in results] == [s.encode() for s, _ in results]
+
+
+def test_audio_duration_of_wav():
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(24000)
+        wav.writeframes(b"\0\0" * 12000)
+    assert abs(audio_duration(buffer.getvalue()) - 0.5) < 0.01
+    assert audio_duration(b"ID3 not a wav") is None
@@ -0,0 +1,46 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from warm_start import StagedStartup, format_startup_report, startup_report
+
+
+def test_stages_run_in_the_background_in_order():
+    release = threading.Event()
+
+    def load(module):
+        release.wait(2)
+        return f"model from {module}"
+
+    startup = StagedStartup("vision model", [
+        ("import", lambda _: "analyzer"),
+        ("load model", load),
+        ("warm-up", lambda model: model.upper()),
+    ]).start()
+    with pytest.raises(TimeoutError):
+        startup.wait(timeout=0.05)
+    rows = startup_report([startup], {"app imports": 0.5})
+    assert rows[0] == ("app imports", 0.5)
+    assert rows[2] == ("vision model: load model", None)
+    assert "pending" in format_startup_report(rows)
+
+    release.set()
+    assert startup.wait(timeout=2) == "MODEL FROM ANALYZER"
+    assert startup.done and startup.error is None
+    assert list(startup.timings) == ["import", "load model", "warm-up"]
+
+
+def test_a_failing_stage_stops_startup_and_is_raised_by_wait():
+    def fail(_):
+        raise RuntimeError("Failed to load the Moondream model.")
+
+    ran = []
+    startup = StagedStartup("vision model", [("load model", fail), ("warm-up", ran.append)]).start()
+    with pytest.raises(RuntimeError, match="Moondream"):
+        startup.wait(timeout=2)
+    assert ran == []
+    assert isinstance(startup.error, RuntimeError)
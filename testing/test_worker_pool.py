@@ -0,0 +1,86 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from analysis_session import SESSION_EXPIRED
+from frame import Frame
+from verdict import AnalysisResult
+from worker_pool import WorkerPool, partition_cpus
+
+
+def test_partition_cpus():
+    assert partition_cpus(list(range(8)), 2, 4) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert partition_cpus([2, 3, 5, 7, 11, 13], 3, 2) == [[2, 3], [5, 7], [11, 13]]
+    assert partition_cpus(list(range(4)), 2, 4) == [None, None]
+
+
+class BlockingClient:
+    def __init__(self, release):
+        self.release = release
+        self.calls = 0
+
+    def analyze(self, frame, question=None, session_id=None):
+        self.calls += 1
+        self.release.wait(5)
+        return AnalysisResult.unknown()
+
+    def follow_up_stream(self, session_id, question):
+        yield f"{id(self)} {question}"
+
+
+def test_requests_go_to_the_least_loaded_worker():
+    pool = WorkerPool(workers=3, threads=1, affinity=False)
+    release = threading.Event()
+    pool._clients = [BlockingClient(release) for _ in range(3)]
+
+    threads = [threading.Thread(target=pool.analyze, args=(None,)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while sum(client.calls for client in pool._clients) < 3:
+        threading.Event().wait(0.01)
+    # Three concurrent requests land on three different workers.
+    assert [client.calls for client in pool._clients] == [1, 1, 1]
+    assert pool._in_flight == [1, 1, 1]
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert pool._in_flight == [0, 0, 0]
+    pool.analyze(None)
+    pool.analyze(None)
+    assert pool._dispatched == [2, 2, 1]
+
+
+def test_follow_ups_go_to_the_worker_holding_the_session():
+    pool = WorkerPool(workers=3, threads=1, affinity=False)
+    release = threading.Event()
+    release.set()
+    pool._clients = [BlockingClient(release) for _ in range(3)]
+    pool.analyze(None)
+    pool.analyze(None, session_id="user")
+    pool.analyze(None)
+    assert list(pool.follow_up_stream("user", "bikes?")) == [f"{id(pool._clients[1])} bikes?"]
+    assert list(pool.follow_up_stream("nobody", "bikes?")) == [SESSION_EXPIRED]
+    assert pool._in_flight == [0, 0, 0]
+
+
+def test_a_camera_stays_on_its_worker_while_it_is_nearly_as_idle():
+    pool = WorkerPool(workers=3, threads=1, affinity=False)
+    release = threading.Event()
+    release.set()
+    pool._clients = [BlockingClient(release) for _ in range(3)]
+    cam_a, cam_b = Frame(b"", camera_id="cam-a"), Frame(b"", camera_id="cam-b")
+    pool.analyze(cam_a)
+    pool.analyze(cam_b)
+    for _ in range(4):
+        pool.analyze(cam_a)
+    # Least-loaded dispatch alone would have spread cam-a's frames over every worker.
+    assert pool._dispatched == [5, 1, 0]
+
+    # Past the margin, the least-loaded worker takes the camera over.
+    pool._in_flight = [2, 0, 0]
+    assert pool._acquire(camera_id="cam-a") == 2
+    assert pool._acquire(camera_id="cam-a") == 2
+
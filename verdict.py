@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from enum import Enum
+
+
+class Verdict(Enum):
+    """The three canonical street-crossing recommendations the analysis prompt asks for."""
+    SAFE = "It appears safe to cross the street now."
+    UNSAFE = "It does not appear safe to cross the street now."
+    UNKNOWN = "Unable to determine safety from this image."
+
+    @property
+    def sentence(self) -> str:
+        return self.value
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+
+# Said when a streamed answer breaks off after part of it was already shown or spoken.
+INCOMPLETE_ANALYSIS = f"I couldn't finish checking this crossing; please don't rely on it. {Verdict.UNKNOWN.sentence}"
+
+
+def find_verdict(text: str) -> tuple | None:
+    """
+    Finds the first canonical verdict sentence in text, ignoring case and a missing final period.
+
+    Returns:
+        (Verdict, index just past the sentence), or None if no verdict was given.
+    """
+    folded = text.casefold()
+    found = None
+    for verdict in Verdict:
+        phrase = verdict.sentence.rstrip(".").casefold()
+        start = folded.find(phrase)
+        if start != -1 and (found is None or start < found[1]):
+            end = start + len(phrase)
+            if folded[end:end + 1] == ".":
+                end += 1
+            found = (verdict, start, end)
+    return (found[0], found[2]) if found else None
+
+
+def parse_verdict(text: str) -> Verdict:
+    """The verdict an analysis concludes with; UNKNOWN if it gives none."""
+    found = find_verdict(text)
+    return found[0] if found else Verdict.UNKNOWN
+
+
+def truncate_after_verdict(text: str) -> str:
+    """Drops anything generated after the first verdict sentence."""
+    found = find_verdict(text)
+    return text[:found[1]].strip() if found else text.strip()
+
+
+@dataclass(frozen=True)
+class AnalysisResult:
+    """
+    A street-crossing analysis: the free text, its parsed verdict, how many
+    tokens were decoded to produce it (0 when no generation was needed), and
+    whether it was reused from an earlier, unchanged frame of the same camera.
+    """
+    text: str
+    verdict: Verdict
+    tokens_generated: int = 0
+    reused: bool = False
+
+    @classmethod
+    def from_text(cls, text: str, tokens_generated: int = 0) -> "AnalysisResult":
+        return cls(text=text, verdict=parse_verdict(text), tokens_generated=tokens_generated)
+
+    @classmethod
+    def unknown(cls) -> "AnalysisResult":
+        return cls(text=Verdict.UNKNOWN.sentence, verdict=Verdict.UNKNOWN)
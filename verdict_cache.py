@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+import numpy as np
+from PIL import Image
+from verdict import AnalysisResult, Verdict
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_THUMBNAIL_SIZE = 32
+# Thumbnails are compared tile by tile, so a small change is not averaged away over the frame.
+DEFAULT_TILE_SIZE = 4
+# Mean absolute grey-level difference (0-255) of the most changed tile below which two frames show the same scene.
+DEFAULT_MAX_DELTA = 2.0
+# NYCTMC stills change every couple of seconds; past this a verdict is recomputed even for a still scene.
+DEFAULT_MAX_AGE_SECONDS = 6.0
+
+
+def scene_thumbnail(image: Image.Image, size: int = DEFAULT_THUMBNAIL_SIZE) -> np.ndarray:
+    """A size x size grayscale thumbnail (float32, 0-255) to compare scenes on."""
+    thumbnail = image.convert("L").resize((size, size), Image.Resampling.BOX)
+    return np.asarray(thumbnail, dtype=np.float32)
+
+
+def tile_delta(a: np.ndarray, b: np.ndarray, tile: int = DEFAULT_TILE_SIZE) -> float:
+    """The largest mean absolute difference over the tile x tile blocks of two thumbnails."""
+    diff = np.abs(a - b)
+    rows, cols = np.arange(0, diff.shape[0], tile), np.arange(0, diff.shape[1], tile)
+    sums = np.add.reduceat(np.add.reduceat(diff, rows, axis=0), cols, axis=1)
+    counts = np.add.reduceat(np.add.reduceat(np.ones_like(diff), rows, axis=0), cols, axis=1)
+    return float((sums / counts).max())
+
+
+def frame_delta(a: tuple, b: tuple) -> float:
+    """
+    The largest tile difference between matching thumbnails of two frames
+    (e.g. the whole scene, its crosswalk and its signal head), or infinity if
+    they cannot be compared.
+    """
+    if len(a) != len(b) or any(x.shape != y.shape for x, y in zip(a, b)):
+        return float("inf")
+    return max(tile_delta(x, y) for x, y in zip(a, b))
+
+
+@dataclass
+class _Entry:
+    thumbnails: tuple
+    result: AnalysisResult
+    captured_at: float
+
+
+class VerdictCache:
+    """
+    The last verdict per camera and thumbnails of the frame behind it.
+
+    A new frame from the same camera reuses that verdict when no tile of its
+    thumbnails differs from the stored ones by more than max_delta and the
+    verdict's frame is at most max_age_seconds old. "Unable to determine"
+    results are never stored, so a failed analysis is retried on the next frame.
+    """
+
+    def __init__(self, max_delta: float = DEFAULT_MAX_DELTA, max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        self.max_delta = max_delta
+        self.max_age_seconds = max_age_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.computed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_age_seconds > 0
+
+    def lookup(self, camera_id: str, thumbnails: tuple) -> AnalysisResult | None:
+        """
+        Returns the camera's last verdict, marked as reused, if the scene has not
+        materially changed and the verdict is recent enough; None otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get(camera_id)
+            if entry is None or time.time() - entry.captured_at > self.max_age_seconds:
+                self.computed += 1
+                return None
+            delta = frame_delta(entry.thumbnails, thumbnails)
+            if delta > self.max_delta:
+                self.computed += 1
+                return None
+            self.reused += 1
+        logging.info(f"Reusing the last verdict for camera {camera_id} (frame delta {delta:.2f})")
+        return replace(entry.result, reused=True)
+
+    def store(self, camera_id: str, thumbnails: tuple, result: AnalysisResult, captured_at: float | None = None):
+        """Remembers a freshly computed verdict and the frame it was computed from."""
+        if result.verdict == Verdict.UNKNOWN:
+            return
+        with self._lock:
+            self._entries[camera_id] = _Entry(thumbnails, result, captured_at or time.time())
+
+    def invalidate(self, camera_id: str):
+        with self._lock:
+            self._entries.pop(camera_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"cameras": len(self._entries), "reused": self.reused, "computed": self.computed}
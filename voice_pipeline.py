@@ -1,8 +1,10 @@
 import asyncio
+import io
 import os
 import logging
 import base64
-from typing import Optional
+import wave
+from typing import AsyncIterator, Iterable, Optional
 import openai
 import re
 
@@ -71,7 +73,7 @@ async def transcribe_user_request_realtime(audio_bytes: bytes, client: openai.As
 
 # This is a placeholder for the real-time TTS.
 # The actual implementation would require the OpenAI Realtime SDK.
-async def generate_assistant_speech_realtime(text: str, client: openai.AsyncOpenAI) -> Optional[bytes]:
+async def generate_assistant_speech_realtime(text: str, client: openai.AsyncOpenAI, response_format: str = "mp3") -> Optional[bytes]:
     """
     Generates speech from text using OpenAI's TTS API.
     NOTE: This is a non-real-time implementation for demonstration.
@@ -82,9 +84,105 @@ async def generate_assistant_speech_realtime(text: str, client: openai.AsyncOpen
             model="tts-1",
             voice="alloy",
             input=text,
+            response_format=response_format,
         )
         logger.info("Speech generation successful.")
         return response.content
     except Exception as e:
         logger.error(f"An error occurred during TTS generation: {e}")
         return None
+
+# Words that end in a period without ending the sentence ("1st Ave. and 110th St.").
+ABBREVIATIONS = {"st", "ave", "av", "blvd", "rd", "dr", "pl", "pkwy", "hwy", "e.g", "i.e", "etc", "vs", "mr", "mrs", "ms", "no", "approx"}
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+")
+
+class SentenceChunker:
+    """
+    Splits streamed text into complete sentences.
+
+    feed() returns the sentences finished by the new text, so each can be sent
+    to TTS while the rest of the answer is still being generated; flush()
+    returns whatever remains once the stream ends.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> list:
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self._buffer):
+            sentence = self._buffer[start:match.end()].strip()
+            words = sentence.rstrip(".!?\"')]").split()
+            if sentence.endswith(".") and words and words[-1].lower() in ABBREVIATIONS:
+                continue
+            sentences.append(sentence)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest
+
+async def aiter_in_thread(iterable: Iterable) -> AsyncIterator:
+    """Iterates a blocking iterator (such as a token stream) without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    iterator = iter(iterable)
+    done = object()
+    while True:
+        item = await loop.run_in_executor(None, next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+async def speak_sentences(chunks: AsyncIterator[str], client: openai.AsyncOpenAI, response_format: str = "wav") -> AsyncIterator[tuple]:
+    """
+    Sends each sentence of a streamed answer to TTS as soon as it is complete.
+
+    Speech for later sentences is requested while earlier ones are still being
+    generated or played; results are yielded in sentence order.
+
+    Args:
+        chunks: The streamed answer text.
+        client: The OpenAI client.
+        response_format: The TTS audio format.
+
+    Yields:
+        (sentence, audio bytes or None) pairs.
+    """
+    pending = asyncio.Queue()
+
+    async def produce():
+        chunker = SentenceChunker()
+        try:
+            async for chunk in chunks:
+                for sentence in chunker.feed(chunk):
+                    await pending.put((sentence, asyncio.create_task(
+                        generate_assistant_speech_realtime(sentence, client, response_format))))
+            rest = chunker.flush()
+            if rest:
+                await pending.put((rest, asyncio.create_task(
+                    generate_assistant_speech_realtime(rest, client, response_format))))
+        finally:
+            await pending.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (item := await pending.get()) is not None:
+            sentence, speech = item
+            yield sentence, await speech
+        await producer
+    finally:
+        producer.cancel()
+
+def audio_duration(audio_bytes: bytes) -> Optional[float]:
+    """Playback length of WAV audio in seconds, or None if it is not WAV."""
+    try:
+        with wave.open(io.BytesIO(audio_bytes)) as wav:
+            bytes_per_second = wav.getframerate() * wav.getnchannels() * wav.getsampwidth()
+        # Streamed WAV headers often carry a placeholder length, so measure the payload instead.
+        return max(0, len(audio_bytes) - 44) / bytes_per_second
+    except Exception:
+        return None
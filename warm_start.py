@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+from typing import Any
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class StagedStartup:
+    """
+    Runs startup stages one after another on a background thread and times
+    each one, so the UI can render while heavy imports, model loading and
+    warm-up finish.
+
+    Each stage is called with the previous stage's result (None for the
+    first); wait() returns the last stage's result.
+
+    Args:
+        name: What is starting, e.g. "vision model"; used in logs and the report.
+        stages: (stage name, callable) pairs, run in order.
+    """
+
+    def __init__(self, name: str, stages: list):
+        self.name = name
+        self.stages = stages
+        self.timings = {}
+        self.stage = None
+        self._result = None
+        self._error = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self) -> "StagedStartup":
+        self._thread = threading.Thread(target=self._run, name=f"startup-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        result = None
+        try:
+            for stage, fn in self.stages:
+                self.stage = stage
+                start = time.perf_counter()
+                result = fn(result)
+                self.timings[stage] = time.perf_counter() - start
+                logging.info(f"Startup of {self.name}: {stage} took {self.timings[stage]:.2f}s")
+            self._result = result
+        except Exception as e:
+            logging.error(f"Startup of {self.name} failed during {self.stage}: {e}")
+            self._error = e
+        finally:
+            self.stage = None
+            self._done.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def error(self) -> Exception | None:
+        return self._error
+
+    def wait(self, timeout: float | None = None) -> Any:
+        """
+        Blocks until every stage has run.
+
+        Returns:
+            The last stage's result.
+
+        Raises:
+            TimeoutError: If startup is still running after timeout seconds.
+            Exception: Whatever the failing stage raised.
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Startup of {self.name} is still running ({self.stage})")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def startup_report(startups: list, timings: dict | None = None) -> list:
+    """
+    Startup costs as (stage, seconds) rows: the given foreground timings first,
+    then every stage of each background startup. Stages that have not finished
+    yet have None seconds.
+
+    Args:
+        startups: StagedStartup objects.
+        timings: Extra {stage: seconds} measured outside of them, e.g. app imports.
+    """
+    rows = list((timings or {}).items())
+    for startup in startups:
+        for stage, _ in startup.stages:
+            rows.append((f"{startup.name}: {stage}", startup.timings.get(stage)))
+    return rows
+
+
+def format_startup_report(rows: list) -> str:
+    lines = []
+    for stage, seconds in rows:
+        lines.append(f"{stage:<40}{'pending' if seconds is None else f'{seconds:.2f}s':>10}")
+    total = sum(seconds for _, seconds in rows if seconds is not None)
+    lines.append(f"{'sum of stages':<40}{f'{total:.2f}s':>10}")
+    return "\n".join(lines)
+
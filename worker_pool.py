@@ -0,0 +1,275 @@
+"""
+Pool of CPU inference worker processes for Moondream2.
+
+One PyTorch process stops scaling long before a large host runs out of cores,
+and it serves concurrent users one decode at a time. The pool runs N worker
+processes instead, each a ModelServer on a private Unix socket with its own
+intra-op/inter-op thread counts and, optionally, its own set of cores. Every
+request goes to the worker with the fewest requests in flight, or to the worker
+that last analyzed the same camera while it is nearly as idle (its embedding and
+verdict caches hold that camera's frames), except follow-up questions, which go
+to the worker holding the user's session.
+
+Usage:
+    CV4VI_INFERENCE_WORKERS=4 CV4VI_WORKER_THREADS=8 streamlit run app.py
+    python testing/benchmark_workers.py --layouts 1x32,2x16,4x8,8x4
+"""
+
+import logging
+import multiprocessing
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from analysis_session import SESSION_EXPIRED
+from frame import Frame
+from model_server import ModelClient, ModelServerError
+from verdict import AnalysisResult
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+INFERENCE_WORKERS = int(os.environ.get("CV4VI_INFERENCE_WORKERS", "0"))
+# Intra-op threads per worker; 0 splits the available cores evenly between workers.
+WORKER_THREADS = int(os.environ.get("CV4VI_WORKER_THREADS", "0"))
+WORKER_INTEROP_THREADS = int(os.environ.get("CV4VI_WORKER_INTEROP_THREADS", "1"))
+WORKER_AFFINITY = os.environ.get("CV4VI_WORKER_AFFINITY", "1") != "0"
+WORKER_START_TIMEOUT_SECONDS = float(os.environ.get("CV4VI_WORKER_START_TIMEOUT", "600"))
+# Users whose session worker is remembered; the workers expire the sessions themselves.
+MAX_SESSION_ROUTES = 4096
+# A camera's frames stay on the worker that last analyzed it while that worker has at
+# most this many more requests in flight than the least-loaded one.
+CAMERA_AFFINITY_MARGIN = int(os.environ.get("CV4VI_WORKER_CAMERA_MARGIN", "1"))
+MAX_CAMERA_ROUTES = 4096
+
+
+def available_cpus() -> list:
+    """The cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def partition_cpus(cpus: list, workers: int, threads: int) -> list:
+    """
+    Splits cores into one contiguous, non-overlapping set per worker.
+
+    Args:
+        cpus: The cores to share out.
+        workers: The number of worker processes.
+        threads: Intra-op threads per worker; each worker gets that many cores.
+
+    Returns:
+        One list of cores per worker, or None for every worker if the layout
+        needs more cores than there are (the workers are then left unpinned).
+    """
+    if workers * threads > len(cpus):
+        logging.warning(f"{workers} workers x {threads} threads oversubscribe {len(cpus)} cores; not pinning workers")
+        return [None] * workers
+    return [cpus[i * threads:(i + 1) * threads] for i in range(workers)]
+
+
+def _worker_main(address: str, authkey: bytes, precision: str | None, threads: int, interop_threads: int,
+                 cpus: list | None):
+    """Entry point of a worker process: fixes its thread budget and cores, then serves the model."""
+    # OpenMP and MKL read these when torch is first imported.
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(interop_threads)
+
+    from model_server import ModelServer
+    from moondream_analyzer import load_model, warm_up
+    model, tokenizer = load_model(precision)
+    if model is None:
+        raise SystemExit("Failed to load the Moondream model.")
+    warm_up(model)
+    logging.info(f"Inference worker {os.getpid()} serving on {address} with {threads} threads"
+                 f"{f' on cores {cpus}' if cpus else ''}")
+    server = ModelServer(model, tokenizer, address=address, authkey=authkey)
+    try:
+        server.serve_forever()
+    finally:
+        server.close()
+
+
+class WorkerPool:
+    """
+    N model-server processes on one host, used like a ModelClient.
+
+    Args:
+        workers: The number of worker processes.
+        threads: Intra-op threads per worker; defaults to an even share of the cores.
+        interop_threads: Inter-op threads per worker.
+        affinity: Pin each worker to its own contiguous set of `threads` cores.
+        precision: The model precision every worker loads (see load_model).
+        authkey: The key the workers' sockets are authenticated with; random per pool by default.
+    """
+
+    def __init__(self, workers: int = INFERENCE_WORKERS, threads: int = WORKER_THREADS,
+                 interop_threads: int = WORKER_INTEROP_THREADS, affinity: bool = WORKER_AFFINITY,
+                 precision: str | None = None, authkey: bytes | None = None):
+        if workers < 1:
+            raise ValueError("A worker pool needs at least one worker")
+        cpus = available_cpus()
+        self.workers = workers
+        self.threads = threads or max(1, len(cpus) // workers)
+        self.interop_threads = interop_threads
+        self.cpus = partition_cpus(cpus, workers, self.threads) if affinity else [None] * workers
+        self.precision = precision
+        self.authkey = authkey or secrets.token_bytes(32)
+        self._socket_dir = None
+        self._processes = []
+        self._clients = []
+        self._in_flight = [0] * workers
+        self._dispatched = [0] * workers
+        self._session_workers = OrderedDict()
+        self._camera_workers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, timeout: float = WORKER_START_TIMEOUT_SECONDS) -> "WorkerPool":
+        """
+        Starts every worker and waits until all of them have loaded the model.
+
+        Raises:
+            ModelServerError: If a worker exits or is not serving within timeout seconds.
+        """
+        context = multiprocessing.get_context("spawn")
+        self._socket_dir = tempfile.mkdtemp(prefix="cv4vi-workers-")
+        addresses = [os.path.join(self._socket_dir, f"worker-{i}.sock") for i in range(self.workers)]
+        for address, cpus in zip(addresses, self.cpus):
+            process = context.Process(
+                target=_worker_main,
+                args=(address, self.authkey, self.precision, self.threads, self.interop_threads, cpus),
+                name="cv4vi-inference-worker", daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+            self._clients.append(ModelClient(address, authkey=self.authkey))
+        logging.info(f"Starting {self.workers} inference workers with {self.threads} threads each")
+
+        deadline = time.monotonic() + timeout
+        for i, (address, process) in enumerate(zip(addresses, self._processes)):
+            # The socket appears once the worker has loaded the model and is listening.
+            while not os.path.exists(address):
+                if not process.is_alive():
+                    self.close()
+                    raise ModelServerError(f"Inference worker {i} exited with code {process.exitcode}")
+                if time.monotonic() > deadline:
+                    self.close()
+                    raise ModelServerError(f"Inference worker {i} did not start within {timeout:.0f}s")
+                time.sleep(0.1)
+        if not self.ping():
+            self.close()
+            raise ModelServerError("Inference workers started but are not answering")
+        return self
+
+    @staticmethod
+    def _route(routes: OrderedDict, key: str, i: int, limit: int):
+        routes[key] = i
+        routes.move_to_end(key)
+        while len(routes) > limit:
+            routes.popitem(last=False)
+
+    def _acquire(self, session_id: str | None = None, camera_id: str | None = None) -> int:
+        """
+        Picks the worker with the fewest requests in flight (then the fewest
+        served), or the camera's last worker if it has at most
+        CAMERA_AFFINITY_MARGIN more in flight, and counts the new request. With a
+        session id, that worker is remembered as the one holding the user's session.
+        """
+        with self._lock:
+            i = min(range(self.workers), key=lambda w: (self._in_flight[w], self._dispatched[w]))
+            if camera_id is not None:
+                last = self._camera_workers.get(camera_id)
+                if last is not None and self._in_flight[last] - self._in_flight[i] <= CAMERA_AFFINITY_MARGIN:
+                    i = last
+                self._route(self._camera_workers, camera_id, i, MAX_CAMERA_ROUTES)
+            if session_id is not None:
+                self._route(self._session_workers, session_id, i, MAX_SESSION_ROUTES)
+            self._in_flight[i] += 1
+            self._dispatched[i] += 1
+            return i
+
+    def _release(self, i: int):
+        with self._lock:
+            self._in_flight[i] -= 1
+
+    def ping(self) -> bool:
+        return bool(self._clients) and all(client.ping() for client in self._clients)
+
+    def _session_worker(self, session_id: str) -> int | None:
+        with self._lock:
+            i = self._session_workers.get(session_id)
+            if i is not None:
+                self._in_flight[i] += 1
+                self._dispatched[i] += 1
+            return i
+
+    def analyze(self, frame: Frame, question: str | None = None, session_id: str | None = None) -> AnalysisResult:
+        """Runs the street-crossing analysis on the camera's worker or the least-loaded one."""
+        i = self._acquire(session_id, getattr(frame, "camera_id", None))
+        try:
+            return self._clients[i].analyze(frame, question, session_id)
+        finally:
+            self._release(i)
+
+    def analyze_stream(self, frame: Frame, session_id: str | None = None):
+        """Runs the street-crossing analysis like analyze, yielding text as it is generated."""
+        i = self._acquire(session_id, getattr(frame, "camera_id", None))
+        try:
+            yield from self._clients[i].analyze_stream(frame, session_id)
+        finally:
+            self._release(i)
+
+    def follow_up(self, session_id: str, question: str) -> AnalysisResult | None:
+        """Answers a follow-up question on the worker holding the user's session; None if there is none."""
+        i = self._session_worker(session_id)
+        if i is None:
+            return None
+        try:
+            return self._clients[i].follow_up(session_id, question)
+        finally:
+            self._release(i)
+
+    def follow_up_stream(self, session_id: str, question: str):
+        """Answers a follow-up question on the worker holding the user's session, yielding text as it is generated."""
+        i = self._session_worker(session_id)
+        if i is None:
+            yield SESSION_EXPIRED
+            return
+        try:
+            yield from self._clients[i].follow_up_stream(session_id, question)
+        finally:
+            self._release(i)
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight, dispatched = list(self._in_flight), list(self._dispatched)
+        workers = []
+        for i, (process, client) in enumerate(zip(self._processes, self._clients)):
+            try:
+                server = client.stats()
+            except Exception as e:
+                server = {"error": str(e)}
+            workers.append({"pid": process.pid, "alive": process.is_alive(), "cpus": self.cpus[i],
+                            "in_flight": in_flight[i], "dispatched": dispatched[i], "server": server})
+        return {"threads": self.threads, "interop_threads": self.interop_threads, "workers": workers}
+
+    def close(self):
+        for client in self._clients:
+            client.close()
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self._processes:
+            process.join(timeout=10)
+        self._clients, self._processes = [], []
+        if self._socket_dir:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+            self._socket_dir = None